@@ -1,10 +1,95 @@
+import os
 import sqlite3
+import sys
 import hashlib
+import threading
+import time
 from datetime import datetime
+import config
+import metrics
 
-# Database connection with threading support
-conn = sqlite3.connect('nutrition_tracker.db', check_same_thread=False)
-cursor = conn.cursor()
+# Each thread gets its own connection, opened on first use. A connection is
+# never reused across fork(): a child process opens fresh ones, and the
+# inherited ones are kept referenced so the child never closes them under the
+# parent.
+_local = threading.local()
+_inherited = []
+
+# Tables are created by the first connection rather than at import, so importing
+# DB (and the app) doesn't touch the database file
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def _connection():
+    """This thread's connection state in this process"""
+    if getattr(_local, 'pid', None) != os.getpid():
+        if getattr(_local, 'conn', None) is not None:
+            _inherited.append(_local.conn)
+        _local.conn = sqlite3.connect(config.DATABASE_PATH, check_same_thread=False,
+                                      timeout=config.DATABASE_BUSY_TIMEOUT)
+        if config.DATABASE_WAL:
+            _local.conn.execute('PRAGMA journal_mode=WAL')
+        _local.cursor = _local.conn.cursor(_TimedCursor)
+        _local.pid = os.getpid()
+        if not _schema_ready:
+            _ensure_schema()
+    return _local
+
+
+def _ensure_schema():
+    global _schema_ready
+    with _schema_lock:
+        if _schema_ready:
+            return
+        try:
+            init_database()
+        except Exception:
+            close_connection()
+            raise
+        _schema_ready = True
+
+
+# Bound once: _TimedCursor runs on every statement
+_perf_counter = time.perf_counter
+_getframe = sys._getframe
+_observe = metrics.observe
+_execute = sqlite3.Cursor.execute
+_executemany = sqlite3.Cursor.executemany
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """Records each statement's time in metrics, labelled with the DB.py function that ran it"""
+
+    def execute(self, sql, parameters=()):
+        start = _perf_counter()
+        try:
+            return _execute(self, sql, parameters)
+        finally:
+            _observe('nutrition_db_query_duration_seconds', (_getframe(1).f_code.co_name,), _perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = _perf_counter()
+        try:
+            return _executemany(self, sql, seq_of_parameters)
+        finally:
+            _observe('nutrition_db_query_duration_seconds', (_getframe(1).f_code.co_name,), _perf_counter() - start)
+
+
+class _ThreadBound:
+    """Module-level `conn` / `cursor`: forwards to the calling thread's own object"""
+
+    __slots__ = ('_name',)
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(getattr(_connection(), self._name), attr)
+
+
+conn = _ThreadBound('conn')
+cursor = _ThreadBound('cursor')
 
 def init_database():
     """Initialize all database tables"""
@@ -19,10 +104,16 @@ def init_database():
             sex TEXT CHECK(sex IN ('male', 'female')),
             activity_level TEXT CHECK(activity_level IN ('sedentary', 'light', 'moderate', 'active', 'very_active')),
             height_inches REAL,
+            age INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    # Older databases were created before users.age existed
+    cursor.execute('PRAGMA table_info(users)')
+    if 'age' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE users ADD COLUMN age INTEGER')
+    
     # Foods table (master list of unique food items)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS foods (
@@ -70,6 +161,110 @@ def init_database():
         )
     ''')
     
+    # Nutrition lookup cache (per-serving web lookups keyed by normalized food name)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS nutrition_cache (
+            food_key TEXT PRIMARY KEY,
+            nutrition_json TEXT,              -- NULL for a cached miss
+            fetched_at REAL NOT NULL,         -- unix timestamp
+            expires_at REAL NOT NULL          -- unix timestamp
+        )
+    ''')
+    
+    # Precomputed per-user recommendations (written by deficiency_job.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS deficiency_results (
+            user_id INTEGER NOT NULL,
+            result_date DATE NOT NULL,
+            recommendations TEXT NOT NULL,    -- JSON list of strings from checkDeficiencies
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, result_date),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+    # A stored result is dropped once its inputs change (a meal that day, or the user's goals),
+    # so /api/deficiencies recomputes it live until the next run
+    for event, row in (('INSERT', 'NEW'), ('DELETE', 'OLD'), ('UPDATE', 'OLD'), ('UPDATE', 'NEW')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS deficiency_results_meal_{event.lower()}_{row.lower()}
+            AFTER {event} ON meal_entries
+            BEGIN
+                DELETE FROM deficiency_results WHERE user_id = {row}.user_id AND result_date = {row}.entry_date;
+            END
+        ''')
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS deficiency_results_goals_{event.lower()}
+            AFTER {event} ON user_goals
+            BEGIN
+                DELETE FROM deficiency_results WHERE user_id = {row}.user_id;
+            END
+        ''')
+    
+    # Nutrients beyond the four macros (sodium, fiber, vitamins...), one row per food and nutrient.
+    # Loaded into nutrient_store.py's columnar arrays; the foods row stays macro-only.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS food_nutrients (
+            food_id INTEGER NOT NULL,
+            nutrient TEXT NOT NULL,           -- key from nutrient_store.nutrient_key, e.g. "sodium"
+            amount REAL NOT NULL,             -- per serving, in the unit the source reports
+            PRIMARY KEY (food_id, nutrient),
+            FOREIGN KEY (food_id) REFERENCES foods(id)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Write counter per user and day, bumped by the triggers below on every meal_entries change.
+    # Read endpoints derive their ETags from it (see http_cache.py).
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meal_versions (
+            user_id INTEGER NOT NULL,
+            entry_date DATE NOT NULL,
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP NOT NULL,    -- UTC, second resolution (for Last-Modified)
+            PRIMARY KEY (user_id, entry_date)
+        ) WITHOUT ROWID
+    ''')
+    for event, row in (('INSERT', 'NEW'), ('DELETE', 'OLD'), ('UPDATE', 'OLD'), ('UPDATE', 'NEW')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS meal_versions_{event.lower()}_{row.lower()}
+            AFTER {event} ON meal_entries
+            BEGIN
+                INSERT INTO meal_versions (user_id, entry_date, version, updated_at)
+                VALUES ({row}.user_id, {row}.entry_date, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id, entry_date) DO UPDATE
+                SET version = version + 1, updated_at = CURRENT_TIMESTAMP;
+            END
+        ''')
+    
+    # Write counter per table, bumped by triggers, for in-memory copies of a table that other
+    # processes may change (nutrient_store.py reloads food_nutrients when its version moves)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS table_versions_food_nutrients_{event.lower()}
+            AFTER {event} ON food_nutrients
+            BEGIN
+                INSERT INTO table_versions (table_name, version) VALUES ('food_nutrients', 1)
+                ON CONFLICT (table_name) DO UPDATE SET version = version + 1;
+            END
+        ''')
+    
+    # Cohort queries aggregate one date across all users
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_meal_entries_date_user ON meal_entries(entry_date, user_id)')
+    # Per-user history queries (analytics, projections, the entries listing) read one user's dates.
+    # Ordered by (entry_date, id) for keyset pagination and covering every meal_entries column those
+    # queries read, so they never touch the table; it supersedes the old (user_id, entry_date) index
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_meal_entries_user_history
+        ON meal_entries(user_id, entry_date, id, food_id, quantity_servings, meal_type, source)
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_meal_entries_user_date')
+    
     conn.commit()
     print("Database initialized successfully!")
 
@@ -81,7 +276,7 @@ def verify_password(password, stored_hash):
     """Verify password against stored hash"""
     return hash_password(password) == stored_hash
 
-def create_user(username, password, weight_lbs=None, sex=None, activity_level=None, height_inches=None):
+def create_user(username, password, weight_lbs=None, sex=None, activity_level=None, height_inches=None, age=None):
     """Create a new user. Returns True if successful, False if username already exists."""
     # Check if username already exists
     cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
@@ -91,9 +286,9 @@ def create_user(username, password, weight_lbs=None, sex=None, activity_level=No
     password_hash = hash_password(password)
     
     cursor.execute('''
-        INSERT INTO users (username, password_hash, weight_lbs, sex, activity_level, height_inches)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (username, password_hash, weight_lbs, sex, activity_level, height_inches))
+        INSERT INTO users (username, password_hash, weight_lbs, sex, activity_level, height_inches, age)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (username, password_hash, weight_lbs, sex, activity_level, height_inches, age))
     
     conn.commit()
     return True
@@ -117,6 +312,54 @@ def add_food(name, serving_size_value, serving_size_unit, calories_per_serving,
     conn.commit()
     return cursor.lastrowid
 
+def get_all_foods():
+    """Get every food as rows of (id, name, calories, protein_g, carbs_g, fat_g) per serving"""
+    cursor.execute('''
+        SELECT id, name, calories_per_serving, protein_g_per_serving, carbs_g_per_serving, fat_g_per_serving
+        FROM foods
+    ''')
+    return cursor.fetchall()
+
+def get_foods_after(food_id):
+    """Get foods with an id above food_id (added since), as get_all_foods rows in id order"""
+    cursor.execute('''
+        SELECT id, name, calories_per_serving, protein_g_per_serving, carbs_g_per_serving, fat_g_per_serving
+        FROM foods
+        WHERE id > ?
+        ORDER BY id
+    ''', (food_id,))
+    return cursor.fetchall()
+
+def set_food_nutrients(food_id, nutrients):
+    """Replace the extra nutrients stored for a food. nutrients is a dict of {nutrient: amount per serving}.
+
+    Returns the food_nutrients table version (see get_table_version) as (before, after) this write."""
+    cursor.execute('DELETE FROM food_nutrients WHERE food_id = ?', (food_id,))
+    changed = cursor.rowcount
+    cursor.executemany('''
+        INSERT INTO food_nutrients (food_id, nutrient, amount)
+        VALUES (?, ?, ?)
+    ''', [(food_id, nutrient, amount) for nutrient, amount in nutrients.items()])
+    changed += len(nutrients)
+    # Still inside the write transaction, so no other writer has moved the version since
+    cursor.execute("SELECT version FROM table_versions WHERE table_name = 'food_nutrients'")
+    row = cursor.fetchone()
+    version = row[0] if row else 0
+    
+    conn.commit()
+    return version - changed, version
+
+def get_table_version(table_name):
+    """Get a table's write counter (0 if it was never written); every row changed bumps it by one"""
+    cursor.execute('SELECT version FROM table_versions WHERE table_name = ?', (table_name,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def get_all_food_nutrients():
+    """Get every stored extra nutrient as rows of (food_id, nutrient, amount)"""
+    cursor.execute('SELECT food_id, nutrient, amount FROM food_nutrients')
+    return cursor.fetchall()
+
 def add_meal_entry(user_id, food_name, quantity_servings, meal_type='snack', source='receipt', entry_date=None):
     """Add a meal entry for a user (quantity in servings)"""
     if entry_date is None:
@@ -167,9 +410,363 @@ def get_user_daily_nutrition(user_id, date=None):
         }
     return {'calories': 0, 'protein_g': 0, 'carbs_g': 0, 'fat_g': 0}
 
-def close_connection():
-    """Close database connection"""
-    conn.close()
+def get_meal_version(user_id, date):
+    """Get the write counter for a user's day as (version, updated_at); (0, None) if nothing was ever logged"""
+    cursor.execute('SELECT version, updated_at FROM meal_versions WHERE user_id = ? AND entry_date = ?',
+                   (user_id, date))
+    return cursor.fetchone() or (0, None)
+
+def get_daily_food_servings(user_id, date=None):
+    """Get the servings a user logged on a date as rows of (food_id, total_servings)"""
+    if date is None:
+        date = datetime.now().date()
+    
+    cursor.execute('''
+        SELECT food_id, SUM(quantity_servings)
+        FROM meal_entries
+        WHERE user_id = ? AND entry_date = ?
+        GROUP BY food_id
+    ''', (user_id, date))
+    return cursor.fetchall()
+
+def get_meal_entries(user_id, before=None, limit=50):
+    """Get a user's meal entries, newest first, joined with their food.
+
+    Keyset pagination over (entry_date, id): before is None for the first page,
+    an entry_date (entries on earlier days) or an (entry_date, id) pair (entries
+    after that one). Returns rows of (id, entry_date, meal_type, source,
+    quantity_servings, food_id, food_name, serving_size_value, serving_size_unit,
+    calories, protein_g, carbs_g, fat_g per serving)."""
+    if before is None:
+        condition, params = '', ()
+    elif isinstance(before, tuple):
+        condition, params = 'AND (me.entry_date, me.id) < (?, ?)', before
+    else:
+        condition, params = 'AND me.entry_date < ?', (before,)
+    
+    cursor.execute(f'''
+        SELECT 
+            me.id, me.entry_date, me.meal_type, me.source, me.quantity_servings,
+            f.id, f.name, f.serving_size_value, f.serving_size_unit,
+            f.calories_per_serving, f.protein_g_per_serving, f.carbs_g_per_serving, f.fat_g_per_serving
+        FROM meal_entries me
+        JOIN foods f ON me.food_id = f.id
+        WHERE me.user_id = ? {condition}
+        ORDER BY me.entry_date DESC, me.id DESC
+        LIMIT ?
+    ''', (user_id, *params, limit))
+    return cursor.fetchall()
+
+def get_meal_history(user_id, after=None, limit=1000):
+    """Get a user's meal entries, oldest first, joined with their food (for export).
+
+    Keyset pagination over (entry_date, id): after is None for the first chunk,
+    else the (entry_date, id) of the previous chunk's last row. Each chunk is a
+    range scan that finishes before it returns, so a slow reader of a long
+    export never holds a statement (and a WAL snapshot) open. Returns rows of
+    (id, entry_date, meal_type, source, quantity_servings, food_name,
+    serving_size_value, serving_size_unit, calories, protein_g, carbs_g, fat_g
+    per serving)."""
+    condition, params = ('AND (me.entry_date, me.id) > (?, ?)', after) if after else ('', ())
+    
+    cursor.execute(f'''
+        SELECT 
+            me.id, me.entry_date, me.meal_type, me.source, me.quantity_servings,
+            f.name, f.serving_size_value, f.serving_size_unit,
+            f.calories_per_serving, f.protein_g_per_serving, f.carbs_g_per_serving, f.fat_g_per_serving
+        FROM meal_entries me
+        JOIN foods f ON me.food_id = f.id
+        WHERE me.user_id = ? {condition}
+        ORDER BY me.entry_date, me.id
+        LIMIT ?
+    ''', (user_id, *params, limit))
+    return cursor.fetchall()
+
+def get_food_ids(names):
+    """Get {name: food_id} for the names that exist, picking the oldest food when a name repeats
+    (the one add_meal_entry resolves to)"""
+    names = list(names)
+    found = {}
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(names), 500):
+        chunk = names[start:start + 500]
+        cursor.execute(f'''
+            SELECT name, MIN(id) FROM foods
+            WHERE name IN ({', '.join('?' * len(chunk))})
+            GROUP BY name
+        ''', chunk)
+        found.update(cursor.fetchall())
+    return found
 
-# Initialize database when module is imported
-init_database()
\ No newline at end of file
+def add_meal_entries(user_id, entries, new_foods=()):
+    """Add many meal entries for a user in one transaction (bulk import).
+
+    new_foods are rows of (name, serving_size_value, serving_size_unit, calories,
+    protein_g, carbs_g, fat_g per serving) created first; entries are rows of
+    (food, quantity_servings, meal_type, source, entry_date) where food is a
+    food_id or the name of one of new_foods. Nothing is written if any row fails.
+    Returns {name: food_id} for the created foods."""
+    created = {}
+    try:
+        for food in new_foods:
+            cursor.execute('''
+                INSERT INTO foods (name, serving_size_value, serving_size_unit, calories_per_serving, protein_g_per_serving, carbs_g_per_serving, fat_g_per_serving)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', food)
+            created[food[0]] = cursor.lastrowid
+        
+        cursor.executemany('''
+            INSERT INTO meal_entries (user_id, food_id, quantity_servings, meal_type, source, entry_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(user_id, created.get(food, food), *rest) for food, *rest in entries])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return created
+
+def get_meal_entry_nutrition(entry_id):
+    """Get one meal entry's totals as (user_id, entry_date, calories, protein_g, carbs_g, fat_g), or None"""
+    cursor.execute('''
+        SELECT 
+            me.user_id,
+            me.entry_date,
+            me.quantity_servings * f.calories_per_serving,
+            me.quantity_servings * f.protein_g_per_serving,
+            me.quantity_servings * f.carbs_g_per_serving,
+            me.quantity_servings * f.fat_g_per_serving
+        FROM meal_entries me
+        JOIN foods f ON me.food_id = f.id
+        WHERE me.id = ?
+    ''', (entry_id,))
+    return cursor.fetchone()
+
+def get_daily_totals(user_id):
+    """Get a user's whole history as rows of (entry_date, calories, protein_g, carbs_g, fat_g, max entry id), oldest first"""
+    cursor.execute('''
+        SELECT 
+            me.entry_date,
+            SUM(me.quantity_servings * f.calories_per_serving),
+            SUM(me.quantity_servings * f.protein_g_per_serving),
+            SUM(me.quantity_servings * f.carbs_g_per_serving),
+            SUM(me.quantity_servings * f.fat_g_per_serving),
+            MAX(me.id)
+        FROM meal_entries me
+        JOIN foods f ON me.food_id = f.id
+        WHERE me.user_id = ?
+        GROUP BY me.entry_date
+        ORDER BY me.entry_date
+    ''', (user_id,))
+    return cursor.fetchall()
+
+def get_nutrition_cache_entries(now):
+    """Get all unexpired nutrition cache rows as (food_key, nutrition_json, fetched_at, expires_at)"""
+    cursor.execute('''
+        SELECT food_key, nutrition_json, fetched_at, expires_at
+        FROM nutrition_cache
+        WHERE expires_at > ?
+        ORDER BY fetched_at
+    ''', (now,))
+    return cursor.fetchall()
+
+def get_nutrition_cache_entry(food_key, now):
+    """Get a single unexpired nutrition cache row, or None"""
+    cursor.execute('''
+        SELECT food_key, nutrition_json, fetched_at, expires_at
+        FROM nutrition_cache
+        WHERE food_key = ? AND expires_at > ?
+    ''', (food_key, now))
+    return cursor.fetchone()
+
+def set_nutrition_cache_entry(food_key, nutrition_json, fetched_at, expires_at):
+    """Insert or replace a nutrition cache row (nutrition_json is None for a miss)"""
+    cursor.execute('''
+        INSERT OR REPLACE INTO nutrition_cache (food_key, nutrition_json, fetched_at, expires_at)
+        VALUES (?, ?, ?, ?)
+    ''', (food_key, nutrition_json, fetched_at, expires_at))
+    
+    conn.commit()
+
+def purge_nutrition_cache(now):
+    """Delete expired nutrition cache rows. Returns the number of rows removed."""
+    cursor.execute('DELETE FROM nutrition_cache WHERE expires_at <= ?', (now,))
+    conn.commit()
+    return cursor.rowcount
+
+def get_all_daily_nutrition(date):
+    """Get total nutrition per user for a date as rows of (user_id, calories, protein_g, carbs_g, fat_g)"""
+    cursor.execute('''
+        SELECT 
+            me.user_id,
+            SUM(me.quantity_servings * f.calories_per_serving) as total_calories,
+            SUM(me.quantity_servings * f.protein_g_per_serving) as total_protein,
+            SUM(me.quantity_servings * f.carbs_g_per_serving) as total_carbs,
+            SUM(me.quantity_servings * f.fat_g_per_serving) as total_fat
+        FROM meal_entries me
+        JOIN foods f ON me.food_id = f.id
+        WHERE me.entry_date = ?
+        GROUP BY me.user_id
+    ''', (date,))
+    return cursor.fetchall()
+
+def get_all_daily_food_servings(date):
+    """Get the servings every user logged on a date as rows of (user_id, food_id, total_servings)"""
+    cursor.execute('''
+        SELECT user_id, food_id, SUM(quantity_servings)
+        FROM meal_entries
+        WHERE entry_date = ?
+        GROUP BY user_id, food_id
+    ''', (date,))
+    return cursor.fetchall()
+
+def get_user_goals(user_id):
+    """Get a user's goals as a dict, or None if no goals are set"""
+    cursor.execute('''
+        SELECT goal_weight_change_lbs_per_week, goal_protein_g, goal_protein_pct, goal_carbs_pct, goal_fat_pct
+        FROM user_goals
+        WHERE user_id = ?
+    ''', (user_id,))
+    result = cursor.fetchone()
+    if result:
+        return {
+            'goal_weight_change_lbs_per_week': result[0],
+            'goal_protein_g': result[1],
+            'goal_macros_pct': [result[2], result[3], result[4]]
+        }
+    return None
+
+def set_user_goals(user_id, goal_weight_change_lbs_per_week, goal_protein_g, goal_macros_pct):
+    """Insert or update a user's goals (goal_macros_pct is [protein_pct, carbs_pct, fat_pct])"""
+    protein_pct, carbs_pct, fat_pct = goal_macros_pct
+    cursor.execute('''
+        INSERT INTO user_goals (user_id, goal_weight_change_lbs_per_week, goal_protein_g,
+                                goal_protein_pct, goal_carbs_pct, goal_fat_pct)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            goal_weight_change_lbs_per_week = excluded.goal_weight_change_lbs_per_week,
+            goal_protein_g = excluded.goal_protein_g,
+            goal_protein_pct = excluded.goal_protein_pct,
+            goal_carbs_pct = excluded.goal_carbs_pct,
+            goal_fat_pct = excluded.goal_fat_pct,
+            updated_at = CURRENT_TIMESTAMP
+    ''', (user_id, goal_weight_change_lbs_per_week, goal_protein_g, protein_pct, carbs_pct, fat_pct))
+    
+    conn.commit()
+    return True
+
+def get_all_user_goals():
+    """Get every user with their goals (NULLs if unset) as rows of
+    (user_id, goal_protein_g, goal_protein_pct, goal_carbs_pct, goal_fat_pct)"""
+    cursor.execute('''
+        SELECT u.id, g.goal_protein_g, g.goal_protein_pct, g.goal_carbs_pct, g.goal_fat_pct
+        FROM users u
+        LEFT JOIN user_goals g ON g.user_id = u.id
+    ''')
+    return cursor.fetchall()
+
+def save_deficiency_results(date, results):
+    """Replace the stored recommendations for a date. results is a list of (user_id, recommendations_json)."""
+    cursor.executemany('''
+        INSERT OR REPLACE INTO deficiency_results (user_id, result_date, recommendations, computed_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+    ''', [(user_id, date, recommendations) for user_id, recommendations in results])
+    
+    conn.commit()
+    return len(results)
+
+def get_deficiency_results(user_id, date):
+    """Get precomputed recommendations JSON for a user and date, or None"""
+    cursor.execute('''
+        SELECT recommendations FROM deficiency_results
+        WHERE user_id = ? AND result_date = ?
+    ''', (user_id, date))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+def get_user_profile(user_id):
+    """Get a user's body metrics as a dict, or None if the user doesn't exist"""
+    cursor.execute('''
+        SELECT weight_lbs, height_inches, age, sex, activity_level
+        FROM users
+        WHERE id = ?
+    ''', (user_id,))
+    result = cursor.fetchone()
+    if result:
+        return {
+            'weight_lbs': result[0],
+            'height_inches': result[1],
+            'age': result[2],
+            'sex': result[3],
+            'activity_level': result[4]
+        }
+    return None
+
+PROFILE_FIELDS = ('weight_lbs', 'height_inches', 'age', 'sex', 'activity_level')
+
+def update_user_profile(user_id, fields):
+    """Update body metrics for a user (fields maps PROFILE_FIELDS names to values).
+    Returns True if the user exists."""
+    columns = [name for name in PROFILE_FIELDS if name in fields]
+    if not columns:
+        cursor.execute('SELECT 1 FROM users WHERE id = ?', (user_id,))
+        return cursor.fetchone() is not None
+    
+    assignments = ', '.join(f'{name} = ?' for name in columns)
+    cursor.execute(f'UPDATE users SET {assignments} WHERE id = ?',
+                   [fields[name] for name in columns] + [user_id])
+    
+    conn.commit()
+    return cursor.rowcount > 0
+
+def get_all_user_profiles():
+    """Get every user with complete body metrics as rows of
+    (user_id, weight_lbs, height_inches, age, sex, activity_level)"""
+    cursor.execute('''
+        SELECT id, weight_lbs, height_inches, age, sex, activity_level
+        FROM users
+        WHERE typeof(weight_lbs) IN ('integer', 'real')
+          AND typeof(height_inches) IN ('integer', 'real')
+          AND typeof(age) IN ('integer', 'real')
+    ''')
+    return cursor.fetchall()
+
+def get_daily_calorie_history(user_id, start_date, end_date):
+    """Get a user's total calories for each logged day in [start_date, end_date] as rows of (date, calories)"""
+    cursor.execute('''
+        SELECT me.entry_date, SUM(me.quantity_servings * f.calories_per_serving)
+        FROM meal_entries me
+        JOIN foods f ON me.food_id = f.id
+        WHERE me.user_id = ? AND me.entry_date BETWEEN ? AND ?
+        GROUP BY me.entry_date
+        ORDER BY me.entry_date
+    ''', (user_id, start_date, end_date))
+    return cursor.fetchall()
+
+def get_all_calorie_stats(start_date, end_date):
+    """Get per-user daily calorie statistics over [start_date, end_date] as rows of
+    (user_id, days_logged, sum_calories, sum_calories_squared)"""
+    cursor.execute('''
+        SELECT user_id, COUNT(*), SUM(calories), SUM(calories * calories)
+        FROM (
+            SELECT me.user_id AS user_id, SUM(me.quantity_servings * f.calories_per_serving) AS calories
+            FROM meal_entries me
+            JOIN foods f ON me.food_id = f.id
+            WHERE me.entry_date BETWEEN ? AND ?
+            GROUP BY me.user_id, me.entry_date
+        )
+        GROUP BY user_id
+    ''', (start_date, end_date))
+    return cursor.fetchall()
+
+def ping():
+    """Run a trivial query on this thread's connection; returns its latency in ms (raises if the DB is unusable)"""
+    start = time.perf_counter()
+    cursor.execute('SELECT 1')
+    cursor.fetchone()
+    return round((time.perf_counter() - start) * 1000, 3)
+
+def close_connection():
+    """Close this thread's database connection (the next query opens a new one)"""
+    if getattr(_local, 'pid', None) == os.getpid():
+        _local.conn.close()
+    _local.pid = _local.conn = _local.cursor = None
@@ -0,0 +1,326 @@
+"""
+Rolling 7/30-day averages, adherence and streaks per user, kept up to date
+incrementally.
+
+Each user's state holds the daily totals of the last 30 days, running sums
+and logged-day counts for both windows, and the logging streak. Logging a meal
+adds that entry to its day (record_entry); reading moves the windows forward
+to today by adding the days that enter them and subtracting the days that
+leave. Neither step depends on how much history the user has. Adherence and
+the on-target streak are judged against the user's current targets from the
+30 stored days.
+
+State is built from the full history on first use (or after ANALYTICS_TTL),
+and recompute() rebuilds it the same way to verify the incremental path.
+
+Usage:
+    python analytics.py --verify 200    # compare incremental and recomputed results for 200 users
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+import config
+import DB
+from user_cache import user_cache
+
+WINDOWS = (7, 30)
+KEEP_DAYS = max(WINDOWS)
+FIELDS = ('calories', 'protein_g', 'carbs_g', 'fat_g')
+
+
+def _ordinal(value):
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value.toordinal()
+
+
+class _UserWindows:
+    """One user's last KEEP_DAYS daily totals, per-window running sums and logging streak"""
+
+    __slots__ = ('as_of', 'days', 'sums', 'logged', 'last_logged', 'streak', 'longest', 'dirty', 'expires_at',
+                 'last_entry_id')
+
+    def __init__(self, as_of, history, expires_at, last_entry_id=0):
+        """Build from (date ordinal, [calories, protein, carbs, fat]) pairs in date order"""
+        self.as_of = as_of
+        self.last_entry_id = last_entry_id  # entries up to this id are already in history
+        self.days = {}
+        self.sums = {w: [0.0] * len(FIELDS) for w in WINDOWS}
+        self.logged = dict.fromkeys(WINDOWS, 0)
+        self.last_logged, self.streak, self.longest = None, 0, 0
+        self.dirty = False
+        self.expires_at = expires_at
+
+        for day, totals in history:
+            if self.last_logged is not None and day == self.last_logged + 1:
+                self.streak += 1
+            else:
+                self.streak = 1
+            self.last_logged = day
+            self.longest = max(self.longest, self.streak)
+
+            if day > as_of - KEEP_DAYS:
+                self.days[day] = list(totals)
+                self._count(day, totals, 1)
+
+    def _count(self, day, totals, sign, new_day=True):
+        for w in WINDOWS:
+            if self.as_of - w < day <= self.as_of:
+                sums = self.sums[w]
+                for i, value in enumerate(totals):
+                    sums[i] += sign * value
+                if new_day:
+                    self.logged[w] += sign
+
+    def advance(self, to_day):
+        """Move both windows forward so they end on to_day"""
+        if to_day <= self.as_of:
+            return
+        if to_day - self.as_of >= KEEP_DAYS:
+            # Every stored day has left or is entering fresh: rebuild the sums from the buckets
+            self.as_of = to_day
+            self.sums = {w: [0.0] * len(FIELDS) for w in WINDOWS}
+            self.logged = dict.fromkeys(WINDOWS, 0)
+            for day, totals in self.days.items():
+                self._count(day, totals, 1)
+        else:
+            while self.as_of < to_day:
+                self.as_of += 1
+                for w in WINDOWS:
+                    entering = self.days.get(self.as_of)
+                    leaving = self.days.get(self.as_of - w)
+                    sums = self.sums[w]
+                    for i in range(len(FIELDS)):
+                        sums[i] += (entering[i] if entering else 0.0) - (leaving[i] if leaving else 0.0)
+                    self.logged[w] += (entering is not None) - (leaving is not None)
+        for day in [day for day in self.days if day <= self.as_of - KEEP_DAYS]:
+            del self.days[day]
+
+    def record(self, day, totals):
+        """Add one meal entry's totals to its day"""
+        bucket = self.days.get(day)
+        new_day = bucket is None
+        if day <= self.as_of - KEEP_DAYS:
+            # Too old to have a bucket, so whether it starts a new logged day is unknown
+            self.dirty = True
+            return
+
+        if new_day:
+            bucket = self.days[day] = [0.0] * len(FIELDS)
+            if self.last_logged is None or day > self.last_logged:
+                self.streak = self.streak + 1 if self.last_logged is not None and day == self.last_logged + 1 else 1
+                self.last_logged = day
+                self.longest = max(self.longest, self.streak)
+            else:
+                # Back-filled day: it joins the logged runs on either side of it
+                before, after = self._run(day - 1, -1), self._run(day + 1, 1)
+                if before is None or after is None:
+                    self.dirty = True
+                else:
+                    run = before + 1 + after
+                    if day + after == self.last_logged:
+                        self.streak = run
+                    self.longest = max(self.longest, run)
+        for i, value in enumerate(totals):
+            bucket[i] += value
+        self._count(day, totals, 1, new_day)
+
+    def _run(self, day, step):
+        """Consecutive logged days starting at day and moving by step; None if it reaches days no longer stored"""
+        length = 0
+        while day in self.days:
+            length += 1
+            day += step
+        return None if day <= self.as_of - KEEP_DAYS else length
+
+    def summary(self, today, targets):
+        """JSON-ready windows and streaks as of today (windows must already end on today)"""
+        tolerance = config.ANALYTICS_TARGET_TOLERANCE
+        calorie_target = targets.get('calories') if targets else None
+        protein_target = targets.get('protein_g') if targets else None
+
+        def on_calories(totals):
+            return abs(totals[0] - calorie_target) <= tolerance * calorie_target
+
+        windows = {}
+        for w in WINDOWS:
+            logged = self.logged[w]
+            window = {'days_logged': logged}
+            for i, field in enumerate(FIELDS):
+                window[f'avg_{field}'] = round(self.sums[w][i] / logged, 1) if logged else None
+
+            days = [self.days[day] for day in range(today - w + 1, today + 1) if day in self.days]
+            window['calorie_adherence_pct'] = (round(100 * sum(map(on_calories, days)) / logged, 1)
+                                               if calorie_target and logged else None)
+            window['protein_adherence_pct'] = (round(100 * sum(d[1] >= (1 - tolerance) * protein_target for d in days)
+                                                     / logged, 1) if protein_target and logged else None)
+            windows[str(w)] = window
+
+        # Today still counts toward a streak until it's over
+        current = self.streak if self.last_logged is not None and self.last_logged >= today - 1 else 0
+        on_target = None
+        if calorie_target:
+            on_target = 0
+            start = today if today in self.days and on_calories(self.days[today]) else today - 1
+            for day in range(start, today - KEEP_DAYS, -1):
+                if day not in self.days or not on_calories(self.days[day]):
+                    break
+                on_target += 1
+
+        return {
+            'windows': windows,
+            'streaks': {'logging_current': current, 'logging_longest': self.longest,
+                        'on_target_current': on_target, 'on_target_lookback_days': KEEP_DAYS}
+        }
+
+
+def _load_history(user_id):
+    """(history pairs, highest meal entry id they include); one query, so the two agree"""
+    rows = DB.get_daily_totals(user_id)
+    history = [(_ordinal(row[0]), [value or 0.0 for value in row[1:5]]) for row in rows]
+    return history, max((row[5] for row in rows), default=0)
+
+
+class Analytics:
+    """Bounded, thread-safe LRU of per-user windows"""
+
+    def __init__(self, max_users=None, ttl=None):
+        self.max_users = config.ANALYTICS_CACHE_SIZE if max_users is None else max_users
+        self.ttl = config.ANALYTICS_TTL if ttl is None else ttl
+        self._users = OrderedDict()
+        # user_id -> [record_entry()/invalidate() count, rebuilds running] while the user is being
+        # rebuilt, so a rebuild that raced one isn't cached; dropped when the last rebuild finishes
+        self._loads = {}
+        self._lock = threading.Lock()
+        self._stats = {'reads': 0, 'rebuilds': 0, 'records': 0}
+
+    def record_entry(self, entry_id):
+        """Fold a newly added meal entry into its user's windows (if that user is loaded)"""
+        row = DB.get_meal_entry_nutrition(entry_id)
+        if row is None:
+            return
+        user_id, entry_date, totals = row[0], row[1], [value or 0.0 for value in row[2:]]
+        with self._lock:
+            self._bump(user_id)
+            state = self._users.get(user_id)
+            # A state rebuilt after the entry was written already has it
+            if state is not None and entry_id > state.last_entry_id:
+                state.record(_ordinal(entry_date), totals)
+                self._stats['records'] += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._bump(user_id)
+            self._users.pop(user_id, None)
+
+    def _bump(self, user_id):
+        load = self._loads.get(user_id)
+        if load is not None:
+            load[0] += 1
+
+    def _end_load(self, user_id, load):
+        """Stop tracking a finished rebuild once no other rebuild of the user is running (lock held)"""
+        load[1] -= 1
+        if not load[1]:
+            del self._loads[user_id]
+
+    def _state(self, user_id, today):
+        now = time.time()
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is not None and not state.dirty and state.expires_at > now and state.as_of <= today:
+                self._users.move_to_end(user_id)
+                return state
+            load = self._loads.setdefault(user_id, [0, 0])
+            load[1] += 1
+            generation = load[0]
+
+        try:
+            history, last_entry_id = _load_history(user_id)
+        except Exception:
+            with self._lock:
+                self._end_load(user_id, load)
+            raise
+        state = _UserWindows(today, history, now + self.ttl, last_entry_id)
+        with self._lock:
+            self._end_load(user_id, load)
+            self._stats['rebuilds'] += 1
+            if load[0] != generation:
+                # An entry landed while the history was read; it may or may not be in it
+                return state
+            self._users[user_id] = state
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return state
+
+    def get(self, user_id, today=None):
+        """
+        Rolling averages, adherence and streaks for a user.
+
+        Args:
+            user_id (int): User to summarize
+            today (date, optional): Last day of the windows (default today)
+
+        Returns:
+            dict: {'user_id', 'as_of', 'targets', 'windows': {'7', '30'}, 'streaks'}
+        """
+        today = _ordinal(today or date.today())
+        state = self._state(user_id, today)
+        derived = user_cache.get_derived(user_id)
+        targets = derived['targets'] if derived else None
+        with self._lock:
+            self._stats['reads'] += 1
+            state.advance(today)
+            result = state.summary(today, targets)
+        return dict(result, user_id=user_id, as_of=date.fromordinal(today).isoformat(), targets=targets)
+
+    def recompute(self, user_id, today=None):
+        """get() computed from the full history, bypassing (and not touching) the cached windows"""
+        today = _ordinal(today or date.today())
+        state = _UserWindows(today, _load_history(user_id)[0], 0)
+        derived = user_cache.get_derived(user_id)
+        targets = derived['targets'] if derived else None
+        return dict(state.summary(today, targets), user_id=user_id, as_of=date.fromordinal(today).isoformat(),
+                    targets=targets)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, users=len(self._users))
+
+
+analytics = Analytics()
+
+
+def verify_sample(sample_size=200, today=None, seed=0):
+    """
+    Compare get() with recompute() for random users.
+
+    Returns:
+        int: Number of users whose results differ
+    """
+    DB.cursor.execute('SELECT id FROM users')
+    user_ids = [row[0] for row in DB.cursor.fetchall()]
+    sample = random.Random(seed).sample(user_ids, min(sample_size, len(user_ids)))
+    return sum(analytics.get(user_id, today) != analytics.recompute(user_id, today) for user_id in sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check incremental analytics against a full recompute')
+    parser.add_argument('--verify', type=int, default=200, metavar='N', help='number of users to compare')
+    parser.add_argument('--date', help='YYYY-MM-DD to evaluate as of (default: today)')
+    args = parser.parse_args()
+
+    today = datetime.strptime(args.date, '%Y-%m-%d').date() if args.date else None
+    mismatches = verify_sample(args.verify, today)
+    print(f"{'✅' if mismatches == 0 else '❌'} {args.verify} users verified against a full recompute: "
+          f"{mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
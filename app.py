@@ -3,11 +3,29 @@ Flask API for Nutrition Tracker
 Integrates with DB.py and function templates from Tanish and Karthik
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import DB
 import json
+import time
+import config
+import upload_retention
+import tracing
+import http_cache
+import json_codec
+import compression
+import metrics
+import rate_limit
+import lazy_import
+import traffic_recorder
+import history_io
+from http_cache import payload_cache
+from nutrition_cache import nutrition_cache
+from user_cache import user_cache
+from nutrient_store import nutrient_store
+from analytics import analytics
 from datetime import datetime, date
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # Import function templates (will be replaced with actual implementations)
 try:
@@ -16,14 +34,42 @@ except ImportError:
     print("Warning: nutrition_calculations.py not found. Using stubs.")
     calc = None
 
-try:
-    import food_input as receipt
-except ImportError:
+# numpy/scipy and the receipt OCR stack are imported on first use (see lazy_import.py); preload() loads them up front
+if lazy_import.available('numpy'):
+    batch_calc = lazy_import.module('nutrition_batch')
+    weight_projection = lazy_import.module('weight_projection')
+    purdue_menu = lazy_import.module('purdue_menu')
+    meal_planner = lazy_import.module('meal_planner')
+    food_index_module = lazy_import.module('food_index')
+else:
+    print("Warning: numpy not installed. Batch calculations, projections, meal planning and recommendations disabled.")
+    batch_calc = None
+    weight_projection = None
+    purdue_menu = None
+    meal_planner = None
+    food_index_module = None
+
+if lazy_import.available('food_input', 'cv2', 'pytesseract', 'requests', 'numpy'):
+    receipt = lazy_import.module('food_input')
+else:
     print("Warning: food_input.py not found. Using stubs.")
     receipt = None
 
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = config.MAX_RECEIPT_UPLOAD_BYTES
 CORS(app)  # Enable CORS for frontend
+json_codec.install(app)  # orjson-backed jsonify when available
+compression.init_app(app)  # gzip/brotli for large responses
+metrics.init_app(app)  # Prometheus text at /api/metrics
+traffic_recorder.init_app(app)  # JSONL request log for load replay (REQUEST_RECORD_PATH)
+rate_limit.init_app(app)  # 429 / 503 for expensive endpoints under load
+
+# Daily meal totals are private and change whenever a meal is logged: clients may keep them but
+# must revalidate (cheap - see http_cache.py)
+MEALS_CACHE_CONTROL = 'private, no-cache'
+
+# Enforce the receipt retention policy on uploads/ (with retention off, just clears old images once)
+upload_retention.start_upload_sweeper()
 
 # Stub functions if modules not available
 def stub_function(*args, **kwargs):
@@ -37,16 +83,37 @@ if not calc:
         'calculateTDEE': stub_function,
         'getWeightChange': stub_function,
         'checkDeficiencies': stub_function,
+        'checkMicronutrients': lambda *args, **kwargs: [],
         'get_goals': stub_function
     })()
 
 if not receipt:
     receipt = type('ReceiptStub', (), {
         'process_receipt_image': stub_function,
+        'process_receipt_bytes': stub_function,
+        'decode_receipt_image': staticmethod(lambda image_bytes: image_bytes),
+        'stream_receipt_events': lambda *args, **kwargs: iter([{'type': 'error', 'error': 'Function not implemented yet'}]),
         'get_purdue_menu_nutrition': stub_function,
         'scrape_purdue_daily_menu': stub_function
     })()
 
+def preload():
+    """
+    Do up front what the app otherwise does on first use: import the deferred modules,
+    create/open the database and warm the nutrition cache (see SERVER_PRELOAD_DEPS).
+
+    Returns:
+        dict: Deferred module name -> import time in ms
+    """
+    timings = lazy_import.preload()
+    DB.ping()
+    try:
+        if nutrition_cache.warm_load:
+            nutrition_cache.warm()
+    except Exception as e:
+        print(f"Warning: could not warm nutrition cache: {e}")
+    return timings
+
 # ==================== AUTHENTICATION ENDPOINTS ====================
 
 @app.route('/api/register', methods=['POST'])
@@ -66,7 +133,8 @@ def register():
             weight_lbs=data.get('weight_lbs'),
             sex=data.get('sex'),
             activity_level=data.get('activity_level'),
-            height_inches=data.get('height_inches')
+            height_inches=data.get('height_inches'),
+            age=data.get('age')
         )
         
         if success:
@@ -95,6 +163,65 @@ def login():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ==================== USER PROFILE ENDPOINTS ====================
+
+@app.route('/api/users/<int:user_id>', methods=['GET'])
+def get_user(user_id):
+    """Get a user's profile with BMR, TDEE and daily targets"""
+    try:
+        cached = user_cache.get(user_id)
+        if cached['profile'] is None:
+            return jsonify({'error': 'User not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'profile': cached['profile'],
+            'goals': cached['goals'],
+            'metrics': user_cache.get_derived(user_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/users/<int:user_id>', methods=['PUT'])
+def update_user(user_id):
+    """Update a user's body metrics (any of weight_lbs, height_inches, age, sex, activity_level)"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'JSON body required'}), 400
+        
+        fields = {name: data[name] for name in DB.PROFILE_FIELDS if name in data}
+        unknown = [name for name in data if name not in DB.PROFILE_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+        
+        try:
+            for name in ('weight_lbs', 'height_inches'):
+                if fields.get(name) is not None:
+                    fields[name] = float(fields[name])
+            if fields.get('age') is not None:
+                fields['age'] = int(fields['age'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'weight_lbs, height_inches and age must be numbers'}), 400
+        
+        try:
+            updated = DB.update_user_profile(user_id, fields)
+        except DB.sqlite3.IntegrityError:
+            return jsonify({'error': 'Invalid sex or activity_level'}), 400
+        if not updated:
+            return jsonify({'error': 'User not found'}), 404
+        
+        user_cache.invalidate(user_id)
+        return jsonify({
+            'success': True,
+            'profile': user_cache.get_profile(user_id),
+            'metrics': user_cache.get_derived(user_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== MEAL LOGGING ENDPOINTS ====================
 
 @app.route('/api/meals', methods=['POST'])
@@ -117,6 +244,7 @@ def add_meal():
             source=data.get('source', 'manual'),
             entry_date=data.get('entry_date')
         )
+        analytics.record_entry(meal_id)
         
         return jsonify({
             'success': True, 
@@ -131,25 +259,160 @@ def add_meal():
 
 @app.route('/api/meals/<int:user_id>/<date_str>', methods=['GET'])
 def get_daily_meals(user_id, date_str):
-    """Get all meals for a user on a specific date"""
+    """Get all meals for a user on a specific date (304 when If-None-Match is still current)"""
     try:
         # Parse date
         target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         
+        # Any meal_entries write for this user and day bumps the version
+        version, updated_at = DB.get_meal_version(user_id, target_date.isoformat())
+        etag = http_cache.make_etag('meals', user_id, target_date.isoformat(), version)
+        last_modified = http_cache.parse_timestamp(updated_at)
+        cached = http_cache.not_modified(etag, MEALS_CACHE_CONTROL, last_modified)
+        if cached:
+            return cached
+        
         # Get daily nutrition
         nutrition = DB.get_user_daily_nutrition(user_id, target_date)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'date': date_str,
             'nutrition': nutrition
-        }), 200
+        })
+        return http_cache.cacheable(response, etag, MEALS_CACHE_CONTROL, last_modified), 200
         
     except ValueError as e:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/meals/<int:user_id>/entries', methods=['GET'])
+def list_meal_entries(user_id):
+    """List a user's individual meal entries, newest first.
+
+    Keyset pagination: pass the previous page's next_before as ?before= (or a
+    YYYY-MM-DD date to start on the day before it); ?limit= sets the page size.
+    Each page is an index range scan, so deep pages cost the same as the first.
+    """
+    try:
+        before = parse_entries_cursor(request.args.get('before', ''))
+        limit = min(max(request.args.get('limit', config.MEAL_ENTRIES_PAGE_SIZE, type=int), 1),
+                    config.MEAL_ENTRIES_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'before must be YYYY-MM-DD or a next_before value from a previous page'}), 400
+    
+    try:
+        # One extra row says whether another page follows
+        rows = DB.get_meal_entries(user_id, before, limit + 1)
+        entries = [meal_entry_dict(row) for row in rows[:limit]]
+        next_before = f"{entries[-1]['entry_date']}:{entries[-1]['id']}" if len(rows) > limit else None
+        
+        return jsonify({
+            'success': True,
+            'entries': entries,
+            'next_before': next_before
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def parse_entries_cursor(value):
+    """?before= for the entries listing: None, a date string, or an (entry_date, id) pair (raises ValueError)"""
+    if not value:
+        return None
+    date_str, _, entry_id = value.partition(':')
+    date_str = datetime.strptime(date_str, '%Y-%m-%d').date().isoformat()
+    return (date_str, int(entry_id)) if entry_id else date_str
+
+def meal_entry_dict(row):
+    """JSON shape of a DB.get_meal_entries row: the entry, its food per serving and the entry's totals"""
+    (entry_id, entry_date, meal_type, source, servings, food_id, food_name, serving_size_value,
+     serving_size_unit, calories, protein_g, carbs_g, fat_g) = row
+    return {
+        'id': entry_id,
+        'entry_date': str(entry_date),
+        'meal_type': meal_type,
+        'source': source,
+        'quantity_servings': servings,
+        'food': {
+            'id': food_id,
+            'name': food_name,
+            'serving_size_value': serving_size_value,
+            'serving_size_unit': serving_size_unit,
+            'calories_per_serving': calories,
+            'protein_g_per_serving': protein_g,
+            'carbs_g_per_serving': carbs_g,
+            'fat_g_per_serving': fat_g
+        },
+        'nutrition': {
+            'calories': servings * calories,
+            'protein_g': servings * protein_g,
+            'carbs_g': servings * carbs_g,
+            'fat_g': servings * fat_g
+        }
+    }
+
+
+@app.route('/api/meals/<int:user_id>/export', methods=['GET'])
+def export_meal_history(user_id):
+    """Stream a user's whole meal history, oldest first, as ?format=csv (default) or ndjson.
+
+    Entries are read and sent a chunk at a time (see history_io.py), so an
+    export of any length runs in constant memory.
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in history_io.FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    try:
+        if user_cache.get_profile(user_id) is None:
+            return jsonify({'error': 'User not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    response = Response(stream_with_context(history_io.export_chunks(user_id, fmt)),
+                        mimetype=history_io.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="meals-{user_id}.{fmt}"'
+    response.headers['Cache-Control'] = 'private, no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let a reverse proxy buffer the stream
+    return response
+
+@app.route('/api/meals/<int:user_id>/import', methods=['POST'])
+def import_meal_history(user_id):
+    """Bulk-add meal entries from CSV or NDJSON, as form-data "file" or the raw request body.
+
+    The format comes from ?format=, else the upload's content type or file
+    extension. Columns are those of the export; rows that fail validation are
+    skipped and listed in the response (see history_io.py).
+    """
+    try:
+        # Histories can be much larger than the receipt images MAX_CONTENT_LENGTH is sized for
+        request.max_content_length = config.HISTORY_IMPORT_MAX_BYTES
+        if 'file' in request.files:
+            upload = request.files['file']
+            stream, detected = upload.stream, history_io.detect_format(upload.mimetype, upload.filename)
+        else:
+            stream, detected = request.stream, history_io.detect_format(request.mimetype)
+        fmt = request.args.get('format', '').lower() or detected
+        if fmt not in history_io.FORMATS:
+            return jsonify({'error': 'Send ?format=csv or ndjson, or a text/csv or application/x-ndjson body'}), 400
+        
+        if user_cache.get_profile(user_id) is None:
+            return jsonify({'error': 'User not found'}), 404
+        
+        result = history_io.import_history(user_id, stream, fmt)
+        if 'error' in result and not result['imported']:
+            return jsonify({'error': result['error']}), 400
+        if result['imported']:
+            analytics.invalidate(user_id)
+        
+        return jsonify(dict(result, success=True)), 200
+        
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'Import file too large'}), 413
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== FOOD MANAGEMENT ENDPOINTS ====================
 
 @app.route('/api/foods', methods=['POST'])
@@ -176,6 +439,22 @@ def add_food():
             fat_g_per_serving=data['fat_g_per_serving']
         )
         
+        # Optional {nutrient: amount per serving} beyond the macros (sodium, fiber, ...)
+        if isinstance(data.get('nutrients'), dict):
+            nutrient_store.set_nutrients(food_id, data['nutrients'])
+        
+        # Until the index is first used it is built from the table, which now has this food
+        if lazy_import.loaded('food_index'):
+            food_index_module.food_index.add({
+                'source': 'foods',
+                'food_id': food_id,
+                'name': data['name'],
+                'calories': data['calories_per_serving'],
+                'protein_g': data['protein_g_per_serving'],
+                'carbs_g': data['carbs_g_per_serving'],
+                'fat_g': data['fat_g_per_serving']
+            })
+        
         return jsonify({
             'success': True,
             'food_id': food_id,
@@ -189,54 +468,131 @@ def add_food():
 
 @app.route('/api/receipt/process', methods=['POST'])
 def process_receipt():
-    """Process a receipt image upload and extract nutrition data"""
+    """Process a receipt image upload and extract nutrition data.
+
+    With ?stream=1 (or Accept: application/x-ndjson) the response is NDJSON:
+    the parsed items first, then one nutrition record per item as each lookup
+    finishes, then a summary with time-to-first-result and total time.
+    """
+    started_at = time.perf_counter()
     try:
+        image_bytes = None
+        image_path = None
+
         # Support both multipart form-data file uploads and JSON { image_path }
         if 'file' in request.files:
             file = request.files['file']
             if file.filename == '':
                 return jsonify({'error': 'No file selected'}), 400
 
-            # Save to a temp file
-            import os, uuid
-            tmp_dir = 'uploads'
-            os.makedirs(tmp_dir, exist_ok=True)
-            tmp_path = os.path.join(tmp_dir, f"receipt_{uuid.uuid4().hex}.jpg")
-            file.save(tmp_path)
-            image_path = tmp_path
+            # Decode from memory; only keep a copy on disk if retention is configured
+            image_bytes = file.read(config.MAX_RECEIPT_UPLOAD_BYTES + 1)
+            if len(image_bytes) > config.MAX_RECEIPT_UPLOAD_BYTES:
+                return jsonify({'error': 'Receipt image too large'}), 413
+            if not image_bytes:
+                return jsonify({'error': 'Uploaded file is empty'}), 400
+
+            upload_retention.save_upload(image_bytes)
         else:
             data = request.get_json(silent=True) or {}
             image_path = data.get('image_path')
             if not image_path:
                 return jsonify({'error': 'Upload a file via form-data with key "file" or provide image_path in JSON'}), 400
 
-        result = receipt.process_receipt_image(image_path)
+        if wants_receipt_stream():
+            image = None
+            if image_bytes is not None:
+                # Decode before the stream starts, so an unreadable upload is a 400 here too
+                image = receipt.decode_receipt_image(image_bytes)
+                if image is None:
+                    return jsonify({'error': 'Uploaded file is not a readable image'}), 400
+            return stream_receipt_response(image, image_path, started_at)
 
-        return jsonify({
+        with tracing.start_trace('receipt_process', source='upload' if image_bytes is not None else 'path') as trace:
+            if image_bytes is not None:
+                try:
+                    result = receipt.process_receipt_bytes(image_bytes)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+            else:
+                result = receipt.process_receipt_image(image_path)
+            trace.root.set(item_count=len(result))
+
+        response = {
             'success': True,
             'foods': result
-        }), 200
+        }
+        if wants_trace_debug():
+            response['trace'] = trace.to_dict()
+        return jsonify(response), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def wants_receipt_stream():
+    """True if the client asked for NDJSON streaming of receipt results"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+def wants_trace_debug():
+    """True if pipeline spans should be attached to the response (?debug=1 with TRACE_DEBUG on)"""
+    return config.TRACE_DEBUG and request.args.get('debug', '').lower() in ('1', 'true', 'yes')
+
+def stream_receipt_response(image, image_path, started_at):
+    """Stream receipt pipeline events (for a decoded upload, or an image path) as newline-delimited JSON"""
+    include_trace = wants_trace_debug()
+
+    def generate():
+        with tracing.start_trace('receipt_stream', source='upload' if image is not None else 'path') as trace:
+            try:
+                for event in receipt.stream_receipt_events(image=image,
+                                                           image_path=image_path,
+                                                           started_at=started_at):
+                    yield json_codec.dumps(event) + '\n'
+            except Exception as e:
+                yield json_codec.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        if include_trace:
+            yield json_codec.dumps({'type': 'trace', 'trace': trace.to_dict()}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let a reverse proxy buffer the stream
+    return response
+
 # ==================== PURDUE MENU ENDPOINTS ====================
 
 @app.route('/api/purdue/menu/<date_str>', methods=['GET'])
 def get_purdue_menu(date_str):
-    """Get Purdue dining hall menu for a specific date"""
+    """Get Purdue dining hall menu for a specific date
+
+    Served from the ingested snapshot when it covers the date (ETag follows the
+    snapshot file), otherwise scraped from HFS and reused for HTTP_MENU_MAX_AGE.
+    """
     try:
         # Parse date
         target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        cache_control = f'public, max-age={config.HTTP_MENU_MAX_AGE}'
+        key = ('menu', target_date.isoformat())
         
-        # Scrape menu (stub for now)
-        menu_items = receipt.scrape_purdue_daily_menu(date_str)
+        menu = purdue_menu.load_snapshot() if purdue_menu else None
+        if menu is not None and menu.date == target_date.isoformat():
+            etag = http_cache.make_etag('menu', menu.date, menu.version)
+            cached = http_cache.not_modified(etag, cache_control)
+            if cached:
+                return cached
+            entry = payload_cache.get(key, etag) or payload_cache.put(
+                key, {'success': True, 'date': date_str, 'menu_items': menu.items}, etag=etag)
+        else:
+            entry = payload_cache.get(key)
+            if entry is None:
+                # Scrape menu (stub for now)
+                menu_items = receipt.scrape_purdue_daily_menu(date_str)
+                entry = payload_cache.put(key, {'success': True, 'date': date_str, 'menu_items': menu_items},
+                                          ttl=config.HTTP_MENU_MAX_AGE)
         
-        return jsonify({
-            'success': True,
-            'date': date_str,
-            'menu_items': menu_items
-        }), 200
+        return http_cache.not_modified(entry[0], cache_control) or \
+            http_cache.json_response(entry[0], entry[1], cache_control)
         
     except ValueError as e:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
@@ -245,22 +601,140 @@ def get_purdue_menu(date_str):
 
 @app.route('/api/purdue/nutrition/<food_name>', methods=['GET'])
 def get_purdue_nutrition(food_name):
-    """Get nutrition for a specific Purdue menu item"""
+    """Get nutrition for a specific Purdue menu item (HFS lookups are reused for HTTP_NUTRITION_MAX_AGE)"""
     try:
-        nutrition = receipt.get_purdue_menu_nutrition(food_name)
+        cache_control = f'public, max-age={config.HTTP_NUTRITION_MAX_AGE}'
+        key = ('nutrition', food_name)
+        entry = payload_cache.get(key)
+        if entry is None:
+            nutrition = receipt.get_purdue_menu_nutrition(food_name)
+            if not nutrition:
+                return jsonify({'error': 'Food not found in Purdue menu'}), 404
+            entry = payload_cache.put(key, {'success': True, 'food_name': food_name, 'nutrition': nutrition},
+                                      ttl=config.HTTP_NUTRITION_MAX_AGE)
         
-        if nutrition:
-            return jsonify({
-                'success': True,
-                'food_name': food_name,
-                'nutrition': nutrition
-            }), 200
-        else:
-            return jsonify({'error': 'Food not found in Purdue menu'}), 404
+        return http_cache.not_modified(entry[0], cache_control) or \
+            http_cache.json_response(entry[0], entry[1], cache_control)
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/planner/<int:user_id>', methods=['POST'])
+def plan_meal(user_id):
+    """Suggest Purdue menu item combinations that fill the user's remaining calories and macros.
+
+    Optional body fields: date (YYYY-MM-DD, default today), dining_hall, meal,
+    max_items, count, remaining ({calories, protein_g, carbs_g, fat_g}) to
+    override goals minus today's totals, and allow_stale to plan from another
+    day's menu when that date's hasn't been ingested (menu_date says which).
+    """
+    if meal_planner is None:
+        return jsonify({'error': 'Meal planning unavailable (numpy not installed)'}), 501
+
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            target_date = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else date.today()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        max_items = data.get('max_items', config.PLANNER_MAX_ITEMS)
+        count = data.get('count', config.PLANNER_RESULTS)
+        if not isinstance(max_items, int) or not 1 <= max_items <= 6:
+            return jsonify({'error': 'max_items must be between 1 and 6'}), 400
+        if not isinstance(count, int) or not 1 <= count <= 20:
+            return jsonify({'error': 'count must be between 1 and 20'}), 400
+        
+        if data.get('remaining') is not None:
+            remaining = data['remaining']
+            if not isinstance(remaining, dict) or not isinstance(remaining.get('calories'), (int, float)):
+                return jsonify({'error': 'remaining must include calories'}), 400
+            remaining = {field: remaining.get(field) for field in meal_planner.TARGET_FIELDS}
+        else:
+            derived = user_cache.get_derived(user_id)
+            if derived is None:
+                return jsonify({'error': 'Set weight, height and age on the profile, or pass remaining'}), 400
+            nutrition = DB.get_user_daily_nutrition(user_id, target_date)
+            remaining = meal_planner.remaining_targets(derived['targets'], nutrition)
+        
+        allow_stale = data.get('allow_stale', config.PURDUE_MENU_ALLOW_STALE)
+        if not isinstance(allow_stale, bool):
+            return jsonify({'error': 'allow_stale must be true or false'}), 400
+        
+        menu = purdue_menu.get_menu(target_date.isoformat(), allow_stale=allow_stale)
+        if menu is None:
+            return jsonify({'error': f'No Purdue menu ingested for {target_date.isoformat()}'}), 404
+        
+        plans = meal_planner.plan_meals(
+            menu,
+            remaining,
+            dining_hall=data.get('dining_hall'),
+            meal=data.get('meal'),
+            max_items=max_items,
+            count=count
+        )
+        
+        return jsonify({
+            'success': True,
+            'date': target_date.isoformat(),
+            'menu_date': menu.date,
+            'remaining': remaining,
+            'plans': plans
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recommendations/<int:user_id>', methods=['GET'])
+def recommend_foods(user_id):
+    """Foods (saved and on the Purdue menu) whose macro makeup best matches what the user has left today.
+
+    Query params: k (default 10, max 50) and date (YYYY-MM-DD, default today).
+    """
+    if food_index_module is None:
+        return jsonify({'error': 'Recommendations unavailable (numpy not installed)'}), 501
+
+    try:
+        food_index = food_index_module.food_index
+        try:
+            target_date = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date') else date.today()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        k = request.args.get('k', 10, type=int)
+        if not 1 <= k <= 50:
+            return jsonify({'error': 'k must be between 1 and 50'}), 400
+        
+        derived = user_cache.get_derived(user_id)
+        if derived is None:
+            return jsonify({'error': 'Set weight, height and age on the profile first'}), 400
+        nutrition = DB.get_user_daily_nutrition(user_id, target_date)
+        remaining = meal_planner.remaining_targets(derived['targets'], nutrition)
+        
+        # Without macro goals, aim for a balanced 20/50/30 split of whatever is left
+        if remaining['protein_g'] is None:
+            target = [0.2, 0.5, 0.3]
+        else:
+            macro_calories = remaining['protein_g'] * 4 + remaining['carbs_g'] * 4 + remaining['fat_g'] * 9
+            target = food_index_module.macro_density(macro_calories, remaining['protein_g'], remaining['carbs_g'], remaining['fat_g'])
+            if target is None:
+                target = [0.2, 0.5, 0.3]
+        
+        food_index.refresh_menu()
+        foods = food_index.query(target, k=k, max_calories=remaining['calories'])
+        
+        return jsonify({
+            'success': True,
+            'date': target_date.isoformat(),
+            'remaining': remaining,
+            'target_density': {'protein': round(float(target[0]), 3), 'carbs': round(float(target[1]), 3),
+                               'fat': round(float(target[2]), 3)},
+            'foods': foods
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== NUTRITION CALCULATION ENDPOINTS ====================
 
 @app.route('/api/calculations/macros', methods=['POST'])
@@ -314,6 +788,161 @@ def calculate_tdee():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def batch_columns(section, names):
+    """Turn a batch section (dict of columns or list of row dicts) into equal-length columns"""
+    if isinstance(section, list):
+        if not all(isinstance(row, dict) for row in section):
+            raise ValueError('Rows must be objects')
+        missing = [name for name in names if any(name not in row for row in section)]
+        columns = [[row.get(name) for row in section] for name in names]
+    elif isinstance(section, dict):
+        missing = [name for name in names if not isinstance(section.get(name), list)]
+        columns = [section.get(name) or [] for name in names]
+    else:
+        raise ValueError('Each section must be a list of rows or an object of columns')
+
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    if len({len(column) for column in columns}) > 1:
+        raise ValueError('All columns must have the same length')
+    if columns and len(columns[0]) > config.MAX_BATCH_ROWS:
+        raise ValueError(f'At most {config.MAX_BATCH_ROWS} rows per section')
+    return columns
+
+@app.route('/api/calculations/batch', methods=['POST'])
+def calculate_batch():
+    """Vectorized TDEE, macro split and weight change calculations for many rows at once.
+
+    Each section is optional and may be a list of row objects or an object of
+    equal-length columns:
+        {"tdee": {"weight_lbs": [...], "height_inches": [...], "age": [...],
+                  "sex": [...], "activity_level": [...]},
+         "macros": [{"calories": 2000, "protein": 150, "carbs": 200, "fats": 80}, ...],
+         "weight_change": {"tdee": [...], "calorie_intake": [...]}}
+    Results match the single-value endpoints row for row.
+    """
+    if batch_calc is None:
+        return jsonify({'error': 'Batch calculations unavailable (numpy not installed)'}), 501
+
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not any(k in data for k in ('tdee', 'macros', 'weight_change')):
+            return jsonify({'error': 'Provide at least one of tdee, macros, weight_change'}), 400
+
+        results = {}
+        try:
+            if 'tdee' in data:
+                columns = batch_columns(data['tdee'], ['weight_lbs', 'height_inches', 'age', 'sex', 'activity_level'])
+                results['tdee'] = batch_calc.calculateTDEEBatch(*columns).tolist()
+            if 'macros' in data:
+                columns = batch_columns(data['macros'], ['calories', 'protein', 'carbs', 'fats'])
+                results['macros'] = batch_calc.getMacrosBatch(*columns).tolist()
+            if 'weight_change' in data:
+                columns = batch_columns(data['weight_change'], ['tdee', 'calorie_intake'])
+                results['weight_change'] = batch_calc.getWeightChangeBatch(*columns).tolist()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            **results
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/projection/<int:user_id>', methods=['GET'])
+def project_weight(user_id):
+    """Project a user's weight week by week from their recent intake.
+
+    Query parameters: weeks (default 52), days of intake history (default
+    PROJECTION_HISTORY_DAYS) and end_date (YYYY-MM-DD, default today).
+    """
+    if weight_projection is None:
+        return jsonify({'error': 'Projections unavailable (numpy not installed)'}), 501
+
+    try:
+        weeks = request.args.get('weeks', 52, type=int)
+        days = request.args.get('days', config.PROJECTION_HISTORY_DAYS, type=int)
+        if not 1 <= weeks <= config.PROJECTION_MAX_WEEKS:
+            return jsonify({'error': f'weeks must be between 1 and {config.PROJECTION_MAX_WEEKS}'}), 400
+        if days < 1:
+            return jsonify({'error': 'days must be at least 1'}), 400
+        
+        try:
+            projection = weight_projection.project_user(user_id, weeks, request.args.get('end_date'), days)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            **projection
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ==================== ANALYTICS ENDPOINTS ====================
+
+@app.route('/api/analytics/<int:user_id>', methods=['GET'])
+def get_analytics(user_id):
+    """7/30-day rolling averages, adherence percentages and streaks.
+
+    Query params: date (YYYY-MM-DD, default today) and recompute=1 to rebuild
+    from the full history instead of the incrementally maintained windows.
+    """
+    try:
+        try:
+            as_of = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date') else date.today()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        if user_cache.get_profile(user_id) is None:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if request.args.get('recompute') in ('1', 'true'):
+            result = analytics.recompute(user_id, as_of)
+        else:
+            result = analytics.get(user_id, as_of)
+        
+        return jsonify(dict(result, success=True)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ==================== DEFICIENCY ENDPOINTS ====================
+
+@app.route('/api/deficiencies/<int:user_id>/<date_str>', methods=['GET'])
+def get_deficiencies(user_id, date_str):
+    """Get nutrition recommendations for a user on a date (precomputed by deficiency_job.py unless meals or goals changed since)"""
+    try:
+        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        
+        stored = DB.get_deficiency_results(user_id, target_date.isoformat())
+        if stored is not None:
+            return jsonify({
+                'success': True,
+                'date': date_str,
+                'recommendations': json.loads(stored),
+                'precomputed': True
+            }), 200
+        
+        nutrition = DB.get_user_daily_nutrition(user_id, target_date)
+        goals = DB.get_user_goals(user_id) or {}
+        nutrients = nutrient_store.daily_totals(user_id, target_date)
+        return jsonify({
+            'success': True,
+            'date': date_str,
+            'recommendations': calc.checkDeficiencies(nutrition, goals) +
+                               calc.checkMicronutrients(nutrients['totals'], nutrients['coverage']),
+            'precomputed': False
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== GOALS ENDPOINTS ====================
 
 @app.route('/api/goals/<int:user_id>', methods=['POST'])
@@ -322,17 +951,29 @@ def set_goals(user_id):
     try:
         data = request.get_json()
         
-        required_fields = ['goal_weight_change', 'goal_protein', 'goal_macros']
-        if not all(field in data for field in required_fields):
+        # The Goals page sends the stored column names (goal_protein_g, goal_macros_pct)
+        goal_weight_change = data.get('goal_weight_change') if data else None
+        goal_protein = data.get('goal_protein', data.get('goal_protein_g')) if data else None
+        goal_macros = data.get('goal_macros', data.get('goal_macros_pct')) if data else None
+        if goal_weight_change in (None, '') or goal_protein in (None, '') or goal_macros is None:
             return jsonify({'error': 'goal_weight_change, goal_protein, and goal_macros required'}), 400
         
+        try:
+            goal_weight_change = float(goal_weight_change)
+            goal_protein = float(goal_protein)
+            goal_macros = [float(pct) for pct in goal_macros]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Goals must be numbers'}), 400
+        
         success = calc.get_goals(
-            data['goal_weight_change'],
-            data['goal_protein'],
-            data['goal_macros']
+            goal_weight_change,
+            goal_protein,
+            goal_macros,
+            user_id=user_id
         )
         
         if success:
+            user_cache.invalidate(user_id)
             return jsonify({'success': True, 'message': 'Goals set successfully'}), 200
         else:
             return jsonify({'error': 'Failed to set goals'}), 500
@@ -340,23 +981,146 @@ def set_goals(user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ==================== DASHBOARD ENDPOINTS ====================
+
+@app.route('/api/dashboard/<int:user_id>/<date_str>', methods=['GET'])
+def get_dashboard(user_id, date_str):
+    """Everything the Dashboard shows for a date in one response: totals, goals,
+    macro split, micronutrient totals, recommendations and projected weight change"""
+    try:
+        try:
+            target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        cached = user_cache.get(user_id)
+        profile, goals = cached['profile'], cached['goals']
+        if profile is None:
+            return jsonify({'error': 'User not found'}), 404
+        
+        nutrition = DB.get_user_daily_nutrition(user_id, target_date)
+        macros = calc.getMacros(
+            nutrition['calories'],
+            nutrition['protein_g'],
+            nutrition['carbs_g'],
+            nutrition['fat_g']
+        )
+        nutrients = nutrient_store.daily_totals(user_id, target_date)
+        recommendations = calc.checkDeficiencies(nutrition, goals or {}) + \
+            calc.checkMicronutrients(nutrients['totals'], nutrients['coverage'])
+        
+        derived = user_cache.get_derived(user_id)
+        tdee = derived['tdee'] if derived else None
+        weight_change = calc.getWeightChange(tdee, nutrition['calories']) if derived else None
+        
+        return jsonify({
+            'success': True,
+            'date': date_str,
+            'nutrition': nutrition,
+            'goals': goals,
+            'macros': macros,
+            'micronutrients': nutrients,
+            'recommendations': recommendations,
+            'tdee': tdee,
+            'targets': derived['targets'] if derived else None,
+            'projected_weight_change_lbs_per_week': weight_change
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ==================== DEBUG / TRACING ENDPOINTS ====================
+
+@app.route('/api/debug/traces', methods=['GET'])
+def get_debug_traces():
+    """Recent receipt pipeline traces in Chrome trace format (requires TRACE_DEBUG)"""
+    if not config.TRACE_DEBUG:
+        return jsonify({'error': 'Endpoint not found'}), 404
+    return jsonify(tracing.chrome_trace()), 200
+
+@app.route('/api/debug/latency', methods=['GET'])
+def get_debug_latency():
+    """Per-stage latency histograms aggregated from traces (requires TRACE_DEBUG)"""
+    if not config.TRACE_DEBUG:
+        return jsonify({'error': 'Endpoint not found'}), 404
+    return jsonify({
+        'success': True,
+        'stages': tracing.histograms.snapshot()
+    }), 200
+
 # ==================== HEALTH CHECK ====================
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (503 when the database doesn't answer)"""
+    try:
+        db_latency_ms = DB.ping()
+    except Exception as e:
+        return jsonify({
+            'status': 'unhealthy',
+            'timestamp': datetime.now().isoformat(),
+            'database': f'error: {e}'
+        }), 503
+    
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'database': 'connected'
+        'database': 'connected',
+        'database_latency_ms': db_latency_ms,
+        'nutrition_cache': nutrition_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'nutrient_store': nutrient_store.stats(),
+        'analytics': analytics.stats(),
+        'http_payload_cache': payload_cache.stats(),
+        'rate_limit': rate_limit.limiter.stats(),
+        'json_backend': json_codec.BACKEND,
+        'compression': compression.stats(),
+        'food_index': food_index_module.food_index.stats() if lazy_import.loaded('food_index') else None,
+        'lazy_modules': lazy_import.stats()
     }), 200
 
+def cache_metrics():
+    """Scrape-time gauges for /api/metrics from the in-memory caches' own counters"""
+    caches = {
+        'nutrition_cache': nutrition_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'http_payload_cache': payload_cache.stats(),
+    }
+    compressed = compression.stats()
+    families = [
+        ('nutrition_cache_hits_total', 'counter', 'Lookups answered from an in-memory cache',
+         [({'cache': name}, stats['hits']) for name, stats in caches.items()]),
+        ('nutrition_cache_misses_total', 'counter', 'Lookups that had to load or compute',
+         [({'cache': name}, stats['misses']) for name, stats in caches.items()]),
+        ('nutrition_cache_entries', 'gauge', 'Entries currently held in an in-memory cache',
+         [({'cache': name}, stats['entries']) for name, stats in caches.items()]
+         + [({'cache': 'analytics'}, analytics.stats()['users'])]),
+        ('nutrition_compressed_responses_total', 'counter', 'Responses sent gzip/brotli-compressed',
+         [({}, compressed['compressed'])]),
+        ('nutrition_compression_cache_hits_total', 'counter', 'Compressed bodies reused from the cache',
+         [({}, compressed['cache_hits'])]),
+        ('nutrition_nutrient_store_foods', 'gauge', 'Foods with extra nutrients in the columnar store',
+         [({}, nutrient_store.stats()['foods'])]),
+    ]
+    if lazy_import.loaded('food_index'):
+        index_stats = food_index_module.food_index.stats()
+        families.append(('nutrition_food_index_foods', 'gauge', 'Foods in the recommendation index, by part',
+                         [({'part': 'tree'}, index_stats['indexed'] - index_stats['pending_delta']),
+                          ({'part': 'delta'}, index_stats['pending_delta'])]))
+    return families
+
+metrics.register_collector(cache_metrics)
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
 
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({'error': 'Request too large'}), 413
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
@@ -365,19 +1129,38 @@ def internal_error(error):
 
 if __name__ == '__main__':
     print("Starting Nutrition Tracker API...")
+    if config.SERVER_PRELOAD_DEPS:
+        preload()
     print("Available endpoints:")
     print("  POST /api/register - Register new user")
     print("  POST /api/login - Login user")
+    print("  GET  /api/users/<user_id> - Profile with BMR, TDEE and targets")
+    print("  PUT  /api/users/<user_id> - Update body metrics")
     print("  POST /api/meals - Add meal entry")
     print("  GET  /api/meals/<user_id>/<date> - Get daily meals")
+    print("  GET  /api/meals/<user_id>/entries - Meal entries, newest first (?before=&limit=)")
+    print("  GET  /api/meals/<user_id>/export - Stream full meal history (?format=csv|ndjson)")
+    print("  POST /api/meals/<user_id>/import - Bulk import meal history from CSV or NDJSON")
     print("  POST /api/foods - Add food item")
-    print("  POST /api/receipt/process - Process receipt image")
+    print("  POST /api/receipt/process - Process receipt image (?stream=1 for NDJSON)")
     print("  GET  /api/purdue/menu/<date> - Get Purdue menu")
     print("  GET  /api/purdue/nutrition/<food_name> - Get Purdue item nutrition")
+    print("  POST /api/planner/<user_id> - Purdue meal plans for remaining macros")
+    print("  GET  /api/recommendations/<user_id> - Foods matching remaining macros")
     print("  POST /api/calculations/macros - Calculate macro percentages")
     print("  POST /api/calculations/tdee - Calculate TDEE")
+    print("  POST /api/calculations/batch - Batch TDEE/macros/weight change")
+    print("  GET  /api/projection/<user_id> - Week-by-week weight projection")
+    print("  GET  /api/analytics/<user_id> - Rolling averages, adherence and streaks")
+    print("  GET  /api/deficiencies/<user_id>/<date> - Nutrition recommendations")
     print("  POST /api/goals/<user_id> - Set user goals")
+    print("  GET  /api/dashboard/<user_id>/<date> - Dashboard summary (totals, goals, macros, micronutrients, recommendations)")
     print("  GET  /api/health - Health check")
+    print("  GET  /api/metrics - Prometheus metrics")
+    if config.TRACE_DEBUG:
+        print("  GET  /api/debug/traces - Recent receipt traces (Chrome trace JSON)")
+        print("  GET  /api/debug/latency - Receipt pipeline latency histograms")
+    print("(development server; run `gunicorn app:app` or `python start.py --prod` for production)")
     
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    app.run(debug=config.SERVER_DEBUG, host=config.SERVER_HOST, port=config.SERVER_PORT)
 
@@ -0,0 +1,220 @@
+"""
+ASGI entry point: async Purdue lookups, everything else through Flask.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5001 --workers 4
+    python start.py --asgi
+
+GET /api/purdue/menu/<date> and GET /api/purdue/nutrition/<food_name> are
+handled here by coroutines that wait on HFS through upstream_async's shared
+client, so thousands of them can wait in one process without holding a
+thread each. They answer exactly like the Flask routes in app.py (same
+payload cache, ETags, 304s, compression, rate limits and metrics).
+
+Every other request goes to the Flask app unchanged, run by asgiref's
+WSGI adapter on SERVER_THREADS threads per process. The receipt pipeline
+there hands its nutrition lookups to the same event loop (see
+food_input.enrich_receipt_items).
+
+Requires asgiref and httpx, and an ASGI server such as uvicorn.
+"""
+
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+import compression
+import config
+import http_cache
+import json_codec
+import metrics
+import rate_limit
+import upstream_async
+from app import app as flask_app, preload, purdue_menu
+from http_cache import payload_cache
+
+# Flask requests run here; asgiref's default would put them all on one thread
+_wsgi_pool = ThreadPoolExecutor(max_workers=config.SERVER_THREADS, thread_name_prefix='wsgi')
+
+
+class _WsgiInstance(WsgiToAsgiInstance):
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+                                 thread_sensitive=False, executor=_wsgi_pool)
+
+
+class _Wsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _WsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+_wsgi = _Wsgi(flask_app)
+_started = False
+
+
+# ==================== RESPONSES ====================
+
+def json_reply(status, payload, headers=()):
+    """(status, headers, body) for a JSON response, serialized like jsonify()"""
+    body = json_codec.dumpb(payload, sort_keys=flask_app.json.sort_keys) + b'\n'
+    return status, [('Content-Type', 'application/json'), *headers], body
+
+
+def not_modified(request_headers, etag, cache_control, last_modified=None):
+    """Async http_cache.not_modified: a 304 reply if the client already has this version, else None"""
+    if not http_cache.is_fresh(etag, request_headers.get('if-none-match'),
+                               request_headers.get('if-modified-since'), last_modified):
+        return None
+    return 304, http_cache.validator_headers(etag, cache_control, last_modified), b''
+
+
+def cached_reply(request_headers, entry, cache_control):
+    """Response for a PayloadCache entry: 304 if the client has it, else the (compressed) body"""
+    etag, body = entry
+    reply = not_modified(request_headers, etag, cache_control)
+    if reply:
+        return reply
+    data, encoding, etag = compression.encode_body(body.encode('utf-8'), 'application/json',
+                                                   request_headers.get('accept-encoding', ''), etag)
+    headers = [('Content-Type', 'application/json'), *http_cache.validator_headers(etag, cache_control),
+               ('Vary', 'Accept-Encoding')]
+    if encoding:
+        headers.append(('Content-Encoding', encoding))
+    return 200, headers, data
+
+
+def cache_put(key, payload, etag=None, ttl=None):
+    # PayloadCache serializes with the Flask app's JSON provider
+    with flask_app.app_context():
+        return payload_cache.put(key, payload, etag=etag, ttl=ttl)
+
+
+# ==================== ASYNC PURDUE ENDPOINTS ====================
+
+async def get_purdue_menu(request_headers, date_str):
+    """Async app.get_purdue_menu: the ingested snapshot when it covers the date, else a (shared) HFS scrape"""
+    try:
+        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return json_reply(400, {'error': 'Invalid date format. Use YYYY-MM-DD'})
+    cache_control = f'public, max-age={config.HTTP_MENU_MAX_AGE}'
+    key = ('menu', target_date.isoformat())
+
+    menu = purdue_menu.load_snapshot() if purdue_menu else None
+    if menu is not None and menu.date == target_date.isoformat():
+        etag = http_cache.make_etag('menu', menu.date, menu.version)
+        reply = not_modified(request_headers, etag, cache_control)
+        if reply:
+            return reply
+        entry = payload_cache.get(key, etag) or cache_put(
+            key, {'success': True, 'date': date_str, 'menu_items': menu.items}, etag=etag)
+    else:
+        entry = payload_cache.get(key)
+        if entry is None:
+            # Requests arriving while the scrape runs wait for it instead of scraping again
+            menu_items = await upstream_async.shared(key, upstream_async.scrape_purdue_daily_menu, date_str)
+            entry = payload_cache.get(key) or cache_put(
+                key, {'success': True, 'date': date_str, 'menu_items': menu_items}, ttl=config.HTTP_MENU_MAX_AGE)
+    return cached_reply(request_headers, entry, cache_control)
+
+
+async def get_purdue_nutrition(request_headers, food_name):
+    """Async app.get_purdue_nutrition: one HFS item, reused for HTTP_NUTRITION_MAX_AGE"""
+    cache_control = f'public, max-age={config.HTTP_NUTRITION_MAX_AGE}'
+    key = ('nutrition', food_name)
+    entry = payload_cache.get(key)
+    if entry is None:
+        nutrition = await upstream_async.shared(key, upstream_async.get_purdue_menu_nutrition, food_name)
+        if not nutrition:
+            return json_reply(404, {'error': 'Food not found in Purdue menu'})
+        entry = payload_cache.get(key) or cache_put(
+            key, {'success': True, 'food_name': food_name, 'nutrition': nutrition}, ttl=config.HTTP_NUTRITION_MAX_AGE)
+    return cached_reply(request_headers, entry, cache_control)
+
+
+# (path pattern, Flask rule for metrics labels, handler)
+ROUTES = (
+    (re.compile(r'/api/purdue/menu/(?P<date_str>[^/]+)'), '/api/purdue/menu/<date_str>', get_purdue_menu),
+    (re.compile(r'/api/purdue/nutrition/(?P<food_name>[^/]+)'), '/api/purdue/nutrition/<food_name>',
+     get_purdue_nutrition),
+)
+
+
+# ==================== ASGI ====================
+
+def startup():
+    """Run upstream lookups (including the Flask threads' receipt lookups) on this server's loop"""
+    global _started
+    if config.SERVER_PRELOAD_DEPS:
+        preload()
+    if upstream_async.available():
+        upstream_async.attach(asyncio.get_running_loop())
+    _started = True
+
+
+async def dispatch(scope, send, rule, handler, params):
+    start = time.perf_counter()
+    metrics.add('nutrition_http_requests_in_flight')
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    status = 500
+    try:
+        if not upstream_async.available():
+            reply = json_reply(501, {'error': 'httpx not installed'})
+        else:
+            reply = admit(scope, request_headers) or await handler(request_headers, **params)
+    except Exception as e:
+        reply = json_reply(500, {'error': str(e)})
+    try:
+        status, headers, body = reply
+        if 'origin' in request_headers:
+            headers.append(('Access-Control-Allow-Origin', '*'))  # as flask-cors does for the Flask routes
+        headers.append(('Content-Length', str(len(body))))
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]})
+        await send({'type': 'http.response.body', 'body': body})
+    finally:
+        metrics.observe('nutrition_http_request_duration_seconds', (rule, 'GET', str(status)),
+                        time.perf_counter() - start)
+        metrics.add('nutrition_http_requests_in_flight', value=-1)
+
+
+def admit(scope, request_headers):
+    """rate_limit.py's token buckets for an async request (never shed: it holds no thread); None if admitted"""
+    if not config.RATE_LIMIT_ENABLED:
+        return None
+    client = (scope.get('client') or ('',))[0]  # rate_limit.client_key()
+    rejection = rate_limit.limiter.admit('purdue', client, holds_thread=False)
+    if rejection is None:
+        return None
+    status, payload = rate_limit.rejected('purdue', *rejection)
+    return json_reply(status, payload, [('Retry-After', str(payload['retry_after']))])
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            startup()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if upstream_async.available():
+                await upstream_async.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if not _started:
+        startup()  # server without lifespan support
+
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        for pattern, rule, handler in ROUTES:
+            match = pattern.fullmatch(scope['path'])
+            if match:
+                return await dispatch(scope, send, rule, handler, match.groupdict())
+    await _wsgi(scope, receive, send)
@@ -0,0 +1,110 @@
+"""
+Incremental analytics vs. a full-history recompute.
+
+Seeds a temporary database with users who have logged meals for a year,
+then simulates two more weeks of logging through DB.add_meal_entry +
+analytics.record_entry, reading every user's analytics each day. Reports
+read latency for the incremental windows and for recompute(), and checks
+that both give the same result for every user at the end.
+
+Usage:
+    python benchmarks/bench_analytics.py [--users 2000] [--history-days 365]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from seed_data import add_foods, add_goals, add_meal_entries, add_users
+
+START = date(2025, 1, 1)
+FOODS = 500
+
+
+def seed(conn, users, history_days, rng):
+    add_users(conn, range(1, users + 1), rng)
+    add_goals(conn, ((i, 0, 120, 30, 40, 30) for i in range(1, users + 1)))
+    add_foods(conn, FOODS, rng)
+    add_meal_entries(conn, ((u, rng.randint(1, FOODS), rng.choice([0.5, 1, 1.5]), 'lunch',
+                             (START + timedelta(days=d)).isoformat())
+                            for u in range(1, users + 1) for d in range(history_days) if rng.random() < 0.8
+                            for _ in range(rng.randint(1, 4))))
+    conn.commit()
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):7.3f} ms   p99 {np.percentile(ms, 99):7.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--history-days', type=int, default=365)
+    parser.add_argument('--simulate-days', type=int, default=14)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['NUTRITION_DB_PATH'] = os.path.join(tmp, 'bench.db')
+        import DB
+        from analytics import analytics
+
+        rng = random.Random(0)
+        start = time.perf_counter()
+        seed(DB.conn, args.users, args.history_days, rng)
+        print(f"Seeded {args.users:,} users x {args.history_days} days in {time.perf_counter() - start:.1f}s")
+
+        users = range(1, args.users + 1)
+        today = START + timedelta(days=args.history_days - 1)
+        rebuild = []
+        for user_id in users:
+            t = time.perf_counter()
+            analytics.get(user_id, today)
+            rebuild.append(time.perf_counter() - t)
+
+        reads, writes = [], []
+        for _ in range(args.simulate_days):
+            today += timedelta(days=1)
+            for user_id in users:
+                if rng.random() < 0.8:
+                    for _ in range(rng.randint(1, 4)):
+                        # Mostly today, sometimes a back-filled day this week
+                        day = today - timedelta(days=rng.choice([0] * 9 + [rng.randint(1, 6)]))
+                        t = time.perf_counter()
+                        entry_id = DB.add_meal_entry(user_id, f'food{rng.randint(1, FOODS)}', 1, 'lunch', 'manual',
+                                                     day.isoformat())
+                        analytics.record_entry(entry_id)
+                        writes.append(time.perf_counter() - t)
+                t = time.perf_counter()
+                analytics.get(user_id, today)
+                reads.append(time.perf_counter() - t)
+
+        recompute = []
+        mismatches = 0
+        for user_id in users:
+            t = time.perf_counter()
+            expected = analytics.recompute(user_id, today)
+            recompute.append(time.perf_counter() - t)
+            mismatches += analytics.get(user_id, today) != expected
+
+        print(f"first read (build)   {percentiles(rebuild)}")
+        print(f"incremental read     {percentiles(reads)}")
+        print(f"add + record_entry   {percentiles(writes)}")
+        print(f"full recompute       {percentiles(recompute)}")
+        print(f"\n{analytics.stats()}")
+        print(f"Matched recompute for {args.users - mismatches}/{args.users} users")
+        DB.close_connection()
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Throughput of scalar nutrition_calculations vs. the vectorized nutrition_batch.
+
+Times calculateTDEE, getMacros and getWeightChange called in a Python loop
+against their batch versions on random profiles, and checks that both give
+identical results.
+
+Usage:
+    python benchmarks/bench_calculations_batch.py [--sizes 1000 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import nutrition_batch
+from nutrition_calculations import calculateTDEE, getMacros, getWeightChange
+
+
+def make_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'weight_lbs': rng.uniform(90, 350, n).round(1).tolist(),
+        'height_inches': rng.uniform(55, 80, n).round(1).tolist(),
+        'age': rng.integers(16, 90, n).tolist(),
+        'sex': rng.choice(['male', 'female'], n).tolist(),
+        'activity_level': rng.choice(list(nutrition_batch.ACTIVITY_MULTIPLIERS), n).tolist(),
+        'calories': rng.uniform(800, 4500, n).round(0).tolist(),
+        'protein': rng.uniform(20, 250, n).round(1).tolist(),
+        'carbs': rng.uniform(50, 500, n).round(1).tolist(),
+        'fats': rng.uniform(10, 180, n).round(1).tolist(),
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(n):
+    p = make_profiles(n)
+    rows = list(zip(p['weight_lbs'], p['height_inches'], p['age'], p['sex'], p['activity_level']))
+
+    scalar_tdee, t_scalar_tdee = timed(lambda: [calculateTDEE(*row) for row in rows])
+    batch_tdee, t_batch_tdee = timed(lambda: nutrition_batch.calculateTDEEBatch(
+        p['weight_lbs'], p['height_inches'], p['age'], p['sex'], p['activity_level']))
+
+    macro_rows = list(zip(p['calories'], p['protein'], p['carbs'], p['fats']))
+    scalar_macros, t_scalar_macros = timed(lambda: [getMacros(*row) for row in macro_rows])
+    batch_macros, t_batch_macros = timed(lambda: nutrition_batch.getMacrosBatch(
+        p['calories'], p['protein'], p['carbs'], p['fats']))
+
+    change_rows = list(zip(scalar_tdee, p['calories']))
+    scalar_change, t_scalar_change = timed(lambda: [getWeightChange(*row) for row in change_rows])
+    batch_change, t_batch_change = timed(lambda: nutrition_batch.getWeightChangeBatch(
+        scalar_tdee, p['calories']))
+
+    assert scalar_tdee == batch_tdee.tolist(), 'calculateTDEE mismatch'
+    assert scalar_macros == batch_macros.tolist(), 'getMacros mismatch'
+    assert scalar_change == batch_change.tolist(), 'getWeightChange mismatch'
+
+    for name, t_scalar, t_batch in (('calculateTDEE', t_scalar_tdee, t_batch_tdee),
+                                    ('getMacros', t_scalar_macros, t_batch_macros),
+                                    ('getWeightChange', t_scalar_change, t_batch_change)):
+        print(f"{name:<16}{n:>10,}{n / t_scalar:>16,.0f}{n / t_batch:>16,.0f}{t_scalar / t_batch:>10.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'function':<16}{'rows':>10}{'scalar rows/s':>16}{'batch rows/s':>16}{'speedup':>11}")
+    print("=" * 69)
+    for n in args.sizes:
+        run(n)
+    print("\nBatch results were checked to be identical to the scalar functions.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Times deficiency_job.py on a synthetic cohort.
+
+Seeds a temporary database with N users (most with goals), foods with
+partial micronutrient data and a few meal entries each for one date, runs the
+job, and verifies a sample of users against checkDeficiencies +
+checkMicronutrients.
+
+Usage:
+    python benchmarks/bench_deficiency_job.py [--users 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from seed_data import add_foods, add_goals, add_meal_entries, add_users
+
+DATE = '2025-10-09'
+FOODS = 500
+
+
+def seed(conn, users, seed_value=0):
+    rng = random.Random(seed_value)
+    add_users(conn, range(1, users + 1))
+    add_goals(conn, ((i, -1.0, rng.choice([100, 120, 150]), 25, 50, 25)
+                     for i in range(1, users + 1) if rng.random() < 0.8))
+    add_foods(conn, FOODS, rng)
+    # Most foods report sodium and saturated fat, fewer report fiber
+    conn.executemany(
+        'INSERT INTO food_nutrients (food_id, nutrient, amount) VALUES (?, ?, ?)',
+        ((f, nutrient, rng.randint(0, high)) for f in range(1, FOODS + 1)
+         for nutrient, high, share in (('sodium', 1500, 0.9), ('saturated_fat', 15, 0.8), ('dietary_fiber', 10, 0.6))
+         if rng.random() < share)
+    )
+    add_meal_entries(conn, ((u, rng.randint(1, FOODS), rng.choice([0.5, 1, 1.5, 2]), 'lunch', DATE)
+                            for u in range(1, users + 1) if rng.random() < 0.9 for _ in range(rng.randint(1, 6))))
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--verify', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['NUTRITION_DB_PATH'] = os.path.join(tmp, 'bench.db')
+        import DB
+        import deficiency_job
+
+        start = time.perf_counter()
+        seed(DB.conn, args.users)
+        print(f"Seeded {args.users:,} users in {time.perf_counter() - start:.1f}s")
+
+        stats = deficiency_job.run_job(DATE)
+        print(f"Job: {stats['users']:,} users in {stats['total_s']}s "
+              f"(load {stats['load_s']}s, evaluate {stats['evaluate_s']}s, write {stats['write_s']}s)")
+
+        mismatches = deficiency_job.verify_sample(DATE, args.verify)
+        print(f"Verified {min(args.verify, args.users):,} users against checkDeficiencies + checkMicronutrients: {mismatches} mismatches")
+        DB.close_connection()
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Build and query latency of food_index on a synthetic food table.
+
+Indexes random foods, reports KD-tree build time and query p50/p99 (without a
+calorie cap, with a typical one and with the small caps of late in the day)
+against a brute-force scan of the same vectors, then
+adds foods through the delta buffer and checks every answer against an exact
+search.
+
+Usage:
+    python benchmarks/bench_food_index.py [--foods 100000] [--queries 2000] [--adds 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import food_index as fi
+
+
+def random_foods(rng, n, start=0):
+    protein, carbs, fat = rng.uniform(0, 60, n), rng.uniform(0, 120, n), rng.uniform(0, 50, n)
+    calories = np.rint((protein * 4 + carbs * 4 + fat * 9) * rng.uniform(0.9, 1.1, n)) + 1
+    return [{'food_id': start + i, 'name': f'food {start + i}', 'calories': float(calories[i]),
+             'protein_g': float(protein[i]), 'carbs_g': float(carbs[i]), 'fat_g': float(fat[i])}
+            for i in range(n)]
+
+
+def random_targets(rng, n):
+    shares = rng.dirichlet([2, 4, 3], n)
+    caps = rng.uniform(150, 900, n)
+    return shares, caps
+
+
+# Query modes: label -> calorie caps for the targets (None = uncapped)
+def cap_modes(rng, n, caps):
+    return {'no cap': None, 'calorie cap': caps, 'cap <= 120': rng.uniform(-50, 120, n)}
+
+
+def exact(foods, vectors, target, k, max_calories=None):
+    distances = np.sqrt(((vectors - target) ** 2).sum(axis=1))
+    order = np.argsort(distances, kind='stable')
+    ids = [foods[i]['food_id'] for i in order.tolist()
+           if max_calories is None or foods[i]['calories'] <= max_calories]
+    return ids[:k], distances
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):7.3f} ms   p99 {np.percentile(ms, 99):7.3f} ms"
+
+
+def time_queries(index, shares, caps, k):
+    samples = []
+    for i, target in enumerate(shares):
+        start = time.perf_counter()
+        index.query(target, k=k, max_calories=None if caps is None else caps[i])
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--foods', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--adds', type=int, default=2000)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    foods = random_foods(rng, args.foods)
+    shares, caps = random_targets(rng, args.queries)
+    modes = cap_modes(rng, args.queries, caps)
+
+    print(f"{args.foods} foods, {args.queries} queries, k={args.k}")
+    results = {}
+    for backend in ('cKDTree', 'brute_force'):
+        if backend == 'cKDTree' and fi.cKDTree is None:
+            print("cKDTree      skipped (scipy not installed)")
+            continue
+        saved, fi.cKDTree = fi.cKDTree, (fi.cKDTree if backend == 'cKDTree' else None)
+        try:
+            index = fi.FoodIndex(rebuild_threshold=args.adds + 1)
+            start = time.perf_counter()
+            index.build(foods)
+            build = time.perf_counter() - start
+            print(f"{backend:<13}build {build * 1000:8.1f} ms")
+            for label, mode_caps in modes.items():
+                print(f"  {label:<13}{percentiles(time_queries(index, shares, mode_caps, args.k))}")
+            results[backend] = index
+        finally:
+            fi.cKDTree = saved
+
+    # Incremental adds: every new food lands in the delta buffer, no rebuild
+    index = next(iter(results.values()))
+    added = random_foods(rng, args.adds, start=args.foods)
+    start = time.perf_counter()
+    for food in added:
+        index.add(food)
+    per_add = (time.perf_counter() - start) / max(args.adds, 1)
+    print(f"\nadd()        {per_add * 1e6:8.1f} us/food, delta {index.stats()['pending_delta']}")
+    for label, mode_caps in modes.items():
+        print(f"  with delta, {label:<13}{percentiles(time_queries(index, shares, mode_caps, args.k))}")
+
+    everything = foods + added
+    _, vectors = fi._vectorize(everything)
+    mismatches = 0
+    checks = min(args.queries, 200)
+    checked = [(target, mode_caps[i]) for mode_caps in (caps, modes['cap <= 120'])
+               for i, target in enumerate(shares[:checks])]
+    for target, cap in checked:
+        expected, distances = exact(everything, vectors, target, args.k, cap)
+        got = [food['food_id'] for food in index.query(target, k=args.k, max_calories=cap)]
+        if got != expected:
+            # Equal distances may come back in either order
+            got_d = np.round(distances[got], 9) if len(got) == len(expected) else None
+            if got_d is None or not np.array_equal(got_d, np.round(distances[expected], 9)):
+                mismatches += 1
+    print(f"\nMatched exact search in {len(checked) - mismatches}/{len(checked)} capped queries")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Meal history export and import throughput, and export memory by history size.
+
+Seeds a temporary database with one user's history at each --sizes, then
+streams it through GET /api/meals/<user_id>/export as CSV and NDJSON (rows/s,
+and the peak Python memory allocated while streaming, which should not grow
+with the history), and posts each export back to
+POST /api/meals/<user_id>/import for a new user (rows/s). For comparison,
+times logging --single rows one POST /api/meals at a time, the only way in
+before bulk import.
+
+Usage:
+    python benchmarks/bench_history_io.py [--sizes 20000 200000] [--single 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from seed_data import add_foods, add_meal_entries, add_users
+
+START = date(2015, 1, 1)
+FOODS = 500
+
+
+def add_user(conn, user_id):
+    add_users(conn, [user_id])
+    conn.commit()
+
+
+def seed(conn, user_id, entries, rng):
+    add_users(conn, [user_id])
+    add_foods(conn, FOODS, rng)
+    # About five entries a day
+    add_meal_entries(conn, ((user_id, rng.randint(1, FOODS), rng.choice((0.5, 1, 1.5, 2)),
+                             rng.choice(('breakfast', 'lunch', 'dinner', 'snack')),
+                             (START + timedelta(days=i // 5)).isoformat()) for i in range(entries)))
+    conn.commit()
+
+
+def export(client, user_id, fmt, measure_memory=False):
+    """(body bytes, seconds, peak traced MB or None) for one streamed export"""
+    if measure_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(f'/api/meals/{user_id}/export?format={fmt}')
+    size = 0
+    chunks = [] if not measure_memory else None
+    for chunk in response.iter_encoded():
+        size += len(chunk)
+        if chunks is not None:
+            chunks.append(chunk)
+    response.close()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        tracemalloc.stop()
+    return b''.join(chunks) if chunks is not None else size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20_000, 200_000])
+    parser.add_argument('--single', type=int, default=2000, help='rows to log one POST /api/meals at a time')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['NUTRITION_DB_PATH'] = os.path.join(tmp, 'bench.db')
+        os.environ['RATE_LIMIT_ENABLED'] = '0'
+        import DB
+        import app
+
+        client = app.app.test_client()
+        rng = random.Random(0)
+        next_user = 1
+
+        print(f"{'entries':>9}{'format':>8}{'export rows/s':>15}{'export MB':>11}{'peak MB':>9}{'import rows/s':>15}")
+        for entries in args.sizes:
+            source = next_user
+            seed(DB.conn, source, entries, rng)
+            next_user += 1
+            for fmt in ('csv', 'ndjson'):
+                body, seconds, _ = export(client, source, fmt)
+                _, _, peak = export(client, source, fmt, measure_memory=True)
+
+                target = next_user
+                add_user(DB.conn, target)
+                next_user += 1
+                start = time.perf_counter()
+                result = client.post(f'/api/meals/{target}/import?format={fmt}', data=body).get_json()
+                import_seconds = time.perf_counter() - start
+                assert result['imported'] == entries, result
+
+                print(f"{entries:>9}{fmt:>8}{entries / seconds:>15,.0f}{len(body) / (1 << 20):>11.1f}"
+                      f"{peak:>9.2f}{entries / import_seconds:>15,.0f}")
+
+        target = next_user
+        add_user(DB.conn, target)
+        start = time.perf_counter()
+        for i in range(args.single):
+            client.post('/api/meals', json={'user_id': target, 'food_name': f'food{i % FOODS + 1}',
+                                            'quantity_servings': 1, 'entry_date': '2025-01-01'})
+        seconds = time.perf_counter() - start
+        print(f"\nPOST /api/meals one row at a time: {args.single / seconds:,.0f} rows/s")
+        DB.close_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Full responses vs. 304 revalidations on the conditional-cached read endpoints.
+
+Seeds a temporary database with users who logged meals over a year, then
+requests /api/meals/<user_id>/<date> through Flask's test client, once
+without and once with each path's current ETag (all 304s), and does the
+same for /api/purdue/menu/<date> on the checked-in menu snapshot. Reports
+p50/p99 latency and bytes per response.
+
+Usage:
+    python benchmarks/bench_http_cache.py [--users 2000] [--requests 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from seed_data import add_foods, add_meal_entries, add_users
+
+START = date(2025, 1, 1)
+DAYS = 365
+FOODS = 500
+
+
+def seed(conn, users, rng):
+    add_users(conn, range(1, users + 1))
+    add_foods(conn, FOODS, rng)
+    add_meal_entries(conn, ((u, rng.randint(1, FOODS), 1, 'lunch', (START + timedelta(days=d)).isoformat())
+                            for u in range(1, users + 1) for d in range(DAYS) if rng.random() < 0.5
+                            for _ in range(rng.randint(1, 3))))
+    conn.commit()
+
+
+def measure(client, paths, conditional):
+    """Latencies and body sizes for GETs of paths; conditional sends each path's current ETag"""
+    etags = {path: client.get(path).headers.get('ETag') for path in set(paths)} if conditional else {}
+    samples, sizes = [], []
+    for path in paths:
+        headers = {'If-None-Match': etags[path]} if conditional else {}
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append(time.perf_counter() - start)
+        sizes.append(len(response.data))
+    return samples, sizes
+
+
+def report(label, samples, sizes):
+    ms = np.array(samples) * 1000
+    print(f"{label:<28}p50 {np.percentile(ms, 50):7.3f} ms   p99 {np.percentile(ms, 99):7.3f} ms   "
+          f"{np.mean(sizes):9.0f} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['NUTRITION_DB_PATH'] = os.path.join(tmp, 'bench.db')
+        os.environ['NUTRITION_CACHE_WARM_LOAD'] = '0'
+        os.environ['RATE_LIMIT_ENABLED'] = '0'  # one client hammering the menu
+        os.environ.setdefault('PURDUE_MENU_SNAPSHOT', os.path.join(ROOT, 'purdue_nutrition_data.json'))
+        import DB
+        from app import app, purdue_menu
+
+        rng = random.Random(0)
+        seed(DB.conn, args.users, rng)
+        client = app.test_client()
+
+        paths = [f'/api/meals/{rng.randint(1, args.users)}/{(START + timedelta(days=rng.randrange(DAYS))).isoformat()}'
+                 for _ in range(args.requests)]
+        report('meals (full)', *measure(client, paths, conditional=False))
+        report('meals (If-None-Match)', *measure(client, paths, conditional=True))
+
+        menu = purdue_menu.load_snapshot() if purdue_menu else None
+        if menu is not None:
+            paths = [f'/api/purdue/menu/{menu.date}'] * min(args.requests, 500)
+            report('menu (full)', *measure(client, paths, conditional=False))
+            report('menu (If-None-Match)', *measure(client, paths, conditional=True))
+        DB.close_connection()
+
+
+if __name__ == '__main__':
+    main()
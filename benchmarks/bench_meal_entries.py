@@ -0,0 +1,106 @@
+"""
+Keyset vs. OFFSET pagination of a user's meal entries at increasing depth.
+
+Seeds a temporary database with users who logged several entries a day for
+years, then fetches pages of DB.get_meal_entries deeper and deeper into one
+user's history: by keyset (the cursor of the previous page, as
+/api/meals/<user_id>/entries does) and by LIMIT/OFFSET for comparison.
+Reports p50/p99 latency per page depth.
+
+Usage:
+    python benchmarks/bench_meal_entries.py [--users 50] [--years 10] [--page 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from seed_data import add_foods, add_meal_entries, add_users
+
+START = date(2015, 1, 1)
+FOODS = 500
+DEPTHS = (0, 10, 100, 250)
+
+
+def seed(conn, users, days, rng):
+    add_users(conn, range(1, users + 1))
+    add_foods(conn, FOODS, rng)
+    # Day by day across all users, as real logging interleaves users' ids
+    add_meal_entries(conn, ((u, rng.randint(1, FOODS), 1, 'lunch', (START + timedelta(days=d)).isoformat())
+                            for d in range(days) for u in range(1, users + 1) for _ in range(rng.randint(2, 6))))
+    conn.commit()
+
+
+def offset_page(DB, user_id, offset, limit):
+    DB.cursor.execute('''
+        SELECT me.id, me.entry_date, me.meal_type, me.source, me.quantity_servings,
+               f.id, f.name, f.serving_size_value, f.serving_size_unit,
+               f.calories_per_serving, f.protein_g_per_serving, f.carbs_g_per_serving, f.fat_g_per_serving
+        FROM meal_entries me
+        JOIN foods f ON me.food_id = f.id
+        WHERE me.user_id = ?
+        ORDER BY me.entry_date DESC, me.id DESC
+        LIMIT ? OFFSET ?
+    ''', (user_id, limit, offset))
+    return DB.cursor.fetchall()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    ms = np.array(samples) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--page', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['NUTRITION_DB_PATH'] = os.path.join(tmp, 'bench.db')
+        import DB
+
+        rng = random.Random(0)
+        seed(DB.conn, args.users, args.years * 365, rng)
+        user_id = args.users // 2
+        total = DB.conn.execute('SELECT COUNT(*) FROM meal_entries WHERE user_id = ?', (user_id,)).fetchone()[0]
+        print(f"user {user_id}: {total} entries over {args.years} years, {args.page} per page\n")
+
+        # The cursor at the start of each measured page, found by walking the pages once
+        cursors, before = {}, None
+        for depth in range(max(DEPTHS) + 1):
+            if depth in DEPTHS:
+                cursors[depth] = before
+            rows = DB.get_meal_entries(user_id, before, args.page)
+            if len(rows) < args.page:
+                break
+            before = (rows[-1][1], rows[-1][0])
+
+        print(f"{'page':>6}{'keyset p50':>12}{'p99':>9}{'offset p50':>12}{'p99':>9}  ms")
+        for depth, before in cursors.items():
+            keyset = timed(lambda: DB.get_meal_entries(user_id, before, args.page + 1), args.repeat)
+            offset = timed(lambda: offset_page(DB, user_id, depth * args.page, args.page + 1), args.repeat)
+            assert [row[0] for row in DB.get_meal_entries(user_id, before, args.page)] == \
+                [row[0] for row in offset_page(DB, user_id, depth * args.page, args.page)]
+            print(f"{depth:>6}{keyset[0]:>12.3f}{keyset[1]:>9.3f}{offset[0]:>12.3f}{offset[1]:>9.3f}")
+        DB.close_connection()
+
+
+if __name__ == '__main__':
+    main()
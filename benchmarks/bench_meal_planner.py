@@ -0,0 +1,94 @@
+"""
+Latency and quality of meal_planner on the checked-in Purdue menu snapshot.
+
+Plans random remaining-macro targets across all halls and for a single hall,
+reports p50/p99 latency, and compares the best 3-item plans with an exhaustive
+search to show how often the beam finds the true optimum.
+
+Usage:
+    python benchmarks/bench_meal_planner.py [--trials 200] [--snapshot purdue_nutrition_data.json]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import meal_planner
+import purdue_menu
+
+
+def random_targets(rng):
+    calories = rng.uniform(400, 1200)
+    protein, fat = rng.uniform(0.15, 0.4), rng.uniform(0.2, 0.4)
+    carbs = 1 - protein - fat
+    return {'calories': calories, 'protein_g': calories * protein / 4,
+            'carbs_g': calories * carbs / 4, 'fat_g': calories * fat / 9}
+
+
+def exhaustive_best(vectors, target, max_items):
+    """Lowest plan score over every combination of up to max_items rows (vectorized, max_items <= 3)"""
+    norm = max(target[0], 1.0) ** 2
+
+    def score(sums):
+        err = sums - target
+        return (np.where(err > 0, meal_planner.OVERSHOOT_PENALTY, 1.0) * err ** 2).sum(axis=-1) / norm
+
+    best = score(vectors).min()
+    i, j = np.triu_indices(len(vectors), 1)
+    pairs = vectors[i] + vectors[j]
+    if max_items >= 2 and len(pairs):
+        best = min(best, score(pairs).min())
+    if max_items >= 3:
+        for a in range(len(vectors)):
+            later = i > a
+            if later.any():
+                best = min(best, score(vectors[a] + pairs[later]).min())
+    return best
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):6.2f} ms   p99 {np.percentile(ms, 99):6.2f} ms   max {ms.max():6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--snapshot', default=os.path.join(ROOT, 'purdue_nutrition_data.json'))
+    args = parser.parse_args()
+
+    menu = purdue_menu.load_snapshot(args.snapshot)
+    halls = menu.dining_halls()
+    print(f"Menu {menu.date}: {len(menu)} items, {len(halls)} halls")
+    rng = np.random.default_rng(0)
+    targets = [random_targets(rng) for _ in range(args.trials)]
+
+    meal_planner.plan_meals(menu, targets[0])  # warm per-hall pools
+    for label, hall in (('all halls', None), (f'hall={halls[0]}', halls[0])):
+        samples = []
+        for target in targets:
+            start = time.perf_counter()
+            meal_planner.plan_meals(menu, target, dining_hall=hall)
+            samples.append(time.perf_counter() - start)
+        print(f"{label:<20}{percentiles(samples)}")
+
+    optimal = 0
+    trials = min(args.trials, 50)
+    for target in targets[:trials]:
+        hall = halls[int(rng.integers(len(halls)))]
+        plans = meal_planner.plan_meals(menu, target, dining_hall=hall, max_items=3, count=1)
+        pool = menu.distinct_indices(hall)
+        kcal_target = np.array([target[f] for f in meal_planner.TARGET_FIELDS]) * meal_planner.KCAL_SCALE
+        exact = exhaustive_best(menu.macros[pool] * meal_planner.KCAL_SCALE, kcal_target, 3)
+        optimal += plans[0]['score'] <= round(exact, 4) + 1e-4
+    print(f"\nBest 3-item plan matched exhaustive search in {optimal}/{trials} trials")
+
+
+if __name__ == '__main__':
+    main()
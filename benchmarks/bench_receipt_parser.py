@@ -0,0 +1,91 @@
+"""
+Benchmark and accuracy check for receipt line parsing.
+
+Compares the original single-regex parser with receipt_parser on the corpus in
+receipt_corpus.json: item-level precision/recall, how many lookups each parser
+would send to the nutrition web lookup, and parse throughput.
+
+Usage:
+    python benchmarks/bench_receipt_parser.py [--iterations 2000]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from receipt_parser import parse_receipt_text
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'receipt_corpus.json')
+
+
+def legacy_parse_receipt_items(receipt_text):
+    """The original parse_receipt_items implementation, kept for comparison"""
+    items = []
+    for line in receipt_text.splitlines():
+        match = re.match(r"([A-Za-z ]+)\s+([\d\.]+)", line)
+        if match:
+            name = match.group(1).strip().lower()
+            quantity = float(match.group(2))
+            items.append({"name": name, "quantity": quantity, "unit": "each"})
+    return items
+
+
+def score(parse, receipts):
+    """Return (true positives, predicted, expected, exact receipts) for a parser"""
+    true_pos = predicted = expected = exact = 0
+    for receipt in receipts:
+        got = [(i['name'], float(i['quantity']), i['unit']) for i in parse(receipt['text'])]
+        want = [(i['name'], float(i['quantity']), i['unit']) for i in receipt['expected']]
+        remaining = list(want)
+        for item in got:
+            if item in remaining:
+                remaining.remove(item)
+                true_pos += 1
+        predicted += len(got)
+        expected += len(want)
+        exact += int(sorted(got) == sorted(want))
+    return true_pos, predicted, expected, exact
+
+
+def throughput(parse, receipts, iterations):
+    """Return parsed lines per second"""
+    lines = sum(len(r['text'].splitlines()) for r in receipts)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for receipt in receipts:
+            parse(receipt['text'])
+    elapsed = time.perf_counter() - start
+    return lines * iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        receipts = json.load(f)['receipts']
+
+    print(f"Receipt corpus: {len(receipts)} receipts, "
+          f"{sum(len(r['expected']) for r in receipts)} expected items")
+    print("=" * 72)
+    print(f"{'parser':<16}{'precision':>10}{'recall':>10}{'exact':>8}{'lookups':>10}{'lines/s':>14}")
+
+    for name, parse in (('legacy regex', legacy_parse_receipt_items), ('receipt_parser', parse_receipt_text)):
+        true_pos, predicted, expected, exact = score(parse, receipts)
+        precision = true_pos / predicted if predicted else 1.0
+        recall = true_pos / expected if expected else 1.0
+        rate = throughput(parse, receipts, args.iterations)
+        print(f"{name:<16}{precision:>10.2f}{recall:>10.2f}{exact:>5}/{len(receipts):<2}"
+              f"{predicted:>10}{rate:>14,.0f}")
+
+    print("\n'lookups' is the number of names each parser would send to get_nutrition_from_web.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+JSON encoder and response compression on the Purdue menu payload.
+
+Serializes the menu snapshot's /api/purdue/menu response with Flask's
+stdlib JSON provider and with json_codec's (orjson when installed), then
+compresses it with gzip at a few levels and brotli (when installed), and
+finally requests the endpoint through the test client with each
+Accept-Encoding. Reports time per operation and bytes on the wire.
+
+Usage:
+    python benchmarks/bench_serialization.py [--repeat 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return np.percentile(np.array(samples) * 1000, 50), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--snapshot', default=os.path.join(ROOT, 'purdue_nutrition_data.json'))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['NUTRITION_DB_PATH'] = os.path.join(tmp, 'bench.db')
+        os.environ['NUTRITION_CACHE_WARM_LOAD'] = '0'
+        os.environ['RATE_LIMIT_ENABLED'] = '0'  # one client hammering the menu
+        os.environ['PURDUE_MENU_SNAPSHOT'] = args.snapshot
+        from flask.json.provider import DefaultJSONProvider
+
+        import compression
+        import DB
+        import json_codec
+        import purdue_menu
+        from app import app
+
+        menu = purdue_menu.load_snapshot()
+        payload = {'success': True, 'date': menu.date, 'menu_items': menu.items}
+        print(f"Menu {menu.date}: {len(menu.items)} items\n")
+
+        print(f"{'serialize':<24}{'p50 ms':>10}{'bytes':>10}")
+        stdlib_provider, fast_provider = DefaultJSONProvider(app), json_codec.JSONProvider(app)
+        with app.app_context():
+            for label, provider in (('stdlib (jsonify)', stdlib_provider), (f'json_codec ({json_codec.BACKEND})', fast_provider)):
+                ms, response = timed(lambda: provider.response(payload), args.repeat)
+                print(f"{label:<24}{ms:>10.3f}{len(response.get_data()):>10}")
+            data = fast_provider.response(payload).get_data()
+
+        print(f"\n{'compress':<24}{'p50 ms':>10}{'bytes':>10}{'ratio':>8}")
+        levels = [('gzip', level) for level in (1, 6, 9)]
+        if compression.brotli is not None:
+            levels += [('br', quality) for quality in (1, 5, 11)]
+        else:
+            print("(brotli not installed; gzip only)")
+        for encoding, level in levels:
+            setting = 'COMPRESSION_GZIP_LEVEL' if encoding == 'gzip' else 'COMPRESSION_BROTLI_QUALITY'
+            setattr(compression.config, setting, level)
+            ms, body = timed(lambda: compression.compress(data, encoding), max(args.repeat // 10, 5))
+            print(f"{f'{encoding} {level}':<24}{ms:>10.3f}{len(body):>10}{len(data) / len(body):>8.1f}")
+        compression.config.COMPRESSION_GZIP_LEVEL = 6
+        compression.config.COMPRESSION_BROTLI_QUALITY = 5
+
+        print(f"\n{'GET /api/purdue/menu':<24}{'p50 ms':>10}{'bytes':>10}")
+        client = app.test_client()
+        path = f'/api/purdue/menu/{menu.date}'
+        for accept in ('identity', 'gzip') + (('br',) if compression.brotli is not None else ()):
+            ms, response = timed(lambda: client.get(path, headers={'Accept-Encoding': accept}), args.repeat)
+            print(f"{accept:<24}{ms:>10.3f}{len(response.data):>10}")
+        DB.close_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Throughput and latency of the Flask development server vs. the gunicorn production server.
+
+Seeds a temporary database with users and a week of meals, starts each server
+on it in a subprocess, and drives it with --clients concurrent keep-alive
+connections requesting dashboards, daily meal lists and profiles for
+--duration seconds. Reports requests/second, p50/p99 latency, errors, and
+keep-alive connections that had to be reopened (gunicorn closes them when it
+recycles a worker after SERVER_MAX_REQUESTS) per server. gunicorn is skipped (with a note) when it isn't installed.
+
+Usage:
+    python benchmarks/bench_serving.py [--clients 32] [--duration 10] [--workers 4 --threads 4]
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+USERS = 200
+FOODS = 300
+TODAY = date(2025, 10, 9)
+
+
+def seed(db_path):
+    """Create the database in a child interpreter so this process never holds a connection to it"""
+    script = f'''
+import random
+import DB
+rng = random.Random(0)
+cur = DB.conn.cursor()
+cur.executemany("""INSERT INTO users (id, username, password_hash, weight_lbs, sex, activity_level, height_inches, age)
+                   VALUES (?, ?, 'x', ?, ?, 'moderate', ?, ?)""",
+                ((i, f"user{{i}}", rng.randint(120, 240), rng.choice(["male", "female"]), rng.randint(60, 76),
+                  rng.randint(18, 65)) for i in range(1, {USERS} + 1)))
+cur.executemany("""INSERT INTO user_goals (user_id, goal_weight_change_lbs_per_week, goal_protein_g,
+                                           goal_protein_pct, goal_carbs_pct, goal_fat_pct)
+                   VALUES (?, -0.5, 120, 30, 40, 30)""", ((i,) for i in range(1, {USERS} + 1)))
+cur.executemany("""INSERT INTO foods (id, name, serving_size_value, serving_size_unit, calories_per_serving,
+                                      protein_g_per_serving, carbs_g_per_serving, fat_g_per_serving)
+                   VALUES (?, ?, 1, 'serving', ?, ?, ?, ?)""",
+                ((f, f"food{{f}}", rng.randint(100, 800), rng.randint(2, 50), rng.randint(0, 90), rng.randint(0, 40))
+                 for f in range(1, {FOODS} + 1)))
+cur.executemany("""INSERT INTO meal_entries (user_id, food_id, quantity_servings, meal_type, source, entry_date)
+                   VALUES (?, ?, 1, 'lunch', 'manual', date(?, ?))""",
+                ((u, rng.randint(1, {FOODS}), "{TODAY.isoformat()}", f"-{{d}} days")
+                 for u in range(1, {USERS} + 1) for d in range(7) for _ in range(rng.randint(1, 4))))
+DB.conn.commit()
+'''
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=dict(os.environ, NUTRITION_DB_PATH=db_path),
+                   check=True)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, db_path, port, args, log):
+    env = dict(os.environ, NUTRITION_DB_PATH=db_path, SERVER_HOST='127.0.0.1', SERVER_PORT=str(port),
+               SERVER_DEBUG='0', SERVER_WORKERS=str(args.workers), SERVER_THREADS=str(args.threads),
+               SERVER_ACCESS_LOG='', NUTRITION_CACHE_WARM_LOAD='0', RATE_LIMIT_ENABLED='0')
+    if kind == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    else:
+        command = [sys.executable, 'app.py']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{kind} exited with {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{kind} did not start within 30s')
+
+
+def paths(rng):
+    while True:
+        user_id = rng.randint(1, USERS)
+        day = (TODAY - timedelta(days=rng.randrange(7))).isoformat()
+        yield rng.choice((f'/api/dashboard/{user_id}/{day}', f'/api/meals/{user_id}/{day}', f'/api/users/{user_id}'))
+
+
+def client(port, stop, seed_value, latencies, errors, reconnects):
+    rng = random.Random(seed_value)
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for path in paths(rng):
+        if stop.is_set():
+            break
+        start = time.perf_counter()
+        for attempt in range(2):
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                latencies.append(time.perf_counter() - start)
+                break
+            except (OSError, http.client.HTTPException) as e:
+                # A recycled worker closes its idle keep-alive connections; like a browser,
+                # retry once on a new connection before calling it an error
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                if attempt:
+                    errors.append(type(e).__name__)
+                else:
+                    reconnects.append(1)
+    connection.close()
+
+
+def load(port, clients, duration):
+    stop = threading.Event()
+    latencies, errors, reconnects = [], [], []
+    threads = [threading.Thread(target=client, args=(port, stop, i, latencies, errors, reconnects))
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, len(reconnects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per server')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    args = parser.parse_args()
+
+    servers = ['flask-dev']
+    try:
+        import gunicorn
+        servers.append('gunicorn')
+    except ImportError:
+        print("gunicorn is not installed (pip install gunicorn); measuring the development server only")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        seed(db_path)
+        print(f"{args.clients} clients x {args.duration:g}s; gunicorn: {args.workers} workers x {args.threads} threads\n")
+        print(f"{'server':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'reconnects':>12}")
+
+        for kind in servers:
+            port = free_port()
+            with open(os.path.join(tmp, f'{kind}.log'), 'w') as log:
+                process = start_server(kind, db_path, port, args, log)
+                try:
+                    load(port, min(args.clients, 4), 1)  # warm up caches and connections
+                    latencies, errors, reconnects = load(port, args.clients, args.duration)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+            ms = np.array(latencies) * 1000
+            print(f"{kind:<12}{len(latencies) / args.duration:>10.0f}{np.percentile(ms, 50):>10.2f}"
+                  f"{np.percentile(ms, 99):>10.2f}{len(errors):>8}{reconnects:>12}")
+            if errors:
+                print(f"  first errors: {errors[:5]} (log: {log.name})")
+
+
+if __name__ == '__main__':
+    main()
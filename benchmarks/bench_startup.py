@@ -0,0 +1,83 @@
+"""
+Worker startup cost: import time and memory of the app, lazy vs. preloaded.
+
+Starts fresh interpreters that import app.py against a temporary database and
+report how long the import took and the process's RSS after a first request,
+served either right away (lazy: numpy/scipy and the receipt stack are still
+unloaded) or after app.preload() (what every worker paid at import before
+dependencies were deferred, and what SERVER_PRELOAD_DEPS still does). Then
+times a first recommendations request, which is where a lazy worker pays for
+the deferred imports.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Runs in each child interpreter; prints one JSON line
+CHILD = r'''
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+result = {'import_ms': (time.perf_counter() - start) * 1000}
+if sys.argv[1] == 'preload':
+    start = time.perf_counter()
+    app.preload()
+    result['preload_ms'] = (time.perf_counter() - start) * 1000
+def rss_mb():
+    # Linux reports kilobytes, macOS bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+client = app.app.test_client()
+start = time.perf_counter()
+client.get('/api/meals/1/2025-01-01')
+result['first_request_ms'] = (time.perf_counter() - start) * 1000
+result['rss_mb'] = rss_mb()
+result['modules'] = len(sys.modules)
+start = time.perf_counter()
+client.get('/api/recommendations/1')
+result['first_recommendation_ms'] = (time.perf_counter() - start) * 1000
+result['rss_after_all_mb'] = rss_mb()
+print(json.dumps(result))
+'''
+
+
+def run(mode, db_path):
+    env = dict(os.environ, NUTRITION_DB_PATH=db_path, RATE_LIMIT_ENABLED='0', PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, '-c', CHILD, mode], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        run('lazy', db_path)  # create the schema so no run pays for it
+
+        fields = ('import_ms', 'preload_ms', 'first_request_ms', 'rss_mb', 'modules',
+                  'first_recommendation_ms', 'rss_after_all_mb')
+        print(f"{'mode':<10}" + ''.join(f'{field:>25}' for field in fields))
+        for mode in ('lazy', 'preload'):
+            results = [run(mode, db_path) for _ in range(args.runs)]
+            row = [median([r[field] for r in results]) if field in results[0] else None for field in fields]
+            print(f'{mode:<10}' + ''.join(f'{"-":>25}' if value is None else f'{value:>25.1f}' for value in row))
+
+
+if __name__ == '__main__':
+    main()
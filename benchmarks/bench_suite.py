@@ -0,0 +1,338 @@
+"""
+Latency suite for nutrition_calculations and the DB.py hot paths, with regression gates.
+
+Times the scalar calculation functions once, then add_food, add_meal_entry,
+get_user_daily_nutrition and verify_login against seeded synthetic databases
+of 1k and 100k meal entries (10M with --sizes 10m; seeding that one takes a
+few minutes). Seeded databases are cached in --data-dir and reused. Each
+group's results are compared with its JSON baseline in benchmarks/baselines/,
+and the suite exits 1 when any operation regresses past its threshold.
+
+p50 is gated at --threshold, except for the writes (add_food, add_meal_entry),
+whose p50 gets the wider --write-threshold; p99 gets the looser --p99-threshold.
+The bench databases run with PRAGMA synchronous=OFF, so the writes time the SQL
+and triggers they run rather than fsync. The calculation functions take well
+under a microsecond, so they are timed in batches of CALC_BATCH calls and over
+CALC_ROUNDS rounds.
+
+Each operation is timed ROUNDS times, and each round sits between two runs of
+a fixed pure-Python calibration loop. The round whose p50 is lowest relative to
+its calibration is kept, with the lowest relative p99 of any round. The gate
+compares those ratios with the baseline's, so a slower or busier machine, or a
+slow spell mid-run, doesn't read as a regression.
+
+Baselines are still best recorded with --save on the machine that runs the
+gate. 10m has no checked-in baseline; record one locally to gate on it.
+
+Usage:
+    python benchmarks/bench_suite.py                        # calc, 1k and 100k against the baselines
+    python benchmarks/bench_suite.py --sizes 1k 100k 10m    # include the 10M-entry database
+    python benchmarks/bench_suite.py --save                 # record new baselines
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+# DB.py connects on import; keep it away from the real database
+_scratch = tempfile.mkdtemp(prefix='nutrition_bench_')
+os.environ['NUTRITION_DB_PATH'] = os.path.join(_scratch, 'scratch.db')
+
+import numpy as np
+
+import config
+import DB
+import nutrition_calculations as calc
+from seed_data import add_foods, add_meal_entries, add_users
+
+SIZES = {'1k': 1_000, '100k': 100_000, '10m': 10_000_000}
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+# Bump when seed() changes so cached databases are rebuilt
+SEED_VERSION = 1
+FOODS = 2000
+DAYS = 365
+ENTRIES_PER_USER = 100
+PASSWORD = 'benchpass'
+FIRST_DAY = date(2025, 1, 1)
+# Operations that commit: more run-to-run spread than reads even without fsync, so a wider p50 gate
+WRITES = {'add_food', 'add_meal_entry'}
+# Times each operation is measured; the best round (relative to its calibration) is kept
+ROUNDS = 5
+# Calculation calls timed per sample, and rounds per calculation function
+CALC_BATCH = 10
+CALC_ROUNDS = 20
+
+
+# ==================== SEEDING ====================
+
+def use_database(path):
+    """Point DB.py's connections at another database file"""
+    DB.close_connection()
+    config.DATABASE_PATH = path
+    DB.init_database()
+    # Throwaway data: time the statements and triggers, not the disk
+    DB.conn.execute('PRAGMA synchronous=OFF')
+
+
+def seed(path, entries, seed_value=0):
+    """Create a database with `entries` meal entries spread over DAYS days and entries/100 users"""
+    rng = random.Random(seed_value)
+    users = max(entries // ENTRIES_PER_USER, 10)
+    use_database(path)
+
+    add_users(DB.conn, range(1, users + 1), rng, password_hash=DB.hash_password(PASSWORD))
+    add_foods(DB.conn, FOODS, rng)
+    days = [(FIRST_DAY + timedelta(days=d)).isoformat() for d in range(DAYS)]
+    meal_types = ('breakfast', 'lunch', 'dinner', 'snack')
+    add_meal_entries(DB.conn, ((rng.randint(1, users), rng.randint(1, FOODS), rng.choice((0.5, 1, 1, 1.5, 2)),
+                                rng.choice(meal_types), rng.choice(days)) for _ in range(entries)))
+    DB.conn.commit()
+    DB.conn.execute('ANALYZE')
+    DB.conn.commit()
+    return users
+
+
+def open_seeded(size, data_dir):
+    """Use the cached database for a size, seeding it first if needed. Returns the user count."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'bench_{size}_v{SEED_VERSION}.db')
+    if not os.path.exists(path):
+        tmp_path = path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        start = time.perf_counter()
+        seed(tmp_path, SIZES[size])
+        DB.close_connection()
+        os.replace(tmp_path, path)
+        print(f"  seeded {SIZES[size]:,} meal entries in {time.perf_counter() - start:.1f}s -> {path}")
+    use_database(path)
+    DB.cursor.execute('SELECT COUNT(*) FROM users')
+    return DB.cursor.fetchone()[0]
+
+
+# ==================== TIMING ====================
+
+def time_calls(fn, args_list, warmup=10, batch=1):
+    """Per-call latencies (seconds) of fn(*args) over args_list, each averaged over a batch of calls"""
+    for args in args_list[:warmup]:
+        fn(*args)
+    samples = []
+    for i in range(0, len(args_list), batch):
+        chunk = args_list[i:i + batch]
+        start = time.perf_counter()
+        for args in chunk:
+            fn(*args)
+        samples.append((time.perf_counter() - start) / len(chunk))
+    return samples
+
+
+def calibrate(iterations=20_000, repeats=3):
+    """Best-of-repeats microseconds for a fixed pure-Python loop: how fast this machine is running right now"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        total = 0
+        for i in range(iterations):
+            total += i * i % 7
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def summarize(samples):
+    us = np.array(samples) * 1e6
+    return {'n': len(samples), 'p50_us': round(float(np.percentile(us, 50)), 2),
+            'p99_us': round(float(np.percentile(us, 99)), 2)}
+
+
+def measure(fn, args_list, rounds=ROUNDS, batch=1):
+    """
+    summarize() of the round of time_calls with the lowest p50 per calibration_us, measured around it.
+
+    p99 is likewise the lowest of all rounds, rescaled to that round's calibration: one
+    slow spell spoils a round's tail far more often than its median.
+    """
+    best = None
+    p99_per_cal = float('inf')
+    for _ in range(rounds):
+        before = calibrate()
+        result = summarize(time_calls(fn, args_list, batch=batch))
+        result['calibration_us'] = round(min(before, calibrate()), 1)
+        p99_per_cal = min(p99_per_cal, result['p99_us'] / result['calibration_us'])
+        if best is None or result['p50_us'] / result['calibration_us'] < best['p50_us'] / best['calibration_us']:
+            best = result
+    best['p99_us'] = round(p99_per_cal * best['calibration_us'], 2)
+    return best
+
+
+def run_calc(rng, n):
+    profiles = [(rng.uniform(100, 300), rng.uniform(58, 78), rng.randint(18, 80), rng.choice(['male', 'female']),
+                 rng.choice(['sedentary', 'light', 'moderate', 'active', 'very_active'])) for _ in range(n)]
+    days = [{'calories': rng.uniform(800, 4200), 'protein_g': rng.uniform(20, 200), 'carbs_g': rng.uniform(50, 400),
+             'fat_g': rng.uniform(10, 150)} for _ in range(n)]
+    goals = [{'goal_protein_g': rng.choice([0, 100, 150]), 'goal_macros_pct': [25, 50, 25]} for _ in range(n)]
+    micros = [{'sodium': rng.uniform(500, 4000), 'dietary_fiber': rng.uniform(5, 40)} for _ in range(n)]
+
+    # One call is too close to the timer's resolution, and a round lasts about a millisecond
+    timed = lambda fn, args_list: measure(fn, args_list, rounds=CALC_ROUNDS, batch=CALC_BATCH)
+
+    return {
+        'calculateBMR': timed(calc.calculateBMR, [p[:4] for p in profiles]),
+        'calculateTDEE': timed(calc.calculateTDEE, profiles),
+        'getMacros': timed(calc.getMacros, [(d['calories'], d['protein_g'], d['carbs_g'], d['fat_g']) for d in days]),
+        'getWeightChange': timed(calc.getWeightChange, [(rng.uniform(1500, 3500), d['calories']) for d in days]),
+        'checkDeficiencies': timed(calc.checkDeficiencies, list(zip(days, goals))),
+        'checkMicronutrients': timed(calc.checkMicronutrients, [(m,) for m in micros]),
+    }
+
+
+def run_db(rng, users, n):
+    day = lambda: (FIRST_DAY + timedelta(days=rng.randrange(DAYS))).isoformat()
+
+    results = {
+        'get_user_daily_nutrition': measure(
+            DB.get_user_daily_nutrition, [(rng.randint(1, users), day()) for _ in range(n)]),
+        'verify_login': measure(
+            DB.verify_login, [(f'user{rng.randint(1, users)}', PASSWORD) for _ in range(n)]),
+    }
+
+    # Writes commit, so fewer of them; rows added here are removed afterwards to keep the cached database reusable
+    writes = max(n // 5, 50)
+    DB.cursor.execute('SELECT COALESCE(MAX(id), 0) FROM foods')
+    max_food = DB.cursor.fetchone()[0]
+    DB.cursor.execute('SELECT COALESCE(MAX(id), 0) FROM meal_entries')
+    max_entry = DB.cursor.fetchone()[0]
+    try:
+        results['add_food'] = measure(
+            DB.add_food, [(f'bench food {i}', 1, 'serving', 250, 12, 30, 9) for i in range(writes)])
+        results['add_meal_entry'] = measure(
+            DB.add_meal_entry, [(rng.randint(1, users), f'food{rng.randint(1, FOODS)}', 1, 'lunch', 'manual', day())
+                                for _ in range(writes)])
+    finally:
+        DB.cursor.execute('DELETE FROM meal_entries WHERE id > ?', (max_entry,))
+        DB.cursor.execute('DELETE FROM foods WHERE id > ?', (max_food,))
+        DB.conn.commit()
+    return results
+
+
+# ==================== BASELINES ====================
+
+def baseline_path(group):
+    return os.path.join(BASELINE_DIR, f'{group}.json')
+
+
+def save_baseline(group, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    data = {'group': group, 'recorded': date.today().isoformat(), 'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version, 'ops': results}
+    with open(baseline_path(group), 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def regressed_by(current, expected, threshold, min_us):
+    """
+    Percent by which current exceeds expected, or None when it is within threshold.
+
+    Differences below min_us are timer noise, except that the floor shrinks to 10%
+    of expected for operations too fast for it to leave any room.
+    """
+    if current > expected * (1 + threshold) and current - expected > min(min_us, 0.1 * expected):
+        return (current / expected - 1) * 100
+    return None
+
+
+def compare(group, results, thresholds, min_us):
+    """
+    Print results against the stored baseline; return the names of regressed operations.
+
+    An operation regresses when its p50 or p99 is above the baseline's, scaled by the
+    ratio of the two runs' calibration times, by more than its threshold. thresholds
+    holds 'p50', 'write' (p50 of WRITES) and 'p99'.
+    """
+    try:
+        with open(baseline_path(group), encoding='utf-8') as f:
+            baseline = json.load(f)['ops']
+    except FileNotFoundError:
+        baseline = {}
+        print(f"  (no baseline for {group}; record one with --save)")
+
+    regressed = []
+    print(f"  {'operation':<26}{'p50 us':>10}{'base':>10}{'p99 us':>10}{'base':>10}{'speed':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        # > 1 when the machine ran slower than when the baseline was recorded
+        speed = current['calibration_us'] / base['calibration_us'] if base and base.get('calibration_us') else 1.0
+        status = ''
+        if base:
+            slow = []
+            p50_threshold = thresholds['write'] if name in WRITES else thresholds['p50']
+            for stat, threshold in (('p50', p50_threshold), ('p99', thresholds['p99'])):
+                pct = regressed_by(current[f'{stat}_us'], base[f'{stat}_us'] * speed, threshold, min_us)
+                if pct is not None:
+                    slow.append(f'{stat} +{pct:.0f}%')
+            if slow:
+                regressed.append(f'{group}/{name}')
+                status = f"  REGRESSED {', '.join(slow)}"
+        print(f"  {name:<26}{current['p50_us']:>10.2f}{base['p50_us'] if base else float('nan'):>10.2f}"
+              f"{current['p99_us']:>10.2f}{base['p99_us'] if base else float('nan'):>10.2f}{speed:>7.2f}x{status}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['1k', '100k'])
+    parser.add_argument('--no-calc', action='store_true', help='skip the calculation functions')
+    parser.add_argument('--calls', type=int, default=2000, help='calls per read operation and per calc function')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'nutrition_bench'),
+                        help='where seeded databases are cached')
+    parser.add_argument('--save', action='store_true', help='write results as the new baselines instead of comparing')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed p50 slowdown after calibration (0.25 = 25%%)')
+    parser.add_argument('--write-threshold', type=float, default=0.5,
+                        help='allowed p50 slowdown of add_food and add_meal_entry')
+    parser.add_argument('--p99-threshold', type=float, default=1.0,
+                        help='allowed p99 slowdown after calibration')
+    parser.add_argument('--min-us', type=float, default=2.0,
+                        help='ignore slowdowns smaller than this many microseconds, or 10%% of a faster operation')
+    args = parser.parse_args()
+
+    groups = [] if args.no_calc else ['calc']
+    groups += args.sizes
+    regressed = []
+    for group in groups:
+        rng = random.Random(42)
+        print(f"\n[{group}]")
+        if group == 'calc':
+            results = run_calc(rng, args.calls)
+        else:
+            users = open_seeded(group, args.data_dir)
+            results = run_db(rng, users, args.calls)
+
+        thresholds = {'p50': args.threshold, 'write': args.write_threshold, 'p99': args.p99_threshold}
+        slow = compare(group, results, thresholds, args.min_us)
+        if args.save:
+            save_baseline(group, results)
+            print(f"  saved {baseline_path(group)}")
+        else:
+            regressed += slow
+
+    DB.close_connection()
+    if regressed:
+        print(f"\n❌ {len(regressed)} regression(s): {', '.join(regressed)}")
+        sys.exit(1)
+    if not args.save:
+        print("\n✅ No regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Latency of weight_projection for one user and throughput for whole cohorts.
+
+Times a 52-week projection for a single user (the per-request cost of
+/api/projection) and for cohorts of random profiles, and checks the
+trajectories against the calculateTDEE-based reference loop.
+
+Usage:
+    python benchmarks/bench_weight_projection.py [--weeks 52] [--cohorts 1000 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import weight_projection
+from nutrition_batch import ACTIVITY_MULTIPLIERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--cohorts', type=int, nargs='+', default=[1000, 100000])
+    args = parser.parse_args()
+
+    single = lambda: weight_projection.project_weights(180.0, 70.0, 30, 'male', 'moderate', 2200.0, 350.0, 21,
+                                                       args.weeks)
+    scalar = lambda: weight_projection.project_scalar(180.0, 70.0, 30, 'male', 'moderate', 2200.0, args.weeks)
+    runs = 500
+    t_single = min(timeit.repeat(single, number=runs, repeat=5)) / runs
+    t_scalar = min(timeit.repeat(scalar, number=runs, repeat=5)) / runs
+    print(f"Single user, {args.weeks} weeks: {t_single * 1e6:,.0f} us with bands "
+          f"(calculateTDEE loop without bands: {t_scalar * 1e6:,.0f} us)")
+
+    rng = np.random.default_rng(0)
+    print(f"\n{'users':>10}{'seconds':>10}{'users/s':>14}")
+    for n in args.cohorts:
+        cohort = (rng.uniform(100, 320, n), rng.uniform(58, 78, n), rng.integers(18, 80, n),
+                  rng.choice(['male', 'female'], n).tolist(), rng.choice(list(ACTIVITY_MULTIPLIERS), n).tolist(),
+                  rng.uniform(1200, 4000, n), rng.uniform(0, 600, n), rng.integers(1, 29, n))
+        start = time.perf_counter()
+        weight_projection.project_weights(*cohort, weeks=args.weeks)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>10,}{elapsed:>10.3f}{n / elapsed:>14,.0f}")
+
+    mismatches = weight_projection.verify_against_scalar(weeks=args.weeks)
+    print(f"\nTrajectories vs. calculateTDEE loop: {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,438 @@
+"""
+Replayable load tests: synthesize or record an API request mix as JSONL, then replay it.
+
+    python benchmarks/load_harness.py synthesize mix.jsonl --requests 5000 --rate 100
+    REQUEST_RECORD_PATH=recorded.jsonl python app.py      # or record real traffic (traffic_recorder.py)
+    python benchmarks/load_harness.py replay mix.jsonl --server gunicorn --concurrency 32
+
+Each line is one request: {"t": seconds from start, "endpoint": "GET /api/users/<int:user_id>",
+"method": "GET", "path": "/api/users/3", "json": {...}} (recordings carry "ts", a
+wall-clock time, instead of "t"; uploads carry {"upload": "file"} and send
+--receipt-image). Synthesized mixes follow MIX: logins, meal logging, daily reads,
+Purdue lookups and the occasional receipt upload, from users picked with a long
+tail so some are much busier than others.
+
+Replay seeds a temporary database (users user1..N with password LOAD_PASSWORD,
+profiles, goals, foods food1..food300 and a week of meals), starts
+upstream_mock.py and the chosen server pointed at both, and sends the requests
+from --concurrency keep-alive connections: at the recorded times (scaled by
+--speed), at --rate Poisson arrivals per second, or with --speed 0 as fast as the
+connections allow. Each connection comes from its own loopback address
+(127.0.1.N), so rate limiting sees them as separate clients. Latency is measured from each request's scheduled time, so
+waiting for a free connection counts. Reports throughput, p50/p90/p99/max latency
+and error rates per endpoint: errors are 5xx and failed connections, rejected are
+rate limiting's 429/503, and 4xx are the other client errors (unknown users or
+foods in a recording, Purdue items not on the menu).
+
+Usage:
+    python benchmarks/load_harness.py synthesize OUT [--requests 5000] [--users 200] [--rate 100] [--seed 0]
+    python benchmarks/load_harness.py replay MIX [--server flask-dev|gunicorn|asgi] [--concurrency 32]
+                                             [--rate N | --speed 1] [--duration S] [--upstream-latency 0.05]
+                                             [--no-rate-limit] [--report report.json]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import queue
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import upstream_mock
+
+LOAD_PASSWORD = 'loadpass'
+FOODS = 300
+RECEIPT_IMAGE = os.path.join(ROOT, 'benchmarks', 'synthetic_receipt.png')  # from synthetic_receipt.py
+
+# Share of synthesized requests per kind
+MIX = {
+    'login': 5,
+    'meals_read': 28,
+    'dashboard': 18,
+    'profile': 7,
+    'meal_log': 15,
+    'entries': 5,
+    'purdue_menu': 6,
+    'purdue_nutrition': 12,
+    'receipt': 4,
+}
+
+
+# ==================== SYNTHESIS ====================
+
+def synthesize_request(kind, user_id, day, rng):
+    """(endpoint, path, extra record fields) for one request of a MIX kind"""
+    if kind == 'login':
+        return 'POST /api/login', '/api/login', {'json': {'username': f'user{user_id}', 'password': None}}
+    if kind == 'meals_read':
+        return 'GET /api/meals/<int:user_id>/<date_str>', f'/api/meals/{user_id}/{day}', {}
+    if kind == 'dashboard':
+        return 'GET /api/dashboard/<int:user_id>/<date_str>', f'/api/dashboard/{user_id}/{day}', {}
+    if kind == 'profile':
+        return 'GET /api/users/<int:user_id>', f'/api/users/{user_id}', {}
+    if kind == 'meal_log':
+        body = {'user_id': user_id, 'food_name': f'food{rng.randint(1, FOODS)}',
+                'quantity_servings': rng.choice((0.5, 1, 1, 1, 1.5, 2)),
+                'meal_type': rng.choice(('breakfast', 'lunch', 'dinner', 'snack')), 'source': 'manual',
+                'entry_date': day}
+        return 'POST /api/meals', '/api/meals', {'json': body}
+    if kind == 'entries':
+        return 'GET /api/meals/<int:user_id>/entries', f'/api/meals/{user_id}/entries?limit=50', {}
+    if kind == 'purdue_menu':
+        return 'GET /api/purdue/menu/<date_str>', f'/api/purdue/menu/{day}', {}
+    if kind == 'purdue_nutrition':
+        # Popular items most of the time, and now and then something the dining halls don't serve
+        if rng.random() < 0.05:
+            name = f'Mystery Dish {rng.randint(1, 1000)}'
+        else:
+            name = upstream_mock.MENU_ITEMS[min(int(rng.expovariate(0.15)), len(upstream_mock.MENU_ITEMS) - 1)]
+        return 'GET /api/purdue/nutrition/<food_name>', f'/api/purdue/nutrition/{name.replace(" ", "%20")}', {}
+    if kind == 'receipt':
+        return 'POST /api/receipt/process', '/api/receipt/process', {'upload': 'file'}
+    raise ValueError(f'Unknown request kind: {kind}')
+
+
+def synthesize(count, users, rate, day, seed_value):
+    """count request records arriving at rate per second (Poisson), from users with Zipf-like activity"""
+    rng = random.Random(seed_value)
+    kinds, weights = zip(*MIX.items())
+    user_ids = list(range(1, users + 1))
+    user_weights = list(itertools.accumulate(1 / rank ** 0.8 for rank in user_ids))
+    rng.shuffle(user_ids)  # the busiest users aren't simply the lowest ids
+    t = 0.0
+    for _ in range(count):
+        t += rng.expovariate(rate)
+        user_id = rng.choices(user_ids, cum_weights=user_weights)[0]
+        endpoint, path, extra = synthesize_request(rng.choices(kinds, weights)[0], user_id, day, rng)
+        yield dict({'t': round(t, 4), 'endpoint': endpoint, 'method': endpoint.split()[0], 'path': path}, **extra)
+
+
+def load_records(path):
+    """Records from a synthesized or recorded JSONL file, with "t" relative to the first request"""
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if records and 't' not in records[0]:
+        start = min(record['ts'] for record in records)
+        for record in records:
+            record['t'] = record['ts'] - start
+        records.sort(key=lambda record: record['t'])
+    return records
+
+
+def max_user_id(records):
+    ids = [int(m.group(1)) for record in records for m in [re.search(r'/(\d+)(?:/|\?|$)', record['path'])] if m]
+    ids += [record['json']['user_id'] for record in records
+            if isinstance(record.get('json'), dict) and isinstance(record['json'].get('user_id'), int)]
+    return max(ids, default=1)
+
+
+# ==================== SERVERS ====================
+
+def seed(db_path, users, today):
+    """Create the database in a child interpreter so this process never holds a connection to it"""
+    script = f'''
+import random
+import DB
+rng = random.Random(0)
+password_hash = DB.hash_password({LOAD_PASSWORD!r})
+cur = DB.conn.cursor()
+cur.executemany("""INSERT INTO users (id, username, password_hash, weight_lbs, sex, activity_level, height_inches, age)
+                   VALUES (?, ?, ?, ?, ?, 'moderate', ?, ?)""",
+                ((i, f"user{{i}}", password_hash, rng.randint(120, 240), rng.choice(["male", "female"]),
+                  rng.randint(60, 76), rng.randint(18, 65)) for i in range(1, {users} + 1)))
+cur.executemany("""INSERT INTO user_goals (user_id, goal_weight_change_lbs_per_week, goal_protein_g,
+                                           goal_protein_pct, goal_carbs_pct, goal_fat_pct)
+                   VALUES (?, -0.5, 120, 30, 40, 30)""", ((i,) for i in range(1, {users} + 1)))
+cur.executemany("""INSERT INTO foods (id, name, serving_size_value, serving_size_unit, calories_per_serving,
+                                      protein_g_per_serving, carbs_g_per_serving, fat_g_per_serving)
+                   VALUES (?, ?, 1, 'serving', ?, ?, ?, ?)""",
+                ((f, f"food{{f}}", rng.randint(100, 800), rng.randint(2, 50), rng.randint(0, 90), rng.randint(0, 40))
+                 for f in range(1, {FOODS} + 1)))
+cur.executemany("""INSERT INTO meal_entries (user_id, food_id, quantity_servings, meal_type, source, entry_date)
+                   VALUES (?, ?, 1, 'lunch', 'manual', date(?, ?))""",
+                ((u, rng.randint(1, {FOODS}), "{today.isoformat()}", f"-{{d}} days")
+                 for u in range(1, {users} + 1) for d in range(1, 8) for _ in range(rng.randint(1, 4))))
+DB.conn.commit()
+'''
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=dict(os.environ, NUTRITION_DB_PATH=db_path),
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, env, args, log):
+    if kind == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    elif kind == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(args.workers), '--log-level', 'warning']
+    else:
+        command = [sys.executable, 'app.py']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{kind} exited with {process.returncode} (log: {log.name})')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{kind} did not start within 30s (log: {log.name})')
+
+
+# ==================== REPLAY ====================
+
+def multipart(field, filename, data):
+    boundary = f'loadharness{random.getrandbits(64):x}'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def encode_request(record, receipt_image):
+    """(body bytes or None, headers) to send for a record"""
+    if 'upload' in record:
+        body, content_type = multipart(record['upload'], 'receipt.jpg', receipt_image)
+        return body, {'Content-Type': content_type}
+    if 'json' in record:
+        payload = record['json']
+        if isinstance(payload, dict) and 'password' in payload and payload['password'] is None:
+            payload = dict(payload, password=LOAD_PASSWORD)
+        return json.dumps(payload).encode(), {'Content-Type': 'application/json'}
+    return None, {}
+
+
+def connect(port, index):
+    """Keep-alive connection from loopback address 127.0.1.<index + 1>, or 127.0.0.1 where only that one exists"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60,
+                                            source_address=(f'127.0.{1 + index // 254}.{1 + index % 254}', 0))
+    try:
+        connection.connect()
+    except OSError:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    return connection
+
+
+def client(port, index, jobs, results, receipt_image):
+    connection = connect(port, index)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        scheduled, record = job
+        scheduled = scheduled or time.perf_counter()
+        body, headers = encode_request(record, receipt_image)
+        outcome = None
+        for attempt in range(2):
+            try:
+                connection.request(record['method'], record['path'], body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                outcome = response.status
+                break
+            except (OSError, http.client.HTTPException) as e:
+                # Like a browser, retry once on a new connection when a kept-alive one was closed
+                connection.close()
+                connection = connect(port, index)
+                outcome = type(e).__name__
+        results.append((record['endpoint'], time.perf_counter() - scheduled, outcome))
+    connection.close()
+
+
+def replay(port, records, args, receipt_image):
+    """Send records; returns [(endpoint, latency seconds, status or exception name)] and the elapsed time"""
+    jobs = queue.Queue()
+    results = []
+    clients = [threading.Thread(target=client, args=(port, index, jobs, results, receipt_image))
+               for index in range(args.concurrency)]
+    for thread in clients:
+        thread.start()
+
+    start = time.perf_counter()
+    if args.rate:
+        rng = random.Random(1)
+        at = 0.0
+        times = []
+        for _ in records:
+            at += rng.expovariate(args.rate)
+            times.append(at)
+    elif args.speed:
+        times = [record['t'] / args.speed for record in records]
+    else:
+        times = None
+
+    for i, record in enumerate(records):
+        if times is None:
+            jobs.put((None, record))
+            continue
+        if args.duration and times[i] > args.duration:
+            break
+        delay = start + times[i] - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        jobs.put((start + times[i], record))
+    for _ in clients:
+        jobs.put(None)
+    for thread in clients:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    """Per-endpoint (and 'all') throughput, latency percentiles and error counts"""
+    by_endpoint = defaultdict(list)
+    for endpoint, latency, outcome in results:
+        by_endpoint[endpoint].append((latency, outcome))
+        by_endpoint['all'].append((latency, outcome))
+
+    report = {}
+    for endpoint, samples in sorted(by_endpoint.items(), key=lambda item: (item[0] == 'all', -len(item[1]))):
+        ms = np.array([latency for latency, _ in samples]) * 1000
+        outcomes = [outcome for _, outcome in samples]
+        statuses = defaultdict(int)
+        for outcome in outcomes:
+            statuses[str(outcome)] += 1
+        errors = sum(1 for o in outcomes if not isinstance(o, int) or o >= 500 and o != 503)
+        rejected = sum(1 for o in outcomes if o in (429, 503))
+        client_errors = sum(1 for o in outcomes if isinstance(o, int) and 400 <= o < 500 and o != 429)
+        report[endpoint] = {
+            'requests': len(samples),
+            'rps': round(len(samples) / elapsed, 1),
+            'p50_ms': round(float(np.percentile(ms, 50)), 2),
+            'p90_ms': round(float(np.percentile(ms, 90)), 2),
+            'p99_ms': round(float(np.percentile(ms, 99)), 2),
+            'max_ms': round(float(ms.max()), 2),
+            'error_rate': round(errors / len(samples), 4),
+            'rejected_rate': round(rejected / len(samples), 4),
+            'client_error_rate': round(client_errors / len(samples), 4),
+            'statuses': dict(statuses),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{'endpoint':<46}{'reqs':>7}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+          f"{'errors':>8}{'rejected':>9}{'4xx':>7}")
+    for endpoint, row in report.items():
+        if endpoint == 'all':
+            print('-' * 121)
+        print(f"{endpoint:<46}{row['requests']:>7}{row['rps']:>8.1f}{row['p50_ms']:>9.2f}{row['p90_ms']:>9.2f}"
+              f"{row['p99_ms']:>9.2f}{row['max_ms']:>9.1f}{row['error_rate']:>8.1%}{row['rejected_rate']:>9.1%}"
+              f"{row['client_error_rate']:>7.1%}")
+
+
+def run_replay(args):
+    records = load_records(args.mix)
+    if args.limit:
+        records = records[:args.limit]
+    users = args.users or max_user_id(records)
+    with open(args.receipt_image, 'rb') as f:
+        receipt_image = f.read()
+
+    servers = {'gunicorn': 'gunicorn', 'asgi': 'uvicorn'}
+    if args.server in servers:
+        try:
+            __import__(servers[args.server])
+        except ImportError:
+            sys.exit(f"{servers[args.server]} is not installed (pip install {servers[args.server]})")
+
+    mock = upstream_mock.start(latency=args.upstream_latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'load.db')
+        seed(db_path, users, date.today())
+        port = free_port()
+        env = dict(os.environ, NUTRITION_DB_PATH=db_path, SERVER_HOST='127.0.0.1', SERVER_PORT=str(port),
+                   SERVER_DEBUG='0', SERVER_WORKERS=str(args.workers), SERVER_THREADS=str(args.threads),
+                   SERVER_ACCESS_LOG='', RATE_LIMIT_ENABLED='0' if args.no_rate_limit else '1',
+                   REQUEST_RECORD_PATH='', **mock.base_urls)
+        pacing = (f'{args.rate:g} req/s' if args.rate else
+                  f'recorded timing x{args.speed:g}' if args.speed else 'closed loop')
+        print(f"{len(records)} requests, {users} users, {args.server}, {args.concurrency} connections, {pacing}; "
+              f"upstream latency {args.upstream_latency * 1000:g} ms\n")
+
+        with open(os.path.join(tmp, 'server.log'), 'w') as log:
+            process = start_server(args.server, port, env, args, log)
+            try:
+                results, elapsed = replay(port, records, args, receipt_image)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+        mock.shutdown()
+
+        report = summarize(results, elapsed)
+        print_report(report)
+        print(f"\n{elapsed:.1f}s; upstream calls: {dict(mock.hits)}")
+        if report['all']['error_rate']:
+            with open(log.name) as f:
+                tail = f.read()[-2000:]
+            print(f"server log tail:\n{tail}")
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump({'elapsed_s': round(elapsed, 2), 'server': args.server, 'endpoints': report}, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    synth = commands.add_parser('synthesize', help='write a synthetic request mix')
+    synth.add_argument('out')
+    synth.add_argument('--requests', type=int, default=5000)
+    synth.add_argument('--users', type=int, default=200)
+    synth.add_argument('--rate', type=float, default=100, help='mean arrivals per second')
+    synth.add_argument('--date', default=date.today().isoformat(), help='day the users log and read (YYYY-MM-DD)')
+    synth.add_argument('--seed', type=int, default=0)
+
+    play = commands.add_parser('replay', help='replay a mix against a server')
+    play.add_argument('mix')
+    play.add_argument('--server', choices=('flask-dev', 'gunicorn', 'asgi'), default='gunicorn')
+    play.add_argument('--concurrency', type=int, default=32, help='keep-alive client connections')
+    play.add_argument('--rate', type=float, help='Poisson arrivals per second instead of the recorded timing')
+    play.add_argument('--speed', type=float, default=1.0, help='recorded timing speed-up; 0 for closed loop')
+    play.add_argument('--duration', type=float, help='stop scheduling after this many seconds')
+    play.add_argument('--limit', type=int, help='replay only the first N requests')
+    play.add_argument('--users', type=int, help='users to seed (default: the highest user id in the mix)')
+    play.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='gunicorn/uvicorn processes')
+    play.add_argument('--threads', type=int, default=4, help='threads per process')
+    play.add_argument('--upstream-latency', type=float, default=0.05, help='seconds the HFS/nutrition mock takes')
+    play.add_argument('--receipt-image', default=RECEIPT_IMAGE)
+    play.add_argument('--no-rate-limit', action='store_true', help='disable rate limiting and load shedding')
+    play.add_argument('--report', help='also write the report as JSON here')
+    args = parser.parse_args()
+
+    if args.command == 'synthesize':
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for record in synthesize(args.requests, args.users, args.rate, args.date, args.seed):
+                f.write(json.dumps(record) + '\n')
+        print(f"wrote {args.requests} requests to {args.out}")
+    else:
+        run_replay(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Bulk inserts of synthetic rows for the benchmarks' temporary databases.
+
+Users are user1..N, foods are food1..N with random per-serving macros, and
+meal entries are logged as 'manual'. Each benchmark decides how many of each,
+and over which days; nothing here commits.
+
+Usage (from a benchmark, with DB.py already imported):
+    from seed_data import add_users, add_goals, add_foods, add_meal_entries
+    add_users(DB.conn, range(1, users + 1), rng)
+    DB.conn.commit()
+"""
+
+ACTIVITY_LEVELS = ('sedentary', 'light', 'moderate', 'active', 'very_active')
+
+
+def add_users(conn, user_ids, rng=None, password_hash='x'):
+    """Insert users named user<id>; with rng, each gets a random weight, sex, activity level, height and age"""
+    if rng is None:
+        conn.executemany('INSERT INTO users (id, username, password_hash) VALUES (?, ?, ?)',
+                         ((i, f'user{i}', password_hash) for i in user_ids))
+        return
+    conn.executemany(
+        '''INSERT INTO users (id, username, password_hash, weight_lbs, sex, activity_level, height_inches, age)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+        ((i, f'user{i}', password_hash, rng.randint(110, 260), rng.choice(['male', 'female']),
+          rng.choice(ACTIVITY_LEVELS), rng.randint(60, 76), rng.randint(18, 70)) for i in user_ids)
+    )
+
+
+def add_goals(conn, rows):
+    """Insert goals from (user_id, weight_change_lbs_per_week, protein_g, protein_pct, carbs_pct, fat_pct) rows"""
+    conn.executemany(
+        '''INSERT INTO user_goals (user_id, goal_weight_change_lbs_per_week, goal_protein_g,
+                                   goal_protein_pct, goal_carbs_pct, goal_fat_pct)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        rows
+    )
+
+
+def add_foods(conn, count, rng):
+    """Insert foods food1..food<count> (1 serving each) with random macros; existing ids are left alone"""
+    conn.executemany(
+        '''INSERT OR IGNORE INTO foods (id, name, serving_size_value, serving_size_unit, calories_per_serving,
+                                        protein_g_per_serving, carbs_g_per_serving, fat_g_per_serving)
+           VALUES (?, ?, 1, 'serving', ?, ?, ?, ?)''',
+        ((f, f'food{f}', rng.randint(50, 700), rng.randint(0, 50), rng.randint(0, 90), rng.randint(0, 40))
+         for f in range(1, count + 1))
+    )
+
+
+def add_meal_entries(conn, rows):
+    """Insert manual meal entries from (user_id, food_id, quantity_servings, meal_type, entry_date) rows"""
+    conn.executemany(
+        '''INSERT INTO meal_entries (user_id, food_id, quantity_servings, meal_type, source, entry_date)
+           VALUES (?, ?, ?, ?, 'manual', ?)''',
+        rows
+    )
@@ -0,0 +1,105 @@
+"""
+Render a synthetic grocery receipt to a PNG, the default upload for load_harness.py.
+
+The text is the synthetic_grocery_walmart receipt from receipt_corpus.json,
+drawn in a built-in 5x7 bitmap font, dark on white, so OCR has real lines to
+read and the receipt pipeline goes on to its nutrition lookups. Only the
+standard library is needed; the output is checked in as synthetic_receipt.png.
+
+Usage:
+    python benchmarks/synthetic_receipt.py [--out benchmarks/synthetic_receipt.png] [--scale 4]
+"""
+
+import argparse
+import os
+import struct
+import zlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUT = os.path.join(HERE, 'synthetic_receipt.png')
+
+TEXT = """WALMART
+SAVE MONEY. LIVE BETTER.
+ST# 01234 OP# 009 TE# 12 TR# 04567
+
+ORG BNNA 0.99 N
+GV WHL MLK 1 GAL 3.48 F
+2 @ 3.48
+GV LG EGGS 2.97 F
+BNLS CHKN BRST 2.51 LB 8.76 N
+STRWB 3.97 F
+
+SUBTOTAL 20.17
+TAX 1 7.000 % 0.34
+TOTAL 20.51
+VISA TEND 20.51
+CHANGE DUE 0.00"""
+
+# 5x7 glyphs, one 5-bit row per entry, most significant bit on the left
+FONT = {
+    'A': (0x0E, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11), 'B': (0x1E, 0x11, 0x11, 0x1E, 0x11, 0x11, 0x1E),
+    'C': (0x0E, 0x11, 0x10, 0x10, 0x10, 0x11, 0x0E), 'D': (0x1E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x1E),
+    'E': (0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x1F), 'F': (0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x10),
+    'G': (0x0E, 0x11, 0x10, 0x17, 0x11, 0x11, 0x0F), 'H': (0x11, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11),
+    'I': (0x0E, 0x04, 0x04, 0x04, 0x04, 0x04, 0x0E), 'J': (0x07, 0x02, 0x02, 0x02, 0x02, 0x12, 0x0C),
+    'K': (0x11, 0x12, 0x14, 0x18, 0x14, 0x12, 0x11), 'L': (0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x1F),
+    'M': (0x11, 0x1B, 0x15, 0x15, 0x11, 0x11, 0x11), 'N': (0x11, 0x11, 0x19, 0x15, 0x13, 0x11, 0x11),
+    'O': (0x0E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E), 'P': (0x1E, 0x11, 0x11, 0x1E, 0x10, 0x10, 0x10),
+    'Q': (0x0E, 0x11, 0x11, 0x11, 0x15, 0x12, 0x0D), 'R': (0x1E, 0x11, 0x11, 0x1E, 0x14, 0x12, 0x11),
+    'S': (0x0F, 0x10, 0x10, 0x0E, 0x01, 0x01, 0x1E), 'T': (0x1F, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04),
+    'U': (0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E), 'V': (0x11, 0x11, 0x11, 0x11, 0x11, 0x0A, 0x04),
+    'W': (0x11, 0x11, 0x11, 0x15, 0x15, 0x15, 0x0A), 'X': (0x11, 0x11, 0x0A, 0x04, 0x0A, 0x11, 0x11),
+    'Y': (0x11, 0x11, 0x11, 0x0A, 0x04, 0x04, 0x04), 'Z': (0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x1F),
+    '0': (0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E), '1': (0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E),
+    '2': (0x0E, 0x11, 0x01, 0x02, 0x04, 0x08, 0x1F), '3': (0x1F, 0x02, 0x04, 0x02, 0x01, 0x11, 0x0E),
+    '4': (0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02), '5': (0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E),
+    '6': (0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E), '7': (0x1F, 0x01, 0x02, 0x04, 0x08, 0x08, 0x08),
+    '8': (0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E), '9': (0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C),
+    '.': (0x00, 0x00, 0x00, 0x00, 0x00, 0x0C, 0x0C), '#': (0x0A, 0x0A, 0x1F, 0x0A, 0x1F, 0x0A, 0x0A),
+    '@': (0x0E, 0x11, 0x17, 0x15, 0x17, 0x10, 0x0E), '%': (0x18, 0x19, 0x02, 0x04, 0x08, 0x13, 0x03),
+    ' ': (0x00,) * 7,
+}
+CELL_W, CELL_H = 6, 10  # glyph plus spacing
+MARGIN = 2  # cells
+
+
+def render(text, scale):
+    """Grayscale pixel rows (bytes, 0 = ink, 255 = paper) for text"""
+    lines = text.upper().splitlines()
+    columns = max(len(line) for line in lines) + 2 * MARGIN
+    width, height = columns * CELL_W * scale, (len(lines) + 2 * MARGIN) * CELL_H * scale
+    pixels = [bytearray(b'\xff' * width) for _ in range(height)]
+    for row, line in enumerate(lines, MARGIN):
+        for column, char in enumerate(line, MARGIN):
+            for y, bits in enumerate(FONT[char]):
+                for x in range(5):
+                    if bits & (0x10 >> x):
+                        left, top = (column * CELL_W + x) * scale, (row * CELL_H + y) * scale
+                        for line_pixels in pixels[top:top + scale]:
+                            line_pixels[left:left + scale] = b'\x00' * scale
+    return width, height, pixels
+
+
+def png(width, height, pixels):
+    """8-bit grayscale PNG file contents"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    raw = b''.join(b'\x00' + bytes(row) for row in pixels)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw, 9)) + chunk(b'IEND', b''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--out', default=OUT)
+    parser.add_argument('--scale', type=int, default=4, help='pixels per font dot')
+    args = parser.parse_args()
+
+    data = png(*render(TEXT, args.scale))
+    with open(args.out, 'wb') as f:
+        f.write(data)
+    print(f"Wrote {args.out} ({len(data):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Local stand-in for the HFS menu API and nutritionvalue.org.
+
+Serves both from one port with a fixed, made-up menu and answers after
+--latency seconds, so load tests exercise the Purdue and receipt lookup
+paths without touching the real services. Point the app at it with:
+
+    HFS_API_BASE=http://127.0.0.1:8911/menus/v2 NUTRITIONVALUE_BASE=http://127.0.0.1:8911
+
+Usage:
+    python benchmarks/upstream_mock.py [--port 8911] [--latency 0.05]
+
+benchmarks/load_harness.py starts one in-process with start().
+"""
+
+import argparse
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+DINING_HALLS = ('Wiley', 'Ford', 'Earhart', 'Windsor', 'Hillenbrand')
+MEALS = ('Breakfast', 'Lunch', 'Dinner')
+STATIONS = ('Grill', 'Deli', 'Pasta', 'Salad Bar')
+MENU_ITEMS = tuple(f'{dish} {kind}' for dish in ('Grilled', 'Roasted', 'Baked', 'Spicy', 'Garlic', 'Honey')
+                   for kind in ('Chicken', 'Tofu', 'Salmon', 'Turkey', 'Vegetables', 'Rice', 'Pasta', 'Potatoes'))
+
+
+def item_nutrition(name):
+    """Deterministic HFS item response for a menu item name"""
+    h = zlib.crc32(name.encode())
+    protein, carbs, fat = 5 + h % 35, 10 + (h >> 8) % 60, 2 + (h >> 16) % 25
+    return {
+        'Name': name,
+        'Calories': protein * 4 + carbs * 4 + fat * 9,
+        'Protein': protein,
+        'Carbohydrates': carbs,
+        'TotalFat': fat,
+        'Nutrition': [
+            {'Name': 'Sodium', 'Value': 100 + h % 700},
+            {'Name': 'Dietary Fiber', 'Value': h % 9},
+            {'Name': 'Sugar', 'Value': (h >> 4) % 20},
+        ],
+    }
+
+
+def hall_menu(location):
+    """The same items every day: each hall serves a rotating slice of MENU_ITEMS"""
+    offset = DINING_HALLS.index(location) * 5 if location in DINING_HALLS else 0
+    return {'Location': location, 'Meals': [
+        {'Name': meal, 'Stations': [
+            {'Name': station, 'Items': [{'Name': MENU_ITEMS[(offset + m * 7 + s * 3 + i) % len(MENU_ITEMS)]}
+                                        for i in range(3)]}
+            for s, station in enumerate(STATIONS)
+        ]}
+        for m, meal in enumerate(MEALS)
+    ]}
+
+
+def food_page(name):
+    """nutritionvalue.org food page with the table rows upstream.parse_nutritionvalue_food reads"""
+    data = item_nutrition(name)
+    rows = (('Calories', data['Calories']), ('Protein', data['Protein']),
+            ('Carbohydrate', data['Carbohydrates']), ('Total Fat', data['TotalFat']))
+    cells = ''.join(f'<tr><td>{label}</td><td>{value} g</td></tr>' for label, value in rows)
+    return f'<html><body><h1>{name}</h1><table>{cells}</table></body></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, as the real services allow
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        time.sleep(self.server.latency)
+
+        if parts[:2] == ['menus', 'v2']:
+            kind = 'hfs'
+            if parts[2:] == ['locations']:
+                status, body = 200, {'Location': [{'Location': hall} for hall in DINING_HALLS]}
+            elif len(parts) == 5 and parts[2] == 'locations':
+                status, body = 200, hall_menu(parts[3])
+            elif len(parts) == 4 and parts[2] == 'items' and parts[3] in MENU_ITEMS:
+                status, body = 200, item_nutrition(parts[3])
+            else:
+                status, body = 404, {'error': 'not found'}
+            self.reply(kind, status, 'application/json', json.dumps(body))
+        elif url.path == '/search.php':
+            query = parse_qs(url.query).get('food_query', [''])[0]
+            link = f'<a href="/foods/{quote(query)}.html">{query}</a>' if query else ''
+            self.reply('nutritionvalue', 200, 'text/html', f'<html><body>{link}</body></html>')
+        elif len(parts) == 2 and parts[0] == 'foods' and parts[1].endswith('.html'):
+            self.reply('nutritionvalue', 200, 'text/html', food_page(parts[1][:-len('.html')]))
+        else:
+            self.reply('unknown', 404, 'text/plain', 'not found')
+
+    def reply(self, kind, status, content_type, text):
+        body = text.encode()
+        with self.server.lock:
+            self.server.hits[kind] += 1
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, latency):
+        super().__init__(address, Handler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.hits = Counter()
+
+    @property
+    def base_urls(self):
+        """Environment for the app: HFS_API_BASE and NUTRITIONVALUE_BASE pointing here"""
+        host, port = self.server_address[:2]
+        return {'HFS_API_BASE': f'http://{host}:{port}/menus/v2', 'NUTRITIONVALUE_BASE': f'http://{host}:{port}'}
+
+
+def start(port=0, latency=0.05):
+    """Serve on a background thread; returns the MockServer (call shutdown() to stop)"""
+    server = MockServer(('127.0.0.1', port), latency)
+    threading.Thread(target=server.serve_forever, name='upstream-mock', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8911)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds before each response')
+    args = parser.parse_args()
+
+    server = MockServer(('127.0.0.1', args.port), args.latency)
+    for name, value in server.base_urls.items():
+        print(f'{name}={value}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
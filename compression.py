@@ -0,0 +1,126 @@
+"""
+gzip / brotli response compression, negotiated from Accept-Encoding.
+
+Registered as an after_request hook by init_app(). A response is compressed
+when it is a complete (non-streamed) 200-class body of a text type, at least
+COMPRESSION_MIN_BYTES long, and the client accepts br (when the optional
+brotli package is installed) or gzip. Compressed bodies of responses with a
+strong ETag are cached by (ETag, encoding), since the ETag already pins the
+content; their ETag is sent weak (W/"...") as the compressed bytes differ
+from the identity representation, which If-None-Match still matches.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/html', 'text/plain',
+                      'text/css', 'application/javascript'}
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+_cache = OrderedDict()  # (etag, encoding) -> compressed body
+_lock = threading.Lock()
+_stats = {'compressed': 0, 'cache_hits': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+
+def compress(data, encoding):
+    """Compress bytes with 'br' or 'gzip' at the configured level"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _compressed(data, encoding, etag):
+    if not etag or etag.startswith('W/'):
+        return compress(data, encoding)
+
+    key = (etag, encoding)
+    with _lock:
+        body = _cache.get(key)
+        if body is not None:
+            _cache.move_to_end(key)
+            _stats['cache_hits'] += 1
+            return body
+    body = compress(data, encoding)
+    with _lock:
+        _cache[key] = body
+        while len(_cache) > config.COMPRESSION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return body
+
+
+def compress_response(response):
+    """after_request hook: compress the response in place when worthwhile"""
+    if (not config.COMPRESSION_ENABLED or not 200 <= response.status_code < 300 or response.status_code in (204, 206)
+            or response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < config.COMPRESSION_MIN_BYTES:
+        return response
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    body, etag = _encode(data, encoding, response.headers.get('ETag'))
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+def encode_body(data, mimetype, accept_encoding, etag=None):
+    """
+    compress_response() for responses built outside Flask (asgi.py).
+
+    Args:
+        data (bytes): Response body
+        mimetype (str): Its type, e.g. 'application/json'
+        accept_encoding (str): The request's Accept-Encoding header ('' if absent)
+        etag (str, optional): The response's ETag header value
+
+    Returns:
+        tuple: (body, Content-Encoding or None, ETag to send)
+    """
+    if (not config.COMPRESSION_ENABLED or mimetype not in COMPRESSIBLE_TYPES
+            or len(data) < config.COMPRESSION_MIN_BYTES):
+        return data, None, etag
+    encoding = parse_accept_header(accept_encoding).best_match(ENCODINGS)
+    if encoding is None:
+        return data, None, etag
+    body, etag = _encode(data, encoding, etag)
+    return body, encoding, etag
+
+
+def _encode(data, encoding, etag):
+    """Compressed body and the ETag to send with it"""
+    body = _compressed(data, encoding, etag)
+    with _lock:
+        _stats['compressed'] += 1
+        _stats['bytes_in'] += len(data)
+        _stats['bytes_out'] += len(body)
+    if etag and not etag.startswith('W/'):
+        etag = 'W/' + etag
+    return body, etag
+
+
+def stats():
+    with _lock:
+        return dict(_stats, encodings=list(ENCODINGS), cached=len(_cache))
+
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -0,0 +1,289 @@
+"""
+Runtime configuration for the Nutrition Tracker backend.
+Every setting can be overridden with an environment variable of the same name.
+"""
+
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# ==================== DATABASE ====================
+
+# SQLite database file
+DATABASE_PATH = os.environ.get('NUTRITION_DB_PATH', 'nutrition_tracker.db')
+
+# Seconds a connection waits on another process's write lock before "database is locked"
+DATABASE_BUSY_TIMEOUT = _env_float('DATABASE_BUSY_TIMEOUT', 10)
+
+# Write-ahead logging, so readers in other workers aren't blocked by a writer
+DATABASE_WAL = _env_bool('DATABASE_WAL', True)
+
+# ==================== NUTRITION LOOKUP CACHE ====================
+
+# How long a successful nutritionvalue.org lookup stays fresh (seconds)
+NUTRITION_CACHE_TTL = _env_int('NUTRITION_CACHE_TTL', 30 * 24 * 3600)
+
+# How long a lookup that found nothing is remembered before it is retried (seconds);
+# upstream errors are never cached
+NUTRITION_CACHE_NEGATIVE_TTL = _env_int('NUTRITION_CACHE_NEGATIVE_TTL', 6 * 3600)
+
+# Load every unexpired cache row into memory when the cache is first used
+NUTRITION_CACHE_WARM_LOAD = _env_bool('NUTRITION_CACHE_WARM_LOAD', True)
+
+# Most lookups kept in memory; older ones are still answered from the cache table
+NUTRITION_CACHE_SIZE = _env_int('NUTRITION_CACHE_SIZE', 20000)
+
+# Seconds between purges of expired rows from memory and the cache table
+NUTRITION_CACHE_PURGE_INTERVAL = _env_int('NUTRITION_CACHE_PURGE_INTERVAL', 3600)
+
+# ==================== RECEIPT UPLOADS ====================
+
+# Largest accepted receipt upload (bytes); larger requests get a 413
+MAX_RECEIPT_UPLOAD_BYTES = _env_int('MAX_RECEIPT_UPLOAD_BYTES', 10 * 1024 * 1024)
+
+# Directory where receipt images are kept when retention is enabled
+RECEIPT_UPLOAD_DIR = os.environ.get('RECEIPT_UPLOAD_DIR', 'uploads')
+
+# Days to keep uploaded receipt images; 0 processes uploads in memory and never writes them
+RECEIPT_RETENTION_DAYS = _env_float('RECEIPT_RETENTION_DAYS', 0)
+
+# Upper bound on retained receipt images (0 = no limit); oldest are removed first
+RECEIPT_RETENTION_MAX_FILES = _env_int('RECEIPT_RETENTION_MAX_FILES', 500)
+
+# Seconds between background sweeps of the upload directory
+RECEIPT_SWEEP_INTERVAL = _env_int('RECEIPT_SWEEP_INTERVAL', 3600)
+
+# Concurrent nutrition lookups per receipt
+RECEIPT_LOOKUP_WORKERS = _env_int('RECEIPT_LOOKUP_WORKERS', 4)
+
+# ==================== UPSTREAM ====================
+
+# Base URLs of the HFS menu API and nutritionvalue.org; point them at local stand-ins for load
+# tests (benchmarks/upstream_mock.py)
+HFS_API_BASE = os.environ.get('HFS_API_BASE', 'https://api.hfs.purdue.edu/menus/v2')
+NUTRITIONVALUE_BASE = os.environ.get('NUTRITIONVALUE_BASE', 'https://www.nutritionvalue.org')
+
+# Seconds the async client (upstream_async.py) waits on HFS / nutritionvalue.org before giving up
+UPSTREAM_TIMEOUT = _env_float('UPSTREAM_TIMEOUT', 10)
+
+# Open upstream connections per process; further lookups wait for one (as coroutines, not threads)
+UPSTREAM_MAX_CONNECTIONS = _env_int('UPSTREAM_MAX_CONNECTIONS', 100)
+
+# ==================== TRACING ====================
+
+# Allow ?debug=1 to attach receipt pipeline spans to responses, and enable /api/debug/traces
+TRACE_DEBUG = _env_bool('TRACE_DEBUG', False)
+
+# Number of finished traces kept in memory for /api/debug/traces
+TRACE_HISTORY_SIZE = _env_int('TRACE_HISTORY_SIZE', 50)
+
+# ==================== TRAFFIC RECORDING ====================
+
+# Append every API request to this JSONL file for benchmarks/load_harness.py to replay (empty: off)
+REQUEST_RECORD_PATH = os.environ.get('REQUEST_RECORD_PATH', '')
+
+# ==================== CALCULATIONS ====================
+
+# Largest number of rows accepted per section by /api/calculations/batch
+MAX_BATCH_ROWS = _env_int('MAX_BATCH_ROWS', 100000)
+
+# ==================== USER CACHE ====================
+
+# Most users whose profile and goals are kept in memory
+USER_CACHE_SIZE = _env_int('USER_CACHE_SIZE', 10000)
+
+# Seconds a cached profile/goals entry is trusted (writes through the API invalidate immediately)
+USER_CACHE_TTL = _env_int('USER_CACHE_TTL', 300)
+
+# ==================== WEIGHT PROJECTION ====================
+
+# Days of logged intake used to estimate a user's mean and variance
+PROJECTION_HISTORY_DAYS = _env_int('PROJECTION_HISTORY_DAYS', 28)
+
+# Longest projection accepted by /api/projection (weeks)
+PROJECTION_MAX_WEEKS = _env_int('PROJECTION_MAX_WEEKS', 520)
+
+# Width of the confidence band in standard deviations (1.96 = 95%)
+PROJECTION_CONFIDENCE_Z = _env_float('PROJECTION_CONFIDENCE_Z', 1.96)
+
+# ==================== PURDUE MENU / MEAL PLANNER ====================
+
+# Menu snapshot written by `python purdue_menu.py --ingest`
+PURDUE_MENU_SNAPSHOT = os.environ.get('PURDUE_MENU_SNAPSHOT', 'purdue_nutrition_data.json')
+
+# Plan from the latest snapshot when the requested day's menu hasn't been ingested
+# (a request can also opt in with allow_stale)
+PURDUE_MENU_ALLOW_STALE = _env_bool('PURDUE_MENU_ALLOW_STALE', False)
+
+# Most items in one suggested plan
+PLANNER_MAX_ITEMS = _env_int('PLANNER_MAX_ITEMS', 4)
+
+# Number of plans returned by /api/planner
+PLANNER_RESULTS = _env_int('PLANNER_RESULTS', 5)
+
+# Partial plans kept per search depth (higher = more thorough, slower)
+PLANNER_BEAM_WIDTH = _env_int('PLANNER_BEAM_WIDTH', 1024)
+
+# ==================== FOOD RECOMMENDATIONS ====================
+
+# Foods added since the last build that trigger a KD-tree rebuild
+FOOD_INDEX_REBUILD_THRESHOLD = _env_int('FOOD_INDEX_REBUILD_THRESHOLD', 1024)
+
+# Seconds between checks for foods and food nutrients written by other processes (picked up by
+# the food index and the nutrient store, which each worker keeps in memory)
+FOOD_STORE_SYNC_INTERVAL = _env_float('FOOD_STORE_SYNC_INTERVAL', 5)
+
+# ==================== ANALYTICS ====================
+
+# Most users whose rolling windows and streaks are kept in memory
+ANALYTICS_CACHE_SIZE = _env_int('ANALYTICS_CACHE_SIZE', 10000)
+
+# Seconds before a user's windows are rebuilt from history (covers writes from other processes)
+ANALYTICS_TTL = _env_int('ANALYTICS_TTL', 300)
+
+# A day is on target when calories are within this fraction of the target (and protein reaches 1 - this)
+ANALYTICS_TARGET_TOLERANCE = _env_float('ANALYTICS_TARGET_TOLERANCE', 0.1)
+
+# ==================== MEAL ENTRIES ====================
+
+# Entries per page from /api/meals/<user_id>/entries, and the most a client may ask for with ?limit=
+MEAL_ENTRIES_PAGE_SIZE = _env_int('MEAL_ENTRIES_PAGE_SIZE', 50)
+MEAL_ENTRIES_MAX_PAGE_SIZE = _env_int('MEAL_ENTRIES_MAX_PAGE_SIZE', 200)
+
+# ==================== MEAL HISTORY EXPORT / IMPORT ====================
+
+# Entries read per query while streaming /api/meals/<user_id>/export
+HISTORY_EXPORT_CHUNK_ROWS = _env_int('HISTORY_EXPORT_CHUNK_ROWS', 2000)
+
+# Valid rows inserted per transaction by /api/meals/<user_id>/import
+HISTORY_IMPORT_BATCH_ROWS = _env_int('HISTORY_IMPORT_BATCH_ROWS', 5000)
+
+# Largest accepted import upload (bytes); larger requests get a 413
+HISTORY_IMPORT_MAX_BYTES = _env_int('HISTORY_IMPORT_MAX_BYTES', 200 * 1024 * 1024)
+
+# Rejected rows listed in an import response (all of them are counted)
+HISTORY_IMPORT_MAX_ERRORS = _env_int('HISTORY_IMPORT_MAX_ERRORS', 100)
+
+# ==================== HTTP CACHING ====================
+
+# Seconds clients and proxies may reuse a Purdue menu without revalidating; also how long a live
+# HFS menu scrape is reused when no ingested snapshot covers the date
+HTTP_MENU_MAX_AGE = _env_int('HTTP_MENU_MAX_AGE', 300)
+
+# Same for single-item HFS nutrition lookups
+HTTP_NUTRITION_MAX_AGE = _env_int('HTTP_NUTRITION_MAX_AGE', 24 * 3600)
+
+# Serialized menu / nutrition responses kept in memory per process
+HTTP_PAYLOAD_CACHE_SIZE = _env_int('HTTP_PAYLOAD_CACHE_SIZE', 512)
+
+# ==================== RESPONSE ENCODING ====================
+
+# 'auto' uses orjson for API responses, menu snapshots and scraper output when it's installed;
+# 'stdlib' always uses the json module
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
+# gzip/brotli-compress responses for clients that accept it (turn off when a proxy compresses)
+COMPRESSION_ENABLED = _env_bool('COMPRESSION_ENABLED', True)
+
+# Bodies smaller than this are sent as-is
+COMPRESSION_MIN_BYTES = _env_int('COMPRESSION_MIN_BYTES', 1024)
+
+# gzip level (1-9) and brotli quality (0-11); higher is smaller and slower
+COMPRESSION_GZIP_LEVEL = _env_int('COMPRESSION_GZIP_LEVEL', 6)
+COMPRESSION_BROTLI_QUALITY = _env_int('COMPRESSION_BROTLI_QUALITY', 5)
+
+# Compressed bodies of ETag'd responses (menus) kept in memory per process
+COMPRESSION_CACHE_SIZE = _env_int('COMPRESSION_CACHE_SIZE', 64)
+
+# ==================== RATE LIMITING ====================
+
+# Refuse requests over the token-bucket limits below with 429, and shed low-priority requests
+# with 503 when busy (see rate_limit.py)
+RATE_LIMIT_ENABLED = _env_bool('RATE_LIMIT_ENABLED', True)
+
+# Per route class: requests per second and burst for the whole process (_RATE/_BURST) and for each
+# user or address (_CLIENT_RATE/_CLIENT_BURST); a rate of 0 means no limit
+RATE_LIMIT_RECEIPT_RATE = _env_float('RATE_LIMIT_RECEIPT_RATE', 1)
+RATE_LIMIT_RECEIPT_BURST = _env_int('RATE_LIMIT_RECEIPT_BURST', 4)
+RATE_LIMIT_RECEIPT_CLIENT_RATE = _env_float('RATE_LIMIT_RECEIPT_CLIENT_RATE', 0.1)
+RATE_LIMIT_RECEIPT_CLIENT_BURST = _env_int('RATE_LIMIT_RECEIPT_CLIENT_BURST', 3)
+
+RATE_LIMIT_PURDUE_RATE = _env_float('RATE_LIMIT_PURDUE_RATE', 10)
+RATE_LIMIT_PURDUE_BURST = _env_int('RATE_LIMIT_PURDUE_BURST', 20)
+RATE_LIMIT_PURDUE_CLIENT_RATE = _env_float('RATE_LIMIT_PURDUE_CLIENT_RATE', 1)
+RATE_LIMIT_PURDUE_CLIENT_BURST = _env_int('RATE_LIMIT_PURDUE_CLIENT_BURST', 10)
+
+RATE_LIMIT_DEFAULT_RATE = _env_float('RATE_LIMIT_DEFAULT_RATE', 0)
+RATE_LIMIT_DEFAULT_BURST = _env_int('RATE_LIMIT_DEFAULT_BURST', 0)
+RATE_LIMIT_DEFAULT_CLIENT_RATE = _env_float('RATE_LIMIT_DEFAULT_CLIENT_RATE', 20)
+RATE_LIMIT_DEFAULT_CLIENT_BURST = _env_int('RATE_LIMIT_DEFAULT_CLIENT_BURST', 60)
+
+# Per-client buckets kept per process (least recently used are dropped)
+RATE_LIMIT_MAX_CLIENTS = _env_int('RATE_LIMIT_MAX_CLIENTS', 10000)
+
+# Requests a process can work on at once; 0 means SERVER_THREADS
+LOAD_SHED_CAPACITY = _env_int('LOAD_SHED_CAPACITY', 0)
+
+# Once this fraction of LOAD_SHED_CAPACITY is busy, new requests of the class get 503 (0 never sheds);
+# the default class is never shed
+LOAD_SHED_RECEIPT = _env_float('LOAD_SHED_RECEIPT', 0.5)
+LOAD_SHED_PURDUE = _env_float('LOAD_SHED_PURDUE', 0.75)
+
+# ==================== SERVER ====================
+
+# Address app.py and the production server listen on
+SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = _env_int('SERVER_PORT', 5001)
+
+# Flask debugger and reloader for `python app.py` (never used by the production server)
+SERVER_DEBUG = _env_bool('SERVER_DEBUG', True)
+
+# Production (gunicorn) worker processes; 0 means 2 x CPU cores + 1
+SERVER_WORKERS = _env_int('SERVER_WORKERS', 0)
+
+# Request threads per worker process
+SERVER_THREADS = _env_int('SERVER_THREADS', 4)
+
+# Seconds an idle keep-alive connection is held open
+SERVER_KEEPALIVE = _env_int('SERVER_KEEPALIVE', 5)
+
+# Requests a worker serves before it is replaced (0 disables), plus up to this many more at random
+# so workers don't all restart together
+SERVER_MAX_REQUESTS = _env_int('SERVER_MAX_REQUESTS', 2000)
+SERVER_MAX_REQUESTS_JITTER = _env_int('SERVER_MAX_REQUESTS_JITTER', 200)
+
+# Seconds a silent worker is allowed before it is killed and replaced (receipt OCR is the slow path)
+SERVER_TIMEOUT = _env_int('SERVER_TIMEOUT', 120)
+
+# Seconds workers get to finish in-flight requests on reload (SIGHUP) or shutdown
+SERVER_GRACEFUL_TIMEOUT = _env_int('SERVER_GRACEFUL_TIMEOUT', 30)
+
+# Import the app once in the master so workers fork with the caches already warm. SIGHUP then
+# restarts workers without re-reading code; set false to have SIGHUP pick up code changes too
+SERVER_PRELOAD = _env_bool('SERVER_PRELOAD', True)
+
+# Import numpy/scipy and the receipt stack, open the database and warm the nutrition cache before
+# serving (once in the master with SERVER_PRELOAD, else in each worker); off loads them on first use
+SERVER_PRELOAD_DEPS = _env_bool('SERVER_PRELOAD_DEPS', False)
+
+# gunicorn access log ('-' for stderr, a file path, or empty to disable)
+SERVER_ACCESS_LOG = os.environ.get('SERVER_ACCESS_LOG', '-')
+
+# Master process pid file, for `kill -HUP $(cat ...)` reloads (empty to skip)
+SERVER_PIDFILE = os.environ.get('SERVER_PIDFILE', '')
@@ -0,0 +1,272 @@
+"""
+Nightly cohort-wide deficiency analysis.
+
+Runs the checkDeficiencies and checkMicronutrients rules for every user on a
+given date in one pass: daily totals, goals and logged servings are pulled
+with three SQL queries, micronutrient totals are summed from nutrient_store's
+columns, the rules are evaluated as NumPy array operations over all users,
+and the resulting recommendation lists are written to `deficiency_results`
+for dashboards to read. Output is identical to calling checkDeficiencies and
+then checkMicronutrients per user.
+
+Usage:
+    python deficiency_job.py [--date YYYY-MM-DD] [--verify 1000]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import DB
+from nutrient_store import nutrient_store
+from nutrition_batch import getMacrosBatch
+from nutrition_calculations import MICRONUTRIENT_LIMITS, MICRONUTRIENT_MESSAGES, checkDeficiencies, checkMicronutrients
+
+# Thresholds used by checkDeficiencies
+PROTEIN_GOAL_FRACTION = 0.8
+MACRO_TOLERANCE_PCT = 10
+LOW_CALORIES = 1200
+HIGH_CALORIES = 4000
+LOW_FAT_G = 20
+
+_MACRO_MESSAGES = (
+    ('protein',
+     "Your protein intake is {cur:.1f}% but your goal is {goal:.1f}%. Consider adding more protein-rich foods.",
+     "Your protein intake is {cur:.1f}% but your goal is {goal:.1f}%. Consider reducing protein and increasing other macros."),
+    ('carb',
+     "Your carb intake is {cur:.1f}% but your goal is {goal:.1f}%. Consider adding more complex carbohydrates.",
+     "Your carb intake is {cur:.1f}% but your goal is {goal:.1f}%. Consider reducing carbs and increasing other macros."),
+    ('fat',
+     "Your fat intake is {cur:.1f}% but your goal is {goal:.1f}%. Consider adding healthy fats like nuts, avocado, or olive oil.",
+     "Your fat intake is {cur:.1f}% but your goal is {goal:.1f}%. Consider reducing fats and increasing other macros."),
+)
+_LOW_CALORIE_MESSAGE = "Your calorie intake is very low. Consider adding more nutrient-dense foods to meet your body's needs."
+_HIGH_CALORIE_MESSAGE = "Your calorie intake is very high. Consider reducing portion sizes or choosing lower-calorie options."
+_LOW_FAT_MESSAGE = "Your fat intake is very low. Consider adding healthy fats for proper hormone function and nutrient absorption."
+
+
+def _positions(keys, values):
+    """Index of each of `values` in the `keys` array, and whether it was found"""
+    if len(keys) == 0:
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+    order = np.argsort(keys)
+    pos = np.clip(np.searchsorted(keys, values, sorter=order), 0, len(keys) - 1)
+    idx = order[pos]
+    return idx, keys[idx] == values
+
+
+def load_cohort(date):
+    """
+    Load every user's totals and goals for a date.
+
+    Returns:
+        dict: Column arrays keyed by user_ids, calories, protein, carbs, fat,
+              goal_protein, goal_protein_pct, goal_carbs_pct, goal_fat_pct
+    """
+    goal_rows = DB.get_all_user_goals()
+    user_ids = np.array([row[0] for row in goal_rows], dtype=np.int64)
+    n = len(user_ids)
+
+    def goal_column(i):
+        # Users without goals behave like checkDeficiencies(..., {}) -> all zeros
+        return np.array([row[i] if row[i] is not None else 0 for row in goal_rows], dtype=np.float64)
+
+    cohort = {
+        'user_ids': user_ids,
+        'goal_protein': goal_column(1),
+        'goal_protein_pct': goal_column(2),
+        'goal_carbs_pct': goal_column(3),
+        'goal_fat_pct': goal_column(4),
+        'calories': np.zeros(n),
+        'protein': np.zeros(n),
+        'carbs': np.zeros(n),
+        'fat': np.zeros(n),
+    }
+
+    totals = DB.get_all_daily_nutrition(date)
+    if totals and n:
+        totals_arr = np.array(totals, dtype=np.float64)
+        idx, known = _positions(user_ids, totals_arr[:, 0].astype(np.int64))
+        for col, name in enumerate(('calories', 'protein', 'carbs', 'fat'), start=1):
+            cohort[name][idx[known]] = totals_arr[known, col]
+
+    cohort.update(load_cohort_nutrients(date, user_ids))
+    return cohort
+
+
+def load_cohort_nutrients(date, user_ids):
+    """
+    Sum the MICRONUTRIENT_LIMITS nutrients over every user's logged servings.
+
+    Returns:
+        dict: 'nutrients' and 'nutrient_complete', each {nutrient: (n,) array} of
+              daily totals (NaN when no logged food reports it) and whether every
+              logged food reports it
+    """
+    n = len(user_ids)
+    names = list(MICRONUTRIENT_LIMITS)
+    result = {'nutrients': {name: np.full(n, np.nan) for name in names},
+              'nutrient_complete': {name: np.zeros(n, dtype=bool) for name in names}}
+
+    rows = DB.get_all_daily_food_servings(date)
+    if not rows or not n:
+        return result
+
+    entries = np.array(rows, dtype=np.float64)
+    user_idx, user_known = _positions(user_ids, entries[:, 0].astype(np.int64))
+    servings = entries[:, 2]
+    logged = np.bincount(user_idx[user_known], minlength=n)
+
+    food_ids, columns = nutrient_store.export(names)
+    food_row, food_known = _positions(np.frombuffer(food_ids, dtype=np.int64), entries[:, 1].astype(np.int64))
+    for name in names:
+        values = np.full(len(entries), np.nan)
+        values[food_known] = np.frombuffer(columns[name], dtype=np.float64)[food_row[food_known]]
+        has = user_known & ~np.isnan(values)
+        reporting = np.bincount(user_idx[has], minlength=n)
+        total = np.bincount(user_idx[has], weights=values[has] * servings[has], minlength=n)
+        result['nutrients'][name] = np.where(reporting > 0, np.round(total, 2), np.nan)
+        result['nutrient_complete'][name] = (reporting > 0) & (reporting == logged)
+    return result
+
+
+def evaluate_cohort(cohort):
+    """
+    Apply the checkDeficiencies and checkMicronutrients rules to every user at once.
+
+    Returns:
+        list[list[str]]: Recommendations per user, in cohort order
+    """
+    calories = cohort['calories']
+    protein = cohort['protein']
+    fat = cohort['fat']
+    goal_protein = cohort['goal_protein']
+    n = len(calories)
+    recommendations = [[] for _ in range(n)]
+
+    # Protein below 80% of the gram goal
+    for i in np.flatnonzero((goal_protein > 0) & (protein < goal_protein * PROTEIN_GOAL_FRACTION)):
+        recommendations[i].append(
+            f"Add more protein to meet your goals! You need {goal_protein[i] - protein[i]:.1f}g more.")
+
+    # Macro split more than 10 points off target
+    eating = calories > 0
+    if eating.any():
+        macros = np.zeros((n, 3))
+        macros[eating] = getMacrosBatch(calories[eating], protein[eating], cohort['carbs'][eating], fat[eating])
+        goals = np.column_stack((cohort['goal_protein_pct'], cohort['goal_carbs_pct'], cohort['goal_fat_pct']))
+        off_target = eating[:, None] & (np.abs(macros - goals) > MACRO_TOLERANCE_PCT)
+        below = macros < goals
+
+        flagged_rows = np.flatnonzero(off_target.any(axis=1))
+        for i in flagged_rows:
+            for k, (_, low_msg, high_msg) in enumerate(_MACRO_MESSAGES):
+                if off_target[i, k]:
+                    template = low_msg if below[i, k] else high_msg
+                    recommendations[i].append(template.format(cur=macros[i, k], goal=goals[i, k]))
+
+    for i in np.flatnonzero(calories < LOW_CALORIES):
+        recommendations[i].append(_LOW_CALORIE_MESSAGE)
+    for i in np.flatnonzero(calories > HIGH_CALORIES):
+        recommendations[i].append(_HIGH_CALORIE_MESSAGE)
+    for i in np.flatnonzero(fat < LOW_FAT_G):
+        recommendations[i].append(_LOW_FAT_MESSAGE)
+
+    # Micronutrient limits, appended in MICRONUTRIENT_LIMITS order like checkMicronutrients
+    for name, (kind, limit, unit) in MICRONUTRIENT_LIMITS.items():
+        amount = cohort['nutrients'][name]
+        with np.errstate(invalid='ignore'):
+            if kind == 'max':
+                flagged = amount > limit
+            else:
+                flagged = (amount < limit) & cohort['nutrient_complete'][name]
+        template = MICRONUTRIENT_MESSAGES[kind]
+        label = name.replace('_', ' ')
+        for i in np.flatnonzero(flagged):
+            recommendations[i].append(template.format(label=label, amount=amount[i], limit=limit, unit=unit))
+
+    return recommendations
+
+
+def run_job(date=None):
+    """
+    Compute and store recommendations for every user on a date.
+
+    Args:
+        date (str, optional): YYYY-MM-DD (defaults to yesterday, for a nightly run)
+
+    Returns:
+        dict: {'date', 'users', 'load_s', 'evaluate_s', 'write_s', 'total_s'}
+    """
+    if date is None:
+        date = (datetime.now().date() - timedelta(days=1)).isoformat()
+
+    start = time.perf_counter()
+    cohort = load_cohort(date)
+    loaded = time.perf_counter()
+    recommendations = evaluate_cohort(cohort)
+    evaluated = time.perf_counter()
+    DB.save_deficiency_results(date, [
+        (int(user_id), json.dumps(recs))
+        for user_id, recs in zip(cohort['user_ids'].tolist(), recommendations)
+    ])
+    written = time.perf_counter()
+
+    return {
+        'date': date,
+        'users': len(recommendations),
+        'load_s': round(loaded - start, 3),
+        'evaluate_s': round(evaluated - loaded, 3),
+        'write_s': round(written - evaluated, 3),
+        'total_s': round(written - start, 3)
+    }
+
+
+def verify_sample(date, sample_size=1000, seed=0):
+    """
+    Check the vectorized rules against checkDeficiencies + checkMicronutrients for a random sample of users.
+
+    Returns:
+        int: Number of users whose recommendations differ
+    """
+    cohort = load_cohort(date)
+    recommendations = evaluate_cohort(cohort)
+    n = len(recommendations)
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n, size=min(sample_size, n), replace=False) if n else []
+
+    mismatches = 0
+    for i in sample:
+        daily = {'calories': float(cohort['calories'][i]), 'protein_g': float(cohort['protein'][i]),
+                 'carbs_g': float(cohort['carbs'][i]), 'fat_g': float(cohort['fat'][i])}
+        goals = {'goal_protein_g': float(cohort['goal_protein'][i]),
+                 'goal_macros_pct': [float(cohort['goal_protein_pct'][i]), float(cohort['goal_carbs_pct'][i]),
+                                     float(cohort['goal_fat_pct'][i])]}
+        nutrients = nutrient_store.daily_totals(int(cohort['user_ids'][i]), date)
+        expected = checkDeficiencies(daily, goals) + checkMicronutrients(nutrients['totals'], nutrients['coverage'])
+        if expected != recommendations[i]:
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute deficiency recommendations for every user on a date')
+    parser.add_argument('--date', help='YYYY-MM-DD (default: yesterday)')
+    parser.add_argument('--verify', type=int, default=0, metavar='N',
+                        help='also compare N random users against checkDeficiencies + checkMicronutrients')
+    args = parser.parse_args()
+
+    stats = run_job(args.date)
+    print(f"✅ Deficiency results for {stats['date']}: {stats['users']} users in {stats['total_s']}s "
+          f"(load {stats['load_s']}s, evaluate {stats['evaluate_s']}s, write {stats['write_s']}s)")
+
+    if args.verify:
+        mismatches = verify_sample(stats['date'], args.verify)
+        print(f"{'✅' if mismatches == 0 else '❌'} Verified against checkDeficiencies + checkMicronutrients: {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
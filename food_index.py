@@ -0,0 +1,336 @@
+"""
+Nearest-neighbour index of foods by macro density.
+
+Every food in the `foods` table and every item on the ingested Purdue menu is
+indexed as the share of its calories coming from protein, carbs and fat.
+Querying with the same vector for a user's remaining macros returns the foods
+whose makeup best matches what they still need.
+
+The bulk of the index is a KD-tree (scipy's cKDTree when installed, brute
+force otherwise). Foods added afterwards go to a small delta buffer that is
+searched alongside the tree and folded in once it passes
+FOOD_INDEX_REBUILD_THRESHOLD entries; the new tree is built outside the lock,
+so add_food never waits on a rebuild.
+
+Rows are also kept sorted by calories. A calorie cap that few foods fit (late
+in the day the remaining calories are small) ranks just those rows by brute
+force instead of walking the tree for matches, and a cap nothing fits
+returns at once.
+
+Each worker process has its own index. Foods another worker adds are picked
+up by id: at most every FOOD_STORE_SYNC_INTERVAL seconds a query reads the
+foods rows above the highest id loaded and adds them to the delta buffer.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+import config
+import DB
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    print("Warning: scipy not installed. Food recommendations use brute-force search.")
+    cKDTree = None
+
+try:
+    import purdue_menu
+except ImportError:
+    purdue_menu = None
+
+# kcal per gram of protein, carbs, fat
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+
+def macro_density(calories, protein_g, carbs_g, fat_g):
+    """
+    Share of calories from protein, carbs and fat.
+
+    Returns:
+        numpy.ndarray: [protein, carbs, fat] fractions, or None when calories <= 0
+    """
+    if not calories or calories <= 0:
+        return None
+    return np.array([protein_g or 0, carbs_g or 0, fat_g or 0], dtype=np.float64) * KCAL_PER_GRAM / calories
+
+
+def _calories(foods):
+    return np.array([food['calories'] for food in foods], dtype=np.float64)
+
+
+class _Snapshot:
+    """Immutable view of the index (tree + main rows + delta rows) that queries read without locking"""
+
+    __slots__ = ('tree', 'vectors', 'foods', 'calories', 'by_calories', 'delta_vectors', 'delta_foods',
+                 'delta_calories')
+
+    def __init__(self, vectors, foods, tree=None, calories=None, by_calories=None, delta_vectors=None, delta_foods=()):
+        self.vectors = vectors
+        self.foods = tuple(foods)
+        self.calories = calories if calories is not None else _calories(self.foods)
+        if tree is None and cKDTree is not None and len(vectors):
+            tree = cKDTree(vectors)
+        self.tree = tree
+        if by_calories is None:
+            # Main rows ordered by calories: the rows under a calorie cap are a prefix
+            order = np.argsort(self.calories, kind='stable')
+            by_calories = (self.calories[order], order, vectors[order] if len(order) else vectors)
+        self.by_calories = by_calories
+        self.delta_vectors = delta_vectors if delta_vectors is not None else np.empty((0, 3))
+        self.delta_foods = tuple(delta_foods)
+        self.delta_calories = _calories(self.delta_foods)
+
+    def size(self):
+        return len(self.foods) + len(self.delta_foods)
+
+    def with_delta(self, foods, vectors):
+        """Copy sharing the tree, with more rows in the delta buffer"""
+        return _Snapshot(self.vectors, self.foods, self.tree, self.calories, self.by_calories,
+                         np.vstack([self.delta_vectors] + list(vectors)), self.delta_foods + tuple(foods))
+
+    def merged(self):
+        """Copy with the delta buffer folded into a rebuilt tree"""
+        return _Snapshot(np.vstack([self.vectors, self.delta_vectors]), self.foods + self.delta_foods)
+
+
+def _vectorize(foods):
+    kept, vectors = [], []
+    for food in foods:
+        vector = macro_density(food['calories'], food['protein_g'], food['carbs_g'], food['fat_g'])
+        if vector is not None:
+            kept.append(food)
+            vectors.append(vector)
+    return kept, np.array(vectors, dtype=np.float64).reshape(-1, 3)
+
+
+class FoodIndex:
+    """k-NN index over foods and Purdue menu items with an incremental delta buffer"""
+
+    def __init__(self, rebuild_threshold=None):
+        self.rebuild_threshold = config.FOOD_INDEX_REBUILD_THRESHOLD if rebuild_threshold is None else rebuild_threshold
+        self._snapshot = None
+        self._menu = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Foods added while a load is reading the table, re-applied when it finishes
+        self._pending = None
+        # True while add() folds the delta buffer into a new tree outside the lock
+        self._merging = False
+        # Highest foods id read from the table (None unless loaded from it), and ids above it
+        # this process already add()ed
+        self._max_food_id = None
+        self._local_ids = set()
+        self._synced_at = 0.0
+        self._stats = {'builds': 0, 'queries': 0, 'added': 0}
+
+    def build(self, foods):
+        """
+        Replace the index contents.
+
+        Args:
+            foods (list[dict]): Food dicts with 'calories', 'protein_g', 'carbs_g', 'fat_g'
+                                (plus any other fields to return with results)
+        """
+        kept, vectors = _vectorize(foods)
+        snapshot = _Snapshot(vectors, kept)
+        with self._lock:
+            self._snapshot = snapshot
+            self._max_food_id = None  # not from the table: nothing to sync
+            self._stats['builds'] += 1
+
+    def load(self):
+        """Build from the foods table and the current Purdue menu snapshot"""
+        with self._load_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                rows = DB.get_all_foods()
+                max_food_id = max((row[0] for row in rows), default=0)
+                foods = [
+                    {'source': 'foods', 'food_id': row[0], 'name': row[1], 'calories': row[2],
+                     'protein_g': row[3], 'carbs_g': row[4], 'fat_g': row[5]}
+                    for row in rows
+                ]
+
+                menu = purdue_menu.load_snapshot() if purdue_menu is not None else None
+                if menu is not None:
+                    for i in menu.distinct_indices().tolist():
+                        item = menu.items[i]
+                        foods.append({'source': 'purdue', 'name': item['name'], 'dining_hall': item.get('dining_hall'),
+                                      'calories': item['calories_per_serving'],
+                                      'protein_g': item['protein_g_per_serving'],
+                                      'carbs_g': item['carbs_g_per_serving'], 'fat_g': item['fat_g_per_serving']})
+
+                kept, vectors = _vectorize(foods)
+                snapshot = _Snapshot(vectors, kept)
+            finally:
+                with self._lock:
+                    pending, self._pending = self._pending, None
+
+            with self._lock:
+                loaded_ids = {food['food_id'] for food in kept if 'food_id' in food}
+                late = [(food, vector) for food, vector in pending if food.get('food_id') not in loaded_ids]
+                if late:
+                    snapshot = snapshot.with_delta([food for food, _ in late], [vector for _, vector in late])
+                self._snapshot = snapshot
+                self._menu = menu
+                self._max_food_id = max_food_id
+                self._local_ids = {food_id for food_id in self._local_ids if food_id > max_food_id}
+                self._synced_at = time.monotonic()
+                self._stats['builds'] += 1
+
+    def ensure_loaded(self):
+        """Load on first use; concurrent callers wait for the same load"""
+        if self._snapshot is None:
+            with self._load_lock:
+                loaded = self._snapshot is not None
+            if not loaded:
+                self.load()
+
+    def refresh_menu(self):
+        """Reload when a different Purdue menu snapshot has been ingested since the last build"""
+        if purdue_menu is not None and self._snapshot is not None and purdue_menu.load_snapshot() is not self._menu:
+            self.load()
+
+    def sync(self):
+        """Index foods other processes have added to the table since the last load or sync"""
+        if self._max_food_id is None or time.monotonic() - self._synced_at < config.FOOD_STORE_SYNC_INTERVAL:
+            return
+        # One sync at a time, and none while a load is reading the table
+        if not self._load_lock.acquire(blocking=False):
+            return
+        try:
+            self._synced_at = time.monotonic()
+            rows = DB.get_foods_after(self._max_food_id)
+            with self._lock:
+                local = set(self._local_ids)
+            for row in rows:
+                if row[0] not in local:
+                    self.add({'source': 'foods', 'food_id': row[0], 'name': row[1], 'calories': row[2],
+                              'protein_g': row[3], 'carbs_g': row[4], 'fat_g': row[5]})
+            if rows:
+                with self._lock:
+                    self._max_food_id = rows[-1][0]
+                    self._local_ids = {food_id for food_id in self._local_ids if food_id > self._max_food_id}
+        finally:
+            self._load_lock.release()
+
+    def add(self, food):
+        """Index one newly added food (dict as in build()) via the delta buffer"""
+        vector = macro_density(food['calories'], food['protein_g'], food['carbs_g'], food['fat_g'])
+        if vector is None:
+            return
+
+        with self._lock:
+            self._stats['added'] += 1
+            if 'food_id' in food:
+                self._local_ids.add(food['food_id'])
+            if self._pending is not None:
+                self._pending.append((food, vector))
+            current = self._snapshot
+            if current is None:
+                # Not loaded yet: the food is read from the table on first query
+                return
+            snapshot = self._snapshot = current.with_delta([food], [vector])
+            if len(snapshot.delta_foods) < self.rebuild_threshold or self._merging:
+                return
+            self._merging = True
+
+        # Rebuild without the lock so other adds and queries carry on; foods added
+        # meanwhile go to the current delta and are carried over to the new tree
+        try:
+            merged = snapshot.merged()
+        finally:
+            with self._lock:
+                self._merging = False
+        with self._lock:
+            latest = self._snapshot
+            if latest.foods is not snapshot.foods:
+                return  # replaced by a load() while merging
+            done = len(snapshot.delta_foods)
+            if len(latest.delta_foods) > done:
+                merged = merged.with_delta(latest.delta_foods[done:], [latest.delta_vectors[done:]])
+            self._snapshot = merged
+            self._stats['builds'] += 1
+
+    def query(self, target, k=10, max_calories=None):
+        """
+        Find the foods whose macro density is closest to a target.
+
+        Args:
+            target (array-like): [protein, carbs, fat] calorie shares (see macro_density)
+            k (int): Number of foods to return
+            max_calories (float, optional): Skip foods with more calories per serving than this
+
+        Returns:
+            list[dict]: Food dicts with an added 'distance', nearest first
+        """
+        self.ensure_loaded()
+        self.sync()
+        snapshot = self._snapshot
+        target = np.asarray(target, dtype=np.float64)
+        self._stats['queries'] += 1
+        if snapshot.size() == 0:
+            return []
+
+        # Delta rows are few: filter and rank them directly
+        candidates = []
+        if len(snapshot.delta_foods):
+            distances = np.sqrt(((snapshot.delta_vectors - target) ** 2).sum(axis=1))
+            if max_calories is not None:
+                distances[snapshot.delta_calories > max_calories] = np.inf
+            for i in np.argsort(distances)[:k].tolist():
+                if np.isfinite(distances[i]):
+                    candidates.append((float(distances[i]), snapshot.delta_foods[i]))
+
+        n = len(snapshot.foods)
+        # Rows within the calorie cap are the first `eligible` in calorie order
+        eligible = n if max_calories is None else int(np.searchsorted(snapshot.by_calories[0], max_calories, 'right'))
+        if eligible and (snapshot.tree is None or eligible <= n // 8):
+            # No tree, or a cap selective enough that the tree would be walked almost entirely
+            # before k matches turn up: rank the eligible rows directly
+            _, order, sorted_vectors = snapshot.by_calories
+            distances = np.sqrt(((sorted_vectors[:eligible] - target) ** 2).sum(axis=1))
+            want = min(k, eligible)
+            nearest = np.argpartition(distances, want - 1)[:want] if want < eligible else np.arange(eligible)
+            candidates.extend((float(distances[i]), snapshot.foods[order[i]]) for i in nearest.tolist())
+        elif eligible:
+            # Over-fetch when filtering by calories, growing until the k-th match
+            # is no farther than the farthest row fetched (so nothing is missed).
+            # At least an eighth of the rows match, so a few rounds suffice
+            fetch = k * 4 if max_calories is not None else k
+            base = candidates
+            while True:
+                want = min(fetch, n)
+                distances, indices = snapshot.tree.query(target, k=want)
+                distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+                if max_calories is not None:
+                    keep = snapshot.calories[indices] <= max_calories
+                    matched_distances, matched = distances[keep], indices[keep]
+                else:
+                    matched_distances, matched = distances, indices
+                candidates = base + [(d, snapshot.foods[i])
+                                     for d, i in zip(matched_distances[:k].tolist(), matched[:k].tolist())]
+                if want == n or len(matched) >= k:
+                    break
+                candidates.sort(key=lambda c: c[0])
+                if len(candidates) >= k and candidates[k - 1][0] <= distances[-1]:
+                    break
+                fetch *= 4
+
+        candidates.sort(key=lambda c: c[0])
+        return [dict(food, distance=round(distance, 4)) for distance, food in candidates[:k]]
+
+    def stats(self):
+        snapshot = self._snapshot
+        stats = dict(self._stats)
+        stats['indexed'] = snapshot.size() if snapshot is not None else 0
+        stats['pending_delta'] = len(snapshot.delta_foods) if snapshot is not None else 0
+        stats['backend'] = 'cKDTree' if cKDTree is not None else 'brute_force'
+        return stats
+
+
+food_index = FoodIndex()
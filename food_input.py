@@ -6,13 +6,21 @@ DELETE THIS COMMENT AFTER IMPLEMENTING THE FUNCTIONS.
 """
 
 import cv2
+import numpy as np
 import pytesseract
-import re
 import os
-from bs4 import BeautifulSoup
 import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date as dt
 from collections import defaultdict
+import config
+import metrics
+import upstream
+import upstream_async
+from tracing import span, wrap_context
+from nutrition_cache import nutrition_cache
+from receipt_parser import parse_receipt_text
 
 # Configure Tesseract path for macOS Homebrew installation
 if os.path.exists('/opt/homebrew/bin/tesseract'):
@@ -31,12 +39,46 @@ def extract_text_from_receipt(image_path):
         str: Extracted text from the receipt, or None if extraction fails
     """
 
-    try:
+    with span('image_load', path=image_path):
         img = cv2.imread(image_path)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        gray = cv2.medianBlur(gray, 3)
+    return extract_text_from_image(img)
+
+def decode_receipt_image(image_bytes):
+    """
+    Decode an uploaded receipt image straight from memory.
+    
+    Args:
+        image_bytes (bytes): Encoded image data (JPEG, PNG, ...)
+        
+    Returns:
+        numpy.ndarray: BGR image, or None if the data is not a readable image
+    """
+
+    if not image_bytes:
+        return None
+    with span('image_decode', bytes=len(image_bytes)):
+        buf = np.frombuffer(image_bytes, dtype=np.uint8)
+        return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+def extract_text_from_image(img):
+    """
+    Extract text from an already-loaded receipt image using OCR.
+    
+    Args:
+        img (numpy.ndarray): BGR image as returned by cv2.imread / cv2.imdecode
         
-        text = pytesseract.image_to_string(gray)
+    Returns:
+        str: Extracted text from the receipt, or None if extraction fails
+    """
+
+    try:
+        with span('preprocess'):
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            gray = cv2.medianBlur(gray, 3)
+        
+        with span('tesseract') as ocr_span:
+            text = pytesseract.image_to_string(gray)
+            ocr_span.set(chars=len(text))
         return text.strip()
     except Exception as e:
         print(f"OCR error: {e}")
@@ -52,21 +94,18 @@ def parse_receipt_items(receipt_text):
     Returns:
         list[dict]: List of food items with quantities
             [{'name': 'apple', 'quantity': 2, 'unit': 'each'}, ...]
+            Items may also carry 'price' and 'dictionary_match' (name was
+            expanded from a known receipt abbreviation).
     """
 
-    items = []
-    lines = receipt_text.splitlines()
-    for line in lines:
-        match = re.match(r"([A-Za-z ]+)\s+([\d\.]+)", line)
-        if match:
-            name = match.group(1).strip().lower()
-            quantity = float(match.group(2))
-            items.append({"name": name, "quantity": quantity, "unit": "each"})
+    with span('parse') as parse_span:
+        items = parse_receipt_text(receipt_text)
+        parse_span.set(item_count=len(items))
     return items
 
 def get_nutrition_from_web(food_name):
     """
-    Scrape nutrition information for a food item from a nutrition database website.
+    Get nutrition information for a food item, scraping the web only on a cache miss.
     
     Args:
         food_name (str): Name of the food item
@@ -84,36 +123,33 @@ def get_nutrition_from_web(food_name):
             Returns None if nutrition not found
     """
 
-    query = food_name.replace(" ", "+")
-    url = f"https://www.nutritionvalue.org/search.php?food_query={query}"
+    with span('nutrition_lookup', food=food_name):
+        return nutrition_cache.get_or_fetch(food_name, _scrape_nutrition_from_web)
+
+def _scrape_nutrition_from_web(food_name):
+    """Scrape nutritionvalue.org for a food item (uncached, see get_nutrition_from_web)"""
 
-    res = requests.get(url)
-    if res.status_code != 200:
+    with span('web_scrape', food=food_name) as scrape_span:
+        nutrition = _scrape_nutritionvalue(food_name)
+        scrape_span.set(found=nutrition is not None)
+    return nutrition
+
+def _scrape_nutritionvalue(food_name):
+    with metrics.upstream('nutritionvalue'):
+        res = requests.get(upstream.nutritionvalue_search_url(food_name))
+    if res.status_code == 404:
         return None
+    # Anything else that failed (429, 5xx) raises, so the miss isn't cached for NUTRITION_CACHE_NEGATIVE_TTL
+    res.raise_for_status()
     
-    soup = BeautifulSoup(res.text, "html.parser")
-    first_link = soup.select_one("a[href*='/foods/']")
-    if not first_link:
+    food_url = upstream.parse_nutritionvalue_search(res.text)
+    if not food_url:
         return None
 
-    food_url = "https://www.nutritionvalue.org" + first_link["href"]
-    page = requests.get(food_url)
-    soup = BeautifulSoup(page.text, "html.parser")
-
-    def safe_get(label):
-        cell = soup.find("td", string=lambda s: s and label in s)
-        if cell and cell.find_next_sibling("td"):
-            return float(cell.find_next_sibling("td").text.split()[0])
-        return 0.0
-
-    return {
-        "serving_size_value": 1.0,
-        "serving_size_unit": food_name,
-        "calories_per_serving": safe_get("Calories"),
-        "protein_g_per_serving": safe_get("Protein"),
-        "carbs_g_per_serving": safe_get("Carbohydrate"),
-         "fat_g_per_serving": safe_get("Total Fat")
-     }
+    with metrics.upstream('nutritionvalue'):
+        page = requests.get(food_url)
+    page.raise_for_status()
+    return upstream.parse_nutritionvalue_food(page.text, food_name)
 
 def process_receipt_image(image_path):
     """
@@ -141,7 +177,38 @@ def process_receipt_image(image_path):
             Returns empty list if processing fails
     """
 
-    text = extract_text_from_receipt(image_path)
+    return process_receipt_text(extract_text_from_receipt(image_path))
+
+def process_receipt_bytes(image_bytes):
+    """
+    Complete pipeline for an in-memory upload (same output as process_receipt_image).
+    
+    Args:
+        image_bytes (bytes): Encoded receipt image from the request body
+        
+    Returns:
+        list[dict]: Complete nutrition data for all items found
+        
+    Raises:
+        ValueError: If the data cannot be decoded as an image
+    """
+
+    img = decode_receipt_image(image_bytes)
+    if img is None:
+        raise ValueError("Uploaded file is not a readable image")
+    return process_receipt_text(extract_text_from_image(img))
+
+def process_receipt_text(text):
+    """
+    Parse OCR text and look up nutrition for each item found.
+    
+    Args:
+        text (str): Raw text extracted from a receipt (None/empty yields [])
+        
+    Returns:
+        list[dict]: Complete nutrition data for all items found
+    """
+
     if not text:
         return []
     
@@ -149,13 +216,135 @@ def process_receipt_image(image_path):
     if not items:
         return []
 
-    results = []
-    for item in items:
-        nutrition = get_nutrition_from_web(item["name"])
-        if nutrition:
-            results.append({**item, **nutrition})
+    nutrition_by_index = dict(enrich_receipt_items(items))
+    return [
+        {**item, **nutrition_by_index[i]}
+        for i, item in enumerate(items)
+        if nutrition_by_index.get(i)
+    ]
+
+def enrich_receipt_items(items, max_workers=None):
+    """
+    Look up nutrition for parsed receipt items concurrently.
+    
+    With httpx installed every lookup runs at once as a coroutine on the shared
+    upstream loop (upstream_async.py), so a receipt ties up only the request's
+    own thread; otherwise lookups run on a thread pool.
+    
+    Args:
+        items (list[dict]): Items from parse_receipt_items
+        max_workers (int, optional): Concurrent lookups on the thread pool (defaults to RECEIPT_LOOKUP_WORKERS)
+        
+    Yields:
+        tuple: (item index, nutrition dict or None) in completion order
+    """
+
+    if not items:
+        return
+    max_workers = max_workers or config.RECEIPT_LOOKUP_WORKERS
+
+    async def lookup_async(item):
+        metrics.add('nutrition_receipt_lookups_queued', value=-1)
+        metrics.add('nutrition_receipt_lookups_active')
+        try:
+            return await upstream_async.get_nutrition_from_web(item["name"])
+        except Exception as e:
+            print(f"Nutrition lookup error for '{item['name']}': {e}")
+            return None
+        finally:
+            metrics.add('nutrition_receipt_lookups_active', value=-1)
+
+    if upstream_async.available():
+        with span('enrich', item_count=len(items)):
+            metrics.add('nutrition_receipt_lookups_queued', value=len(items))
+            # Coroutines start in a copy of this context, so lookup spans nest under 'enrich'
+            future_to_index = {upstream_async.submit(lookup_async(item)): i for i, item in enumerate(items)}
+            for future in as_completed(future_to_index):
+                yield future_to_index[future], future.result()
+        return
+
+    def lookup(item):
+        metrics.add('nutrition_receipt_lookups_queued', value=-1)
+        metrics.add('nutrition_receipt_lookups_active')
+        try:
+            return get_nutrition_from_web(item["name"])
+        except Exception as e:
+            print(f"Nutrition lookup error for '{item['name']}': {e}")
+            return None
+        finally:
+            metrics.add('nutrition_receipt_lookups_active', value=-1)
+
+    with span('enrich', item_count=len(items)), \
+            ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        metrics.add('nutrition_receipt_lookups_queued', value=len(items))
+        # Each task gets its own copy of the context so lookup spans nest under 'enrich'
+        future_to_index = {executor.submit(wrap_context(lookup), item): i for i, item in enumerate(items)}
+        for future in as_completed(future_to_index):
+            yield future_to_index[future], future.result()
+
+def stream_receipt_events(image_bytes=None, image_path=None, started_at=None, image=None):
+    """
+    Run the receipt pipeline and yield progress events as they become available.
     
-    return results
+    Args:
+        image_bytes (bytes, optional): Encoded receipt image from an upload
+        image_path (str, optional): Path to a receipt image on disk
+        started_at (float, optional): time.perf_counter() value when the request
+            started; timings are measured from here (defaults to now)
+        image (numpy.ndarray, optional): Receipt already decoded with
+            decode_receipt_image, used instead of image_bytes
+        
+    Yields:
+        dict: Events in this order
+            {'type': 'items', 'items': [...]}                    parsed line items
+            {'type': 'nutrition', 'index': 0, 'found': True,
+             'item': {...item, ...nutrition}}                   one per item, as lookups finish
+            {'type': 'summary', 'item_count': 3, 'matched_count': 2,
+             'time_to_items_ms': 812.4, 'time_to_first_result_ms': 1034.9,
+             'total_ms': 2210.7}
+    """
+
+    if started_at is None:
+        started_at = time.perf_counter()
+
+    def elapsed_ms():
+        return round((time.perf_counter() - started_at) * 1000, 1)
+
+    if image is None and image_bytes is not None:
+        image = decode_receipt_image(image_bytes)
+        if image is None:
+            raise ValueError("Uploaded file is not a readable image")
+    if image is not None:
+        text = extract_text_from_image(image)
+    else:
+        text = extract_text_from_receipt(image_path)
+
+    items = parse_receipt_items(text) if text else []
+    yield {'type': 'items', 'items': items}
+    time_to_items = elapsed_ms()
+
+    time_to_first_result = None
+    matched = 0
+    for index, nutrition in enrich_receipt_items(items):
+        if time_to_first_result is None:
+            time_to_first_result = elapsed_ms()
+        found = bool(nutrition)
+        matched += found
+        yield {
+            'type': 'nutrition',
+            'index': index,
+            'found': found,
+            'item': {**items[index], **(nutrition or {})}
+        }
+
+    yield {
+        'type': 'summary',
+        'item_count': len(items),
+        'matched_count': matched,
+        'time_to_items_ms': time_to_items,
+        'time_to_first_result_ms': time_to_first_result,
+        'total_ms': elapsed_ms()
+    }
 
 def get_purdue_menu_nutrition(menu_item_name):
     """
@@ -165,27 +354,22 @@ def get_purdue_menu_nutrition(menu_item_name):
         menu_item_name (str): Name of the menu item from Purdue dining
         
     Returns:
-        dict: Nutrition information per serving (same format as get_nutrition_from_web)
+        dict: Nutrition information per serving (same format as get_nutrition_from_web),
+            plus 'nutrients': every other value in the item's Nutrition array
+            ({'sodium': 410.0, 'dietary_fiber': 3.0, ...})
             Returns None if item not found
+    
+    Raises:
+        requests.HTTPError: If HFS fails with anything other than 404 (429, 5xx)
     """
 
-    base = "https://api.hfs.purdue.edu/menus/v2/items/"
-    item_name = menu_item_name.replace(" ", "%20")
-    url = base + item_name
-
-    res = requests.get(url)
-    if res.status_code != 200:
+    with metrics.upstream('hfs'):
+        res = requests.get(upstream.hfs_item_url(menu_item_name))
+    if res.status_code == 404:
         return None
+    res.raise_for_status()
 
-    data = res.json()
-    return {
-        "serving_size_value": 1.0,
-        "serving_size_unit": "serving",
-        "calories_per_serving": data.get("Calories", 0),
-        "protein_g_per_serving": data.get("Protein", 0),
-         "carbs_g_per_serving": data.get("Carbohydrates", 0),
-         "fat_g_per_serving": data.get("TotalFat", 0)
-     }
+    return upstream.parse_hfs_item(res.json())
 
 def scrape_purdue_daily_menu(date=None):
     """
@@ -199,12 +383,15 @@ def scrape_purdue_daily_menu(date=None):
             [
                 {
                     'name': 'Grilled Chicken Breast',
+                    'dining_hall': 'Wiley',
+                    'meal': 'Lunch',
                     'serving_size_value': 1.0,
                     'serving_size_unit': 'serving',
                     'calories_per_serving': 200,
                     'protein_g_per_serving': 30.0,
                     'carbs_g_per_serving': 0.0,
-                    'fat_g_per_serving': 8.0
+                    'fat_g_per_serving': 8.0,
+                    'nutrients': {'sodium': 450.0, 'dietary_fiber': 0.0, ...}
                 },
                 ...
             ]
@@ -213,24 +400,23 @@ def scrape_purdue_daily_menu(date=None):
     if date is None:
         date = dt.today().isoformat()
 
-    base = "https://api.hfs.purdue.edu/menus/v2/locations"
-    halls = requests.get(base).json()["Location"]
+    with metrics.upstream('hfs'):
+        halls = upstream.parse_hfs_locations(requests.get(upstream.hfs_locations_url()).json())
 
     all_items = []
 
-    for hall in halls:
-        loc = hall["Location"]
-        menu_url = f"https://api.hfs.purdue.edu/menus/v2/locations/{loc}/{date}"
-        data = requests.get(menu_url).json()
-
-        for meal in data.get("Meals", []):
-            for station in meal.get("Stations", []):
-                for item in station.get("Items", []):
-                    name = item["Name"]
-                    all_items.append({
-                        "name": name,
-                        **(get_purdue_menu_nutrition(name) or {})
-                    })
+    for loc in halls:
+        with metrics.upstream('hfs'):
+            data = requests.get(upstream.hfs_menu_url(loc, date)).json()
+
+        for name, entry in upstream.parse_hfs_menu(loc, data):
+            # One item's failed lookup keeps that item, without nutrition, rather than failing the menu
+            try:
+                nutrition = get_purdue_menu_nutrition(name)
+            except Exception as e:
+                print(f"Menu nutrition lookup error for '{name}': {e}")
+                nutrition = None
+            all_items.append({**entry, **(nutrition or {})})
     return all_items
 
 # Example usage and expected return values:
@@ -238,8 +424,8 @@ if __name__ == "__main__":
     import sys
     import json
     
-    # Test with an actual receipt image
-    test_image = "uploads/receipt_0f4858f850124f07a569801e1f8205b8.jpg"
+    # Test with the synthetic receipt image (benchmarks/synthetic_receipt.py)
+    test_image = "benchmarks/synthetic_receipt.png"
     
     if len(sys.argv) > 1:
         test_image = sys.argv[1]
@@ -17,6 +17,8 @@ const Dashboard = ({ user }) => {
     goal_protein_g: 120,
     goal_macros_pct: [25, 50, 25]
   });
+  const [recommendations, setRecommendations] = useState([]);
+  const [weightChange, setWeightChange] = useState(null);
   const [loading, setLoading] = useState(true);
   const [date, setDate] = useState(new Date().toISOString().split('T')[0]);
 
@@ -26,9 +28,14 @@ const Dashboard = ({ user }) => {
 
   const fetchDailyNutrition = async () => {
     try {
-      const response = await axios.get(`/meals/${user.id}/${date}`);
+      const response = await axios.get(`/dashboard/${user.id}/${date}`);
       if (response.data.success) {
         setNutrition(response.data.nutrition);
+        if (response.data.goals) {
+          setGoals(response.data.goals);
+        }
+        setRecommendations(response.data.recommendations);
+        setWeightChange(response.data.projected_weight_change_lbs_per_week);
       }
     } catch (error) {
       console.error('Error fetching nutrition:', error);
@@ -99,16 +106,7 @@ const Dashboard = ({ user }) => {
     return Math.min((current / goal) * 100, 100);
   };
 
-  const getDeficiencies = () => {
-    const deficiencies = [];
-    const proteinPct = getProgressPercentage(nutrition.protein_g, goals.goal_protein_g);
-    
-    if (proteinPct < 80) {
-      deficiencies.push('Add more protein to meet your goals!');
-    }
-    
-    return deficiencies;
-  };
+  const getDeficiencies = () => recommendations;
 
   if (loading) {
     return (
@@ -245,6 +243,9 @@ const Dashboard = ({ user }) => {
               {nutrition.protein_g > 0 && (
                 <span> Your protein intake is {Math.round((nutrition.protein_g / goals.goal_protein_g) * 100)}% of your goal.</span>
               )}
+              {weightChange !== null && (
+                <span> At this intake you would {weightChange < 0 ? 'lose' : 'gain'} about {Math.abs(weightChange)} lbs per week.</span>
+              )}
             </p>
           </div>
         </div>
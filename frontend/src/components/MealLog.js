@@ -18,6 +18,10 @@ const MealLog = ({ user }) => {
   const [purdueQuery, setPurdueQuery] = useState('');
   const [purdueResult, setPurdueResult] = useState(null);
 
+  // Every logged entry, newest first, a page at a time
+  const [history, setHistory] = useState([]);
+  const [historyCursor, setHistoryCursor] = useState(null);
+
   const [newMeal, setNewMeal] = useState({
     food_name: '',
     quantity_servings: 1,
@@ -29,36 +33,20 @@ const MealLog = ({ user }) => {
     fetchMeals();
   }, [date]);
 
+  useEffect(() => {
+    fetchHistory();
+  }, []);
+
   const fetchMeals = async () => {
     try {
-      const response = await axios.get(`/meals/${user.id}/${date}`);
+      // Entries are listed newest first: start after the selected day and keep that day's
+      const nextDay = new Date(`${date}T00:00:00Z`);
+      nextDay.setUTCDate(nextDay.getUTCDate() + 1);
+      const response = await axios.get(`/meals/${user.id}/entries`, {
+        params: { before: nextDay.toISOString().split('T')[0], limit: 200 }
+      });
       if (response.data.success) {
-        // For demo purposes, we'll create mock meal data
-        // In a real app, this would come from the API
-        setMeals([
-          {
-            id: 1,
-            food_name: 'Apple',
-            quantity_servings: 1,
-            meal_type: 'snack',
-            source: 'manual',
-            calories: 80,
-            protein_g: 0.3,
-            carbs_g: 21,
-            fat_g: 0.2
-          },
-          {
-            id: 2,
-            food_name: 'Grilled Chicken Breast',
-            quantity_servings: 1,
-            meal_type: 'lunch',
-            source: 'purdue_menu',
-            calories: 200,
-            protein_g: 30,
-            carbs_g: 0,
-            fat_g: 8
-          }
-        ]);
+        setMeals(response.data.entries.filter((entry) => entry.entry_date === date).map(toMeal));
       }
     } catch (error) {
       console.error('Error fetching meals:', error);
@@ -67,6 +55,32 @@ const MealLog = ({ user }) => {
     }
   };
 
+  const fetchHistory = async (before) => {
+    try {
+      const response = await axios.get(`/meals/${user.id}/entries`, { params: before ? { before } : {} });
+      if (response.data.success) {
+        const entries = response.data.entries.map(toMeal);
+        setHistory(before ? [...history, ...entries] : entries);
+        setHistoryCursor(response.data.next_before);
+      }
+    } catch (error) {
+      console.error('Error fetching meal history:', error);
+    }
+  };
+
+  const toMeal = (entry) => ({
+    id: entry.id,
+    entry_date: entry.entry_date,
+    food_name: entry.food.name,
+    quantity_servings: entry.quantity_servings,
+    meal_type: entry.meal_type || 'snack',
+    source: entry.source,
+    calories: Math.round(entry.nutrition.calories),
+    protein_g: Math.round(entry.nutrition.protein_g * 10) / 10,
+    carbs_g: Math.round(entry.nutrition.carbs_g * 10) / 10,
+    fat_g: Math.round(entry.nutrition.fat_g * 10) / 10
+  });
+
   const handleAddMeal = async (e) => {
     e.preventDefault();
     
@@ -77,7 +91,8 @@ const MealLog = ({ user }) => {
       });
       
       if (response.data.success) {
-        setMeals([...meals, { id: response.data.meal_id, ...newMeal }]);
+        fetchMeals();
+        fetchHistory();
         setNewMeal({
           food_name: '',
           quantity_servings: 1,
@@ -94,14 +109,30 @@ const MealLog = ({ user }) => {
   const handleReceiptUpload = async () => {
     if (!receiptFile) return;
     setUploadingReceipt(true);
+    setParsedFoods([]);
     try {
       const form = new FormData();
       form.append('file', receiptFile);
-      const resp = await axios.post('/receipt/process', form, {
-        headers: { 'Content-Type': 'multipart/form-data' }
+      form.append('user_id', user.id);  // receipt rate limits are per user
+      // Stream results: parsed items arrive first, then nutrition per item as lookups finish
+      const resp = await fetch(`${axios.defaults.baseURL}/receipt/process?stream=1`, {
+        method: 'POST',
+        body: form
       });
-      if (resp.data.success) {
-        setParsedFoods(resp.data.foods || []);
+      if (!resp.ok || !resp.body) {
+        throw new Error(`Receipt upload failed (${resp.status})`);
+      }
+
+      const reader = resp.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.filter(Boolean).forEach((line) => handleReceiptEvent(JSON.parse(line)));
       }
     } catch (err) {
       console.error('Error uploading receipt:', err);
@@ -110,6 +141,20 @@ const MealLog = ({ user }) => {
     }
   };
 
+  const handleReceiptEvent = (event) => {
+    if (event.type === 'items') {
+      setParsedFoods(event.items.map((item) => ({ ...item, pending: true })));
+    } else if (event.type === 'nutrition') {
+      setParsedFoods((foods) => foods.map((food, idx) => (
+        idx === event.index ? { ...event.item, pending: false, found: event.found } : food
+      )));
+    } else if (event.type === 'summary') {
+      console.debug(`Receipt: first result ${event.time_to_first_result_ms} ms, total ${event.total_ms} ms`);
+    } else if (event.type === 'error') {
+      console.error('Receipt processing error:', event.error);
+    }
+  };
+
   const addParsedFoodAsMeal = async (food) => {
     try {
       const payload = {
@@ -121,7 +166,8 @@ const MealLog = ({ user }) => {
       };
       const response = await axios.post('/meals', payload);
       if (response.data.success) {
-        setMeals([...meals, { id: response.data.meal_id, ...payload }]);
+        fetchMeals();
+        fetchHistory();
       }
     } catch (e) {
       console.error('Error adding parsed food:', e);
@@ -154,7 +200,8 @@ const MealLog = ({ user }) => {
         calories_per_serving: purdueResult.calories_per_serving,
         protein_g_per_serving: purdueResult.protein_g_per_serving,
         carbs_g_per_serving: purdueResult.carbs_g_per_serving,
-        fat_g_per_serving: purdueResult.fat_g_per_serving
+        fat_g_per_serving: purdueResult.fat_g_per_serving,
+        nutrients: purdueResult.nutrients
       };
       try {
         await axios.post('/foods', foodPayload);
@@ -172,7 +219,8 @@ const MealLog = ({ user }) => {
       };
       const response = await axios.post('/meals', mealPayload);
       if (response.data.success) {
-        setMeals([...meals, { id: response.data.meal_id, ...mealPayload }]);
+        fetchMeals();
+        fetchHistory();
       }
     } catch (e) {
       console.error('Error adding purdue item:', e);
@@ -320,7 +368,12 @@ const MealLog = ({ user }) => {
             <div key={idx} className="flex flex-between" style={{ padding: '8px 0' }}>
               <div>
                 <div style={{ fontWeight: 600 }}>{f.name || 'Unknown Item'}</div>
-                <div className="text-muted" style={{ fontSize: '0.9rem' }}>Qty: {f.quantity || 1} {f.unit || ''}</div>
+                <div className="text-muted" style={{ fontSize: '0.9rem' }}>
+                  Qty: {f.quantity || 1} {f.unit || ''}
+                  {f.pending && ' • looking up nutrition...'}
+                  {!f.pending && f.found && ` • ${f.calories_per_serving} cal`}
+                  {!f.pending && f.found === false && ' • nutrition not found'}
+                </div>
               </div>
               <button className="btn" onClick={() => addParsedFoodAsMeal(f)}>Add</button>
             </div>
@@ -485,6 +538,34 @@ const MealLog = ({ user }) => {
           </div>
         )}
       </div>
+
+      {/* History */}
+      {history.length > 0 && (
+        <div className="card mt-4">
+          <h3 style={{ marginBottom: '20px' }}>History</h3>
+          {history.map((meal) => (
+            <div key={meal.id} className="flex flex-between" style={{ padding: '8px 0' }}>
+              <div>
+                <div style={{ fontWeight: 600 }}>{meal.food_name}</div>
+                <div className="text-muted" style={{ fontSize: '0.9rem' }}>
+                  {meal.entry_date} • {getMealTypeIcon(meal.meal_type)} {meal.meal_type} • {meal.quantity_servings} serving{meal.quantity_servings !== 1 ? 's' : ''}
+                </div>
+              </div>
+              <div className="text-right">
+                <div style={{ fontWeight: 'bold' }}>{meal.calories} cal</div>
+                <div className="text-muted" style={{ fontSize: '0.9rem' }}>
+                  {meal.protein_g}g P • {meal.carbs_g}g C • {meal.fat_g}g F
+                </div>
+              </div>
+            </div>
+          ))}
+          {historyCursor && (
+            <button className="btn btn-secondary mt-4" onClick={() => fetchHistory(historyCursor)}>
+              Load older entries
+            </button>
+          )}
+        </div>
+      )}
     </div>
   );
 };
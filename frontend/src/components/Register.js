@@ -9,6 +9,7 @@ const Register = ({ onLogin }) => {
     password: '',
     weight_lbs: '',
     height_inches: '',
+    age: '',
     sex: '',
     activity_level: ''
   });
@@ -190,6 +191,20 @@ const Register = ({ onLogin }) => {
             </div>
           </div>
 
+          <div className="form-group">
+            <label className="form-label">Age</label>
+            <input
+              type="number"
+              name="age"
+              value={formData.age}
+              onChange={handleChange}
+              className="form-input"
+              placeholder="20"
+              min="1"
+              step="1"
+            />
+          </div>
+
           <div className="grid grid-2">
             <div className="form-group">
               <label className="form-label">Sex *</label>
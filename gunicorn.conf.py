@@ -0,0 +1,73 @@
+"""
+Production server settings for the Nutrition Tracker API.
+
+gunicorn reads this file automatically when started from this directory:
+
+    gunicorn app:app                  # or: python start.py --prod
+
+A master process forks SERVER_WORKERS worker processes, each serving
+requests on SERVER_THREADS threads. Every value comes from config.py, so the
+same environment variables tune both the server and the app.
+
+Reloads and shutdown:
+    kill -HUP <master pid>     # start new workers, then let the old ones finish in-flight requests
+    kill -TERM <master pid>    # graceful shutdown (SERVER_GRACEFUL_TIMEOUT seconds to drain)
+
+Workers are also replaced after SERVER_MAX_REQUESTS requests (plus jitter)
+to cap slow memory growth in the per-process caches.
+"""
+
+import multiprocessing
+import sys
+
+# gunicorn reads every module-level name as a setting, and `config` is one of them
+import config as app_config
+
+bind = f'{app_config.SERVER_HOST}:{app_config.SERVER_PORT}'
+workers = app_config.SERVER_WORKERS or multiprocessing.cpu_count() * 2 + 1
+worker_class = 'gthread'
+threads = app_config.SERVER_THREADS
+keepalive = app_config.SERVER_KEEPALIVE
+max_requests = app_config.SERVER_MAX_REQUESTS
+max_requests_jitter = app_config.SERVER_MAX_REQUESTS_JITTER
+timeout = app_config.SERVER_TIMEOUT
+graceful_timeout = app_config.SERVER_GRACEFUL_TIMEOUT
+preload_app = app_config.SERVER_PRELOAD
+pidfile = app_config.SERVER_PIDFILE or None
+accesslog = app_config.SERVER_ACCESS_LOG or None
+
+
+def when_ready(server):
+    """Runs in the master once the app is loaded, before any worker is forked"""
+    if app_config.SERVER_PRELOAD_DEPS and 'app' in sys.modules:
+        # Workers fork with the deferred modules imported and the caches warm, sharing their pages
+        timings = sys.modules['app'].preload()
+        server.log.info(f"Preloaded {', '.join(f'{name} ({ms:.0f} ms)' for name, ms in timings.items())}")
+    # With preload_app the master imported app.py, which started the upload sweeper (and
+    # preload() opened a database connection). Neither may be shared with forked workers:
+    # close the connection and stop the thread here, and let each worker open/start its own.
+    if 'upload_retention' in sys.modules:
+        sys.modules['upload_retention'].stop_upload_sweeper()
+    if 'DB' in sys.modules:
+        sys.modules['DB'].close_connection()
+
+
+def post_fork(server, worker):
+    """Runs in each new worker process"""
+    import metrics
+    import upload_retention
+
+    # Samples the master recorded while preloading belong to the master, not this worker
+    metrics.reset_after_fork()
+    # DB.py opens this process's own connections on first use; in-memory caches forked
+    # from the master (warm with SERVER_PRELOAD_DEPS) have no lock held (the master runs
+    # no app threads after when_ready)
+    upload_retention.start_upload_sweeper()
+    server.log.info(f"Worker {worker.pid} ready ({threads} threads)")
+
+
+def post_worker_init(worker):
+    """Runs in each worker once it has imported the app, before it accepts requests"""
+    if app_config.SERVER_PRELOAD_DEPS and not app_config.SERVER_PRELOAD:
+        import app
+        app.preload()
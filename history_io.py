@@ -0,0 +1,259 @@
+"""
+Bulk export and import of a user's meal history as CSV or NDJSON.
+
+An export has one record per meal entry, oldest first, carrying its food per
+serving so the file alone is enough to rebuild the history on another
+account or tracker:
+
+    id,entry_date,meal_type,source,quantity_servings,food_name,serving_size_value,serving_size_unit,
+    calories_per_serving,protein_g_per_serving,carbs_g_per_serving,fat_g_per_serving
+
+It is read HISTORY_EXPORT_CHUNK_ROWS entries at a time (DB.get_meal_history)
+and written out chunk by chunk, so memory stays flat however long the history.
+
+An import takes the same columns; id is ignored and only entry_date,
+food_name and quantity_servings are required (meal_type defaults to snack,
+source to manual). Records are read from the upload as a stream and checked
+one at a time; a bad record is skipped and reported, not fatal. Food names are
+looked up a batch at a time, and a name that isn't in the foods table yet is
+created from the record's per-serving macros. Every HISTORY_IMPORT_BATCH_ROWS
+valid records go in with one executemany in one transaction, so an import
+that stops part way keeps the batches before it. Importing appends: the same
+file imported twice logs every entry twice.
+"""
+
+import csv
+import io
+import math
+from datetime import date
+
+import DB
+import config
+import json_codec
+import lazy_import
+
+FIELDS = ('id', 'entry_date', 'meal_type', 'source', 'quantity_servings', 'food_name',
+          'serving_size_value', 'serving_size_unit', 'calories_per_serving', 'protein_g_per_serving',
+          'carbs_g_per_serving', 'fat_g_per_serving')
+MACRO_FIELDS = ('calories_per_serving', 'protein_g_per_serving', 'carbs_g_per_serving', 'fat_g_per_serving')
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner', 'snack')
+SOURCES = ('purdue_menu', 'receipt', 'manual')
+
+# format -> Content-Type of an export
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+_FORMAT_TYPES = {
+    'text/csv': 'csv', 'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson', 'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson', 'application/x-jsonlines': 'ndjson',
+}
+_FORMAT_EXTENSIONS = {'csv': 'csv', 'ndjson': 'ndjson', 'jsonl': 'ndjson'}
+
+
+def detect_format(mimetype, filename=''):
+    """Import format from an upload's content type or file extension, or None"""
+    if mimetype in _FORMAT_TYPES:
+        return _FORMAT_TYPES[mimetype]
+    return _FORMAT_EXTENSIONS.get((filename or '').rpartition('.')[2].lower())
+
+
+# ==================== EXPORT ====================
+
+def history_chunks(user_id, chunk_rows=None):
+    """A user's DB.get_meal_history rows, oldest first, as lists of up to chunk_rows (at least one, maybe empty)"""
+    chunk_rows = chunk_rows or config.HISTORY_EXPORT_CHUNK_ROWS
+    after = None
+    while True:
+        rows = DB.get_meal_history(user_id, after, chunk_rows)
+        yield rows
+        if len(rows) < chunk_rows:
+            return
+        after = (rows[-1][1], rows[-1][0])
+
+
+def export_chunks(user_id, fmt, chunk_rows=None):
+    """The export file for a user in fmt ('csv' or 'ndjson'), one piece per chunk of entries"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(FIELDS)
+        for rows in history_chunks(user_id, chunk_rows):
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    else:
+        for rows in history_chunks(user_id, chunk_rows):
+            if rows:
+                yield b''.join(json_codec.dumpb(dict(zip(FIELDS, row))) + b'\n' for row in rows)
+
+
+# ==================== IMPORT ====================
+
+def read_records(stream, fmt):
+    """(record number, dict) for each record in a binary stream of CSV or NDJSON, read incrementally.
+
+    Numbers count records from 1 (a CSV header and blank NDJSON lines aren't counted). A record
+    that isn't an object comes back as its parse error instead of a dict. Errors that stop the
+    file from being read any further (bad UTF-8, broken CSV quoting) are raised as ValueError.
+    """
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            try:
+                yield from enumerate(reader, 1)
+            except csv.Error as e:
+                raise ValueError(f'CSV line {reader.line_num}: {e}')
+        else:
+            number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    record = json_codec.loads(line)
+                except ValueError:
+                    record = ValueError('not valid JSON')
+                yield number, record if isinstance(record, (dict, ValueError)) else ValueError('not a JSON object')
+    finally:
+        # Leave the request's stream open for whoever owns it
+        text.detach()
+
+
+def _number(record, field, default=None):
+    value = record.get(field)
+    if value in (None, ''):
+        if default is None:
+            raise ValueError(f'{field} is required')
+        return default
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be a number')
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f'{field} must be a non-negative number')
+    return value
+
+
+def _entry_date(value):
+    # fromisoformat is several times faster than strptime, which dominated import time, but it
+    # also takes other ISO forms (20250101, 2025-W01-1); the shape check keeps it to YYYY-MM-DD
+    value = str(value or '')
+    try:
+        if len(value) != 10 or value[4] != '-' or value[7] != '-':
+            raise ValueError
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError('entry_date must be YYYY-MM-DD')
+
+
+def parse_record(record):
+    """
+    Validate one import record.
+
+    Returns:
+        tuple: (food_name, (quantity_servings, meal_type, source, entry_date), food) where food is
+               (serving_size_value, serving_size_unit, calories, protein_g, carbs_g, fat_g) when the
+               record has per-serving macros, else None
+
+    Raises:
+        ValueError: Describing the first problem with the record
+    """
+    if isinstance(record, ValueError):
+        raise record
+    name = str(record.get('food_name') or '').strip()
+    if not name:
+        raise ValueError('food_name is required')
+    quantity = _number(record, 'quantity_servings')
+    if quantity <= 0:
+        raise ValueError('quantity_servings must be positive')
+    entry_date = _entry_date(record.get('entry_date'))
+    meal_type = record.get('meal_type') or 'snack'
+    if meal_type not in MEAL_TYPES:
+        raise ValueError(f"meal_type must be one of {', '.join(MEAL_TYPES)}")
+    source = record.get('source') or 'manual'
+    if source not in SOURCES:
+        raise ValueError(f"source must be one of {', '.join(SOURCES)}")
+
+    food = None
+    if any(record.get(field) not in (None, '') for field in MACRO_FIELDS):
+        food = (_number(record, 'serving_size_value', 1.0), str(record.get('serving_size_unit') or 'serving'),
+                *(_number(record, field) for field in MACRO_FIELDS))
+    return name, (quantity, meal_type, source, entry_date), food
+
+
+def import_history(user_id, stream, fmt, batch_rows=None):
+    """
+    Add every valid record of a CSV or NDJSON stream to a user's meal entries.
+
+    Args:
+        user_id (int): User the entries are logged for
+        stream: Binary file-like object (an upload or the request body)
+        fmt (str): 'csv' or 'ndjson'
+        batch_rows (int, optional): Valid records per transaction (default HISTORY_IMPORT_BATCH_ROWS)
+
+    Returns:
+        dict: {'rows': records read, 'imported': entries added, 'foods_created', 'skipped': records
+               rejected, 'errors': [{'row', 'error'}] for the first HISTORY_IMPORT_MAX_ERRORS of them}
+               plus 'error' if the stream could not be read to the end (batches before it are kept)
+    """
+    batch_rows = batch_rows or config.HISTORY_IMPORT_BATCH_ROWS
+    result = {'rows': 0, 'imported': 0, 'foods_created': 0, 'skipped': 0, 'errors': []}
+    food_ids = {}  # name -> food_id, carried across batches
+    batch = []
+    try:
+        for number, record in read_records(stream, fmt):
+            result['rows'] += 1
+            try:
+                batch.append((number, parse_record(record)))
+            except ValueError as e:
+                _skip(result, number, str(e))
+            if len(batch) >= batch_rows:
+                _insert_batch(user_id, batch, food_ids, result)
+                batch = []
+    except ValueError as e:
+        result['error'] = str(e)
+    _insert_batch(user_id, batch, food_ids, result)
+    return result
+
+
+def _skip(result, number, error):
+    result['skipped'] += 1
+    if len(result['errors']) < config.HISTORY_IMPORT_MAX_ERRORS:
+        result['errors'].append({'row': number, 'error': error})
+
+
+def _insert_batch(user_id, batch, food_ids, result):
+    """Resolve a batch's food names (creating the new ones) and insert its entries in one transaction"""
+    if not batch:
+        return
+    food_ids.update(DB.get_food_ids({name for _, (name, _, _) in batch} - food_ids.keys()))
+
+    # Names still unknown are created from the batch's first record that gives their macros
+    new_foods = {}
+    for _, (name, _, food) in batch:
+        if food is not None and name not in food_ids:
+            new_foods.setdefault(name, (name, *food))
+    entries = []
+    for number, (name, entry, _) in batch:
+        if name in food_ids:
+            entries.append((food_ids[name], *entry))
+        elif name in new_foods:
+            entries.append((name, *entry))
+        else:
+            _skip(result, number, f"Food '{name}' not found in database. Include its per-serving macros to create it.")
+
+    created = DB.add_meal_entries(user_id, entries, new_foods.values())
+    food_ids.update(created)
+    result['imported'] += len(entries)
+    result['foods_created'] += len(created)
+
+    # Until the index is first used it is built from the table, which now has these foods
+    if created and lazy_import.loaded('food_index'):
+        from food_index import food_index
+        for name, food_id in created.items():
+            calories, protein_g, carbs_g, fat_g = new_foods[name][3:]
+            food_index.add({'source': 'foods', 'food_id': food_id, 'name': name, 'calories': calories,
+                            'protein_g': protein_g, 'carbs_g': carbs_g, 'fat_g': fat_g})
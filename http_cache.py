@@ -0,0 +1,166 @@
+"""
+HTTP conditional caching (ETag / Last-Modified / 304) for read endpoints.
+
+A route computes its resource's ETag from a version it can read cheaply
+(the meal_versions write counter, the menu snapshot's mtime) and calls
+not_modified() before doing any real work; a matching If-None-Match (or,
+without one, an If-Modified-Since no older than Last-Modified) gets an empty
+304 straight away. Payloads that are expensive to rebuild - menus and HFS
+item lookups - are also kept serialized in a PayloadCache, so a changed-or-
+missing ETag can often be answered without rebuilding the JSON either.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import Response, current_app, request
+from werkzeug.http import http_date, parse_date, parse_etags
+
+import config
+
+
+def make_etag(*parts):
+    """Strong ETag from version parts, e.g. make_etag('meals', 7, '2025-10-09', 12) -> '"meals-7-2025-10-09-12"'"""
+    return '"' + '-'.join(str(part) for part in parts) + '"'
+
+
+def content_etag(body):
+    """Strong ETag from a serialized body, for payloads without a cheap version"""
+    return '"' + hashlib.blake2b(body.encode('utf-8'), digest_size=12).hexdigest() + '"'
+
+
+def parse_timestamp(value):
+    """SQLite CURRENT_TIMESTAMP text ('YYYY-MM-DD HH:MM:SS', UTC) -> aware datetime; None passes through"""
+    if value is None:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+
+def is_fresh(etag, if_none_match, if_modified_since, last_modified=None):
+    """
+    True if a client sending these conditional headers already has this version.
+
+    Takes the raw header values so the Flask routes (not_modified) and asgi.py
+    make the same decision.
+
+    Args:
+        etag (str): Current ETag of the resource (from make_etag / content_etag)
+        if_none_match (str): The request's If-None-Match, or None
+        if_modified_since (str): The request's If-Modified-Since, or None
+        last_modified (datetime, optional): Only consulted when the request has no If-None-Match
+    """
+    if if_none_match:
+        return parse_etags(if_none_match).contains_weak(etag.strip('"'))
+    since = parse_date(if_modified_since)
+    return since is not None and last_modified is not None and last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag, cache_control, last_modified=None):
+    """[(name, value)] of the ETag, Cache-Control and Last-Modified headers for a 200 or 304"""
+    headers = [('ETag', etag), ('Cache-Control', cache_control)]
+    if last_modified is not None:
+        headers.append(('Last-Modified', http_date(last_modified)))
+    return headers
+
+
+def _set_headers(response, etag, cache_control, last_modified=None):
+    for name, value in validator_headers(etag, cache_control, last_modified):
+        response.headers[name] = value
+    return response
+
+
+def not_modified(etag, cache_control, last_modified=None):
+    """
+    Answer the current request with 304 if the client already has this version.
+
+    Args:
+        etag (str): Current ETag of the resource (from make_etag / content_etag)
+        cache_control (str): Cache-Control to repeat on the 304
+        last_modified (datetime, optional): Only consulted when the request has no If-None-Match
+
+    Returns:
+        Response: An empty 304 response, or None when the full response must be sent
+    """
+    if not is_fresh(etag, request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since'),
+                    last_modified):
+        return None
+    return _set_headers(Response(status=304), etag, cache_control, last_modified)
+
+
+def cacheable(response, etag, cache_control, last_modified=None):
+    """Add validators and Cache-Control to a full (200) response"""
+    return _set_headers(response, etag, cache_control, last_modified)
+
+
+def serialize(payload):
+    """JSON body exactly as jsonify() would produce it"""
+    return current_app.json.dumps(payload) + '\n'
+
+
+def json_response(etag, body, cache_control, status=200):
+    """Full response from a pre-serialized body"""
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    return _set_headers(response, etag, cache_control)
+
+
+class PayloadCache:
+    """Bounded, thread-safe LRU of serialized JSON bodies and their ETags, with optional expiry"""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = config.HTTP_PAYLOAD_CACHE_SIZE if max_entries is None else max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, etag, body)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key, etag=None):
+        """
+        Get a cached (etag, body).
+
+        Args:
+            key: Cache key
+            etag (str, optional): Only accept an entry with this ETag (for versioned payloads)
+
+        Returns:
+            tuple: (etag, body), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time() or (etag is not None and entry[1] != etag):
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1], entry[2]
+
+    def put(self, key, payload, etag=None, ttl=None):
+        """
+        Serialize and cache a payload.
+
+        Args:
+            key: Cache key
+            payload: JSON-serializable response data
+            etag (str, optional): Version-derived ETag; defaults to a hash of the body
+            ttl (float, optional): Seconds to keep it (default: until evicted)
+
+        Returns:
+            tuple: (etag, body)
+        """
+        body = serialize(payload)
+        etag = etag or content_etag(body)
+        expires_at = time.time() + ttl if ttl is not None else float('inf')
+        with self._lock:
+            self._entries[key] = (expires_at, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+payload_cache = PayloadCache()
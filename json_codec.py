@@ -0,0 +1,112 @@
+"""
+JSON encoding for API responses, menu snapshots and scraper output.
+
+Uses orjson when it is installed (and JSON_BACKEND isn't 'stdlib'), which
+serializes a full-day menu several times faster than the json module;
+otherwise everything goes through the stdlib. Output is equivalent either
+way: sorted keys for API responses, dates in Flask's HTTP-date format, and
+anything orjson can't encode (ints beyond 64 bits, Decimal, ...) falls back to
+the stdlib encoder.
+
+    import json_codec
+    json_codec.install(app)           # jsonify() and app.json use the fast encoder
+    json_codec.dumps(obj)             # str
+    json_codec.dump(obj, f, indent=True)
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+import config
+
+try:
+    if config.JSON_BACKEND == 'stdlib':
+        raise ImportError
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'stdlib'
+
+
+def _stdlib_default(default):
+    """default for json.dumps that also handles numpy arrays/scalars, as orjson does (OPT_SERIALIZE_NUMPY)"""
+    def encode(obj):
+        if hasattr(obj, 'tolist'):
+            return obj.tolist()
+        if default is not None:
+            return default(obj)
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return encode
+
+
+def dumpb(obj, indent=False, sort_keys=False, default=None):
+    """
+    Serialize to UTF-8 bytes.
+
+    Args:
+        obj: Data to serialize
+        indent (bool): Pretty-print with two-space indentation
+        sort_keys (bool): Sort object keys
+        default (callable, optional): Called for objects the encoder doesn't know
+
+    Returns:
+        bytes: The JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            pass  # e.g. an int beyond 64 bits; the stdlib handles it (or raises the usual error)
+    return json.dumps(obj, indent=2 if indent else None, separators=None if indent else (',', ':'),
+                      sort_keys=sort_keys, ensure_ascii=False, default=_stdlib_default(default)).encode('utf-8')
+
+
+def dumps(obj, indent=False, sort_keys=False, default=None):
+    """dumpb() as a str"""
+    return dumpb(obj, indent, sort_keys, default).decode('utf-8')
+
+
+def loads(data):
+    """Parse a JSON str or bytes"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dump(obj, f, indent=False):
+    """Write obj to a file opened in text mode (utf-8)"""
+    f.write(dumps(obj, indent=indent))
+
+
+def load(f):
+    """Read a JSON document from a file opened in text or binary mode"""
+    return loads(f.read())
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumpb()/loads(), with DefaultJSONProvider's output conventions"""
+
+    def dumps(self, obj, **kwargs):
+        return self._dumpb(obj, indent=kwargs.get('indent') is not None).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumpb(obj, indent=indent) + b'\n', mimetype=self.mimetype)
+
+    def _dumpb(self, obj, indent=False):
+        return dumpb(obj, indent=indent, sort_keys=self.sort_keys, default=self.default)
+
+
+def install(app):
+    """Use JSONProvider for app.json (jsonify, request.get_json, app.json.dumps)"""
+    app.json = JSONProvider(app)
+    return app.json
@@ -0,0 +1,84 @@
+"""
+Modules imported on first use instead of at startup.
+
+numpy/scipy (batch calculations, projections, planning, recommendations) and
+the receipt stack (OpenCV, Tesseract, requests) take hundreds of milliseconds
+and tens of MB to import, which every worker would pay before serving its
+first request, even when it never uses them. app.py binds them as proxies:
+
+    purdue_menu = lazy_import.module('purdue_menu')
+    purdue_menu.load_snapshot()    # imported here, on first attribute access
+
+A proxy stands in for the module everywhere the module would (attributes,
+truthiness), so call sites don't change. preload() imports everything that
+was deferred, for servers that would rather pay at startup (see
+SERVER_PRELOAD_DEPS).
+"""
+
+import importlib
+import importlib.util
+import sys
+import time
+
+_modules = []  # every LazyModule, in creation order
+
+
+def available(*names):
+    """True if every named module can be imported (found on the path; nothing is executed)"""
+    return all(importlib.util.find_spec(name) is not None for name in names)
+
+
+def loaded(name):
+    """True once a module has actually been imported (by a proxy or anything else)"""
+    return name in sys.modules
+
+
+class LazyModule:
+    """Proxy that imports its module on first attribute access"""
+
+    __slots__ = ('_name', '_module')
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            # The import lock makes concurrent first uses wait for one import
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def module(name):
+    """A LazyModule for name, included in preload()"""
+    proxy = LazyModule(name)
+    _modules.append(proxy)
+    return proxy
+
+
+def stats():
+    """module name -> whether it has been imported yet, for /api/health"""
+    return {proxy._name: loaded(proxy._name) for proxy in _modules}
+
+
+def preload():
+    """
+    Import every deferred module now.
+
+    Returns:
+        dict: module name -> import time in ms (0 for ones already imported)
+    """
+    timings = {}
+    for proxy in _modules:
+        start = time.perf_counter()
+        proxy._load()
+        timings[proxy._name] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
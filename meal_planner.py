@@ -0,0 +1,151 @@
+"""
+Meal planner: pick dining-hall item combinations that fill a user's remaining
+calories and macros.
+
+Plans are sets of distinct menu items (one serving each) from a single dining
+hall. The search is a beam-limited branch-and-bound over the menu's
+precomputed macro matrix: combinations grow one item at a time in index
+order, every partial combination is scored as a plan, and a combination is
+only extended while its overshoot (which more items can never reduce) stays
+below the current k-th best score.
+"""
+
+import heapq
+
+import numpy as np
+
+import config
+
+# Errors are compared in kcal: calories as-is, protein and carbs x4, fat x9
+KCAL_SCALE = np.array([1.0, 4.0, 4.0, 9.0])
+# Going over what's left counts this much more than falling short
+OVERSHOOT_PENALTY = 2.0
+
+TARGET_FIELDS = ('calories', 'protein_g', 'carbs_g', 'fat_g')
+
+
+def remaining_targets(targets, nutrition):
+    """
+    Subtract today's totals from daily targets.
+
+    Args:
+        targets (dict): {'calories', 'protein_g', 'carbs_g', 'fat_g'} (macros may be None)
+        nutrition (dict): Totals from DB.get_user_daily_nutrition
+
+    Returns:
+        dict: Remaining amounts (never negative; None where the target is None)
+    """
+    eaten = {'calories': nutrition['calories'], 'protein_g': nutrition['protein_g'],
+             'carbs_g': nutrition['carbs_g'], 'fat_g': nutrition['fat_g']}
+    return {field: (max(targets[field] - (eaten[field] or 0), 0) if targets.get(field) is not None else None)
+            for field in TARGET_FIELDS}
+
+
+def _search(vectors, target, weights, max_items, count, beam_width, best, tag=None):
+    """
+    Push the best combinations of distinct rows of `vectors` (kcal units) into `best`.
+
+    `best` is a heap of (-score, tag, combo) holding at most `count` plans; it
+    can be shared across searches so earlier ones tighten the pruning bound.
+    """
+    m = len(vectors)
+    if m == 0:
+        return
+    norm = max(target[0], 1.0) ** 2
+    columns = np.arange(m)
+
+    frontier_sums = np.zeros((1, 4))
+    frontier_last = np.array([-1])
+    frontier_combos = [()]
+
+    for _ in range(max_items):
+        # Work one nutrient at a time on contiguous (frontier, item) matrices
+        score = np.zeros((len(frontier_last), m))
+        bound = np.zeros((len(frontier_last), m))
+        for d in range(4):
+            if weights[d] == 0:
+                continue
+            err = frontier_sums[:, d, None] + vectors[None, :, d]
+            err -= target[d]
+            sq = err * err
+            sq *= weights[d] / norm
+            score += sq
+            # Overshoot can't be undone by adding items, so it bounds every extension
+            sq *= err > 0
+            bound += sq
+        score += (OVERSHOOT_PENALTY - 1) * bound
+        bound *= OVERSHOOT_PENALTY
+
+        valid = columns[None, :] > frontier_last[:, None]
+        score[~valid] = np.inf
+
+        # Record the best plans at this size
+        flat = score.ravel()
+        take = min(count, int(valid.sum()))
+        if take == 0:
+            break
+        top = np.argpartition(flat, take - 1)[:take]
+        for idx in top.tolist():
+            row, col = divmod(idx, m)
+            entry = (-float(flat[idx]), tag, frontier_combos[row] + (col,))
+            if len(best) < count:
+                heapq.heappush(best, entry)
+            elif entry[0] > best[0][0]:
+                heapq.heapreplace(best, entry)
+
+        # Branch only where the unavoidable overshoot beats the k-th best plan
+        kth = -best[0][0] if len(best) == count else np.inf
+        expandable = np.flatnonzero((valid & (bound < kth) & (columns[None, :] < m - 1)).ravel())
+        if len(expandable) == 0:
+            break
+        if len(expandable) > beam_width:
+            keep = np.argpartition(flat[expandable], beam_width - 1)[:beam_width]
+            expandable = expandable[keep]
+
+        rows, cols = np.divmod(expandable, m)
+        frontier_sums = frontier_sums[rows] + vectors[cols]
+        frontier_last = cols
+        frontier_combos = [frontier_combos[r] + (c,) for r, c in zip(rows.tolist(), cols.tolist())]
+
+
+def plan_meals(menu, remaining, dining_hall=None, meal=None, max_items=None, count=None, beam_width=None):
+    """
+    Find the item combinations that best fill the remaining targets.
+
+    Args:
+        menu (PurdueMenu): Ingested menu to search
+        remaining (dict): {'calories', 'protein_g', 'carbs_g', 'fat_g'}; macros may be None to ignore them
+        dining_hall (str, optional): Only plan from this hall (default: plan each hall separately)
+        meal (str, optional): Only items served at this meal (when the menu records meals)
+        max_items (int, optional): Most items per plan (default config.PLANNER_MAX_ITEMS)
+        count (int, optional): Number of plans to return (default config.PLANNER_RESULTS)
+        beam_width (int, optional): Partial plans kept per size (default config.PLANNER_BEAM_WIDTH)
+
+    Returns:
+        list[dict]: Plans, best first: {'dining_hall', 'items', 'totals', 'score'}
+    """
+    max_items = max_items or config.PLANNER_MAX_ITEMS
+    count = count or config.PLANNER_RESULTS
+    beam_width = beam_width or config.PLANNER_BEAM_WIDTH
+
+    target = np.array([remaining.get(field) or 0.0 for field in TARGET_FIELDS], dtype=np.float64) * KCAL_SCALE
+    weights = np.array([1.0] + [0.0 if remaining.get(field) is None else 1.0 for field in TARGET_FIELDS[1:]])
+
+    halls = [dining_hall] if dining_hall else menu.dining_halls() or [None]
+    pools = {}
+    best = []
+    for hall in halls:
+        pool = pools[hall] = menu.distinct_indices(hall, meal)
+        _search(menu.macros[pool] * KCAL_SCALE, target, weights, max_items, count, beam_width, best, hall)
+
+    plans = []
+    for neg_score, hall, combo in sorted(best, reverse=True):
+        indices = pools[hall][list(combo)]
+        totals = menu.macros[indices].sum(axis=0)
+        plans.append({
+            'dining_hall': hall or menu.items[indices[0]].get('dining_hall'),
+            'items': [menu.items[i] for i in indices.tolist()],
+            'totals': {field: round(float(value), 1) for field, value in zip(TARGET_FIELDS, totals)},
+            'score': round(-neg_score, 4)
+        })
+    return plans
@@ -0,0 +1,276 @@
+"""
+Prometheus metrics for the API: request counts and latency per route, requests
+in flight, DB query and upstream HTTP timings, queue depths and cache gauges.
+
+Recording never takes a lock. Each thread writes to its own shard (plain
+dicts of counters and histogram bucket lists); /api/metrics sums the shards
+when it is scraped. When a thread exits its shard is folded into a retired
+total, so per-request threads (Flask's dev server) don't accumulate. Gauges
+that already exist elsewhere (cache sizes and hit counts) are read at scrape
+time through register_collector() callbacks.
+
+Under gunicorn every worker process keeps its own metrics and a scrape is
+answered by whichever worker receives it; each sample carries a `pid` label
+so series from different workers stay distinct (aggregate with
+`sum without (pid)`).
+"""
+
+import math
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 0.5, 2)
+UPSTREAM_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# name -> (help, label names, buckets)
+HISTOGRAMS = {
+    'nutrition_http_request_duration_seconds': (
+        'Time to produce a response, by route template, method and status', ('route', 'method', 'status'),
+        REQUEST_BUCKETS),
+    'nutrition_db_query_duration_seconds': (
+        'SQLite statement time through DB.py, by DB.py function', ('operation',), DB_BUCKETS),
+    'nutrition_upstream_request_duration_seconds': (
+        'Outbound HTTP request time, by upstream and outcome', ('upstream', 'outcome'), UPSTREAM_BUCKETS),
+}
+
+# name -> (type, help, label names)
+COUNTERS = {
+    'nutrition_http_requests_in_flight': ('gauge', 'Requests currently being handled by this process', ()),
+    'nutrition_receipt_lookups_queued': (
+        'gauge', 'Receipt nutrition lookups waiting for a lookup thread', ()),
+    'nutrition_receipt_lookups_active': ('gauge', 'Receipt nutrition lookups in progress', ()),
+    'nutrition_requests_rejected_total': (
+        'counter', 'Requests refused by rate_limit.py, by route class and reason', ('route_class', 'reason')),
+}
+
+_PID = str(os.getpid())
+
+
+class _Shard:
+    """One thread's counters and histograms"""
+
+    __slots__ = ('histograms', 'counters')
+
+    def __init__(self):
+        self.histograms = {name: {} for name in HISTOGRAMS}  # name -> labels -> [bucket counts..., +Inf, sum]
+        self.counters = {}  # (name, labels) -> value
+
+    def merge(self, other):
+        for name, series in other.histograms.items():
+            totals = self.histograms[name]
+            for labels, values in list(series.items()):
+                mine = totals.get(labels)
+                if mine is None:
+                    totals[labels] = list(values)
+                else:
+                    for i, value in enumerate(values):
+                        mine[i] += value
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+class _Sentinel:
+    __slots__ = ('__weakref__',)
+
+
+_local = threading.local()
+_lock = threading.Lock()  # guards _live and _retired, never taken while recording
+_live = set()
+_retired = _Shard()
+_collectors = []
+
+
+def _retire(shard):
+    with _lock:
+        if shard in _live:
+            _live.discard(shard)
+            _retired.merge(shard)
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        # The sentinel lives only in this thread's locals, so it is collected when the thread exits
+        _local.sentinel = _Sentinel()
+        weakref.finalize(_local.sentinel, _retire, shard)
+        with _lock:
+            _live.add(shard)
+    return shard
+
+
+def reset_after_fork():
+    """Drop samples inherited from a parent process (call in a forked worker)"""
+    global _PID, _retired
+    _local.__dict__.clear()
+    with _lock:
+        _live.clear()
+        _retired = _Shard()
+    _PID = str(os.getpid())
+
+
+# ==================== RECORDING ====================
+
+def observe(name, labels, seconds):
+    """Add one observation to a histogram from HISTOGRAMS; labels is a tuple in its label order"""
+    # Called for every SQL statement, so the common path is kept to a few dict lookups
+    try:
+        series = _local.shard.histograms[name]
+    except AttributeError:
+        series = _shard().histograms[name]
+    buckets = HISTOGRAMS[name][2]
+    values = series.get(labels)
+    if values is None:
+        values = series[labels] = [0] * (len(buckets) + 1) + [0.0]
+    values[bisect_left(buckets, seconds)] += 1
+    values[-1] += seconds
+
+
+def add(name, labels=(), value=1):
+    """Add to a counter or up/down gauge from COUNTERS"""
+    key = (name, labels)
+    counters = _shard().counters
+    counters[key] = counters.get(key, 0) + value
+
+
+@contextmanager
+def upstream(name):
+    """Time an outbound HTTP request: `with metrics.upstream('hfs'): requests.get(...)`"""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        observe('nutrition_upstream_request_duration_seconds', (name, outcome), time.perf_counter() - start)
+
+
+def register_collector(collector):
+    """
+    Add a scrape-time callback.
+
+    The callback returns [(name, type, help, [(labels dict, value), ...]), ...];
+    exceptions are reported as nutrition_collector_errors_total rather than failing the scrape.
+    """
+    _collectors.append(collector)
+
+
+# ==================== EXPOSITION ====================
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items()) + [('pid', _PID)]
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        return repr(value) if math.isfinite(value) else ('+Inf' if value > 0 else '-Inf')
+    return str(value)
+
+
+def snapshot():
+    """Sum every shard into one _Shard"""
+    total = _Shard()
+    with _lock:
+        total.merge(_retired)
+        shards = list(_live)
+    for shard in shards:
+        # Other threads may add keys meanwhile; copying the dicts first keeps iteration safe
+        copy = _Shard()
+        copy.histograms = {name: {labels: list(values) for labels, values in list(series.items())}
+                           for name, series in shard.histograms.items()}
+        copy.counters = dict(list(shard.counters.items()))
+        total.merge(copy)
+    return total
+
+
+def render():
+    """All metrics in Prometheus text exposition format (version 0.0.4)"""
+    total = snapshot()
+    lines = []
+
+    for name, (help_text, label_names, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, values in sorted(total.histograms[name].items()):
+            cumulative = 0
+            for bound, count in zip(buckets + (float('inf'),), values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'{name}_bucket{_labels(label_names, labels, le=le)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(label_names, labels)} {values[-1]!r}')
+            lines.append(f'{name}_count{_labels(label_names, labels)} {cumulative}')
+
+    for name, (metric_type, help_text, label_names) in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+        samples = sorted((labels, value) for (metric, labels), value in total.counters.items() if metric == name)
+        for labels, value in samples or [((), 0)]:
+            lines.append(f'{name}{_labels(label_names, labels)} {_format(value)}')
+
+    errors = 0
+    for collector in _collectors:
+        try:
+            families = collector()
+        except Exception:
+            errors += 1
+            continue
+        for name, metric_type, help_text, samples in families:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+            for labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f'{name}{_labels(list(labels), list(labels.values()))} {_format(value)}')
+    lines += ['# HELP nutrition_collector_errors_total Scrape-time collectors that raised',
+              '# TYPE nutrition_collector_errors_total gauge',
+              f'nutrition_collector_errors_total{_labels((), ())} {errors}']
+    return '\n'.join(lines) + '\n'
+
+
+# ==================== FLASK ====================
+
+def init_app(app, path='/api/metrics'):
+    """Record every request and serve the metrics at path"""
+    from flask import Response, g, request
+
+    def route_labels(status):
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        return rule, request.method, status
+
+    @app.before_request
+    def start_request():
+        g.metrics_start = time.perf_counter()
+        add('nutrition_http_requests_in_flight')
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            observe('nutrition_http_request_duration_seconds', route_labels(str(response.status_code)),
+                    time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            # record_request never ran: the view raised
+            observe('nutrition_http_request_duration_seconds', route_labels('500'), time.perf_counter() - start)
+        add('nutrition_http_requests_in_flight', value=-1)
+
+    def metrics_view():
+        return Response(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule(path, 'metrics', metrics_view, methods=['GET'])
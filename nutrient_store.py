@@ -0,0 +1,211 @@
+"""
+Columnar store of the nutrients a food reports beyond the four macros.
+
+The HFS API lists a dozen or more nutrients per item (sodium, fiber, sugars,
+saturated fat, cholesterol, vitamins, minerals). The `foods` row stays
+macro-only so the calorie/macro queries keep their current shape; everything
+else is kept here as one fixed-width float column per nutrient (array('d'),
+8 bytes a value, NaN where a food doesn't report it) indexed by a food_id ->
+row map. The columns are persisted long-form in `food_nutrients` and loaded
+on first use.
+
+Each worker process keeps its own copy, so writes from other workers are
+picked up by version: triggers count every food_nutrients change in
+`table_versions`, and at most every FOOD_STORE_SYNC_INTERVAL seconds the store
+compares that count with the one it loaded and reloads when they differ. Its
+own writes move its version along without a reload.
+"""
+
+import math
+import re
+import threading
+import time
+from array import array
+
+import DB
+import config
+
+NAN = float('nan')
+
+# HFS nutrients already stored as foods columns (keyed by nutrient_key)
+MACRO_KEYS = {'calories': 'calories', 'protein': 'protein_g', 'total_carbohydrate': 'carbs_g', 'total_fat': 'fat_g'}
+
+
+def nutrient_key(name):
+    """Normalize a nutrient label ("Saturated fat", "Vitamin D (IU)") to a key ("saturated_fat", "vitamin_d_iu")"""
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def parse_hfs_nutrients(nutrition, include_macros=True):
+    """
+    Read every numeric value from an HFS item's `Nutrition` array.
+
+    Args:
+        nutrition (list[dict]): [{'Name': 'Sodium', 'Value': 410, ...}, ...]
+        include_macros (bool): Also return calories, protein, total_carbohydrate and total_fat
+
+    Returns:
+        dict: {nutrient_key: amount per serving}
+    """
+    nutrients = {}
+    for nutrient in nutrition or []:
+        key = nutrient_key(nutrient.get('Name') or '')
+        value = nutrient.get('Value')
+        if not key or isinstance(value, bool) or (not include_macros and key in MACRO_KEYS):
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(value):
+            nutrients[key] = value
+    return nutrients
+
+
+class NutrientStore:
+    """food_id -> row in one array('d') column per nutrient"""
+
+    def __init__(self):
+        self._rows = {}
+        self._columns = {}
+        self._size = 0
+        self._loaded = False
+        self._version = None  # food_nutrients version the columns reflect
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _row(self, food_id):
+        row = self._rows.get(food_id)
+        if row is None:
+            row = self._rows[food_id] = self._size
+            self._size += 1
+            for column in self._columns.values():
+                column.append(NAN)
+        return row
+
+    def _set(self, row, nutrient, amount):
+        column = self._columns.get(nutrient)
+        if column is None:
+            column = self._columns[nutrient] = array('d', [NAN]) * self._size
+        column[row] = amount
+
+    def load(self):
+        """(Re)load every column from the food_nutrients table"""
+        # Version first: a write landing between the two reads makes the next check reload again
+        version = DB.get_table_version('food_nutrients')
+        rows = DB.get_all_food_nutrients()
+        with self._lock:
+            self._rows, self._columns, self._size = {}, {}, 0
+            for food_id, nutrient, amount in rows:
+                self._set(self._row(food_id), nutrient, amount)
+            self._version = version
+            self._checked_at = time.monotonic()
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+        elif time.monotonic() - self._checked_at >= config.FOOD_STORE_SYNC_INTERVAL:
+            self._checked_at = time.monotonic()
+            if DB.get_table_version('food_nutrients') != self._version:
+                self.load()
+
+    def set_nutrients(self, food_id, nutrients):
+        """
+        Store a food's extra nutrients, replacing any it had.
+
+        Args:
+            food_id (int): Row id in `foods`
+            nutrients (dict): {nutrient: amount per serving}; the four macros are ignored
+
+        Returns:
+            dict: The nutrients actually stored
+        """
+        kept = {}
+        for name, amount in (nutrients or {}).items():
+            key = nutrient_key(str(name))
+            if key and key not in MACRO_KEYS and isinstance(amount, (int, float)) and not isinstance(amount, bool) \
+                    and math.isfinite(amount):
+                kept[key] = float(amount)
+
+        self._ensure_loaded()
+        before, after = DB.set_food_nutrients(food_id, kept)
+        with self._lock:
+            row = self._row(food_id)
+            for column in self._columns.values():
+                column[row] = NAN
+            for nutrient, amount in kept.items():
+                self._set(row, nutrient, amount)
+            # Only this write happened since the columns were current: they still are
+            if self._version == before:
+                self._version = after
+        return kept
+
+    def get(self, food_id):
+        """Get a food's extra nutrients as a dict (empty when none are stored)"""
+        self._ensure_loaded()
+        with self._lock:
+            row = self._rows.get(food_id)
+            if row is None:
+                return {}
+            return {name: column[row] for name, column in self._columns.items() if not math.isnan(column[row])}
+
+    def nutrients(self):
+        """Names of every nutrient column"""
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._columns)
+
+    def totals(self, servings):
+        """
+        Sum nutrients over logged servings.
+
+        Args:
+            servings (list[tuple]): (food_id, servings) pairs, e.g. from DB.get_daily_food_servings
+
+        Returns:
+            dict: {'totals': {nutrient: amount}, 'coverage': {nutrient: share of logged foods reporting it}}
+                  for every nutrient at least one of the foods reports
+        """
+        self._ensure_loaded()
+        totals, counts = {}, {}
+        with self._lock:
+            rows = [(self._rows.get(food_id), quantity or 0) for food_id, quantity in servings]
+            for name, column in self._columns.items():
+                total, count = 0.0, 0
+                for row, quantity in rows:
+                    if row is not None and not math.isnan(column[row]):
+                        total += column[row] * quantity
+                        count += 1
+                if count:
+                    totals[name], counts[name] = round(total, 2), count
+        return {'totals': totals, 'coverage': {name: round(count / len(rows), 3) for name, count in counts.items()}}
+
+    def daily_totals(self, user_id, date=None):
+        """totals() for everything a user logged on a date"""
+        return self.totals(DB.get_daily_food_servings(user_id, date))
+
+    def export(self, nutrients):
+        """
+        Copy the food_id map and some columns for vectorized use.
+
+        Returns:
+            tuple: (food_ids as array('q') in row order, {nutrient: array('d') copy}); unknown
+                   nutrients come back as all-NaN columns
+        """
+        self._ensure_loaded()
+        with self._lock:
+            food_ids = array('q', [0]) * self._size
+            for food_id, row in self._rows.items():
+                food_ids[row] = food_id
+            columns = {name: array('d', self._columns[name]) if name in self._columns
+                       else array('d', [NAN]) * self._size for name in nutrients}
+        return food_ids, columns
+
+    def stats(self):
+        with self._lock:
+            return {'foods': self._size, 'nutrients': len(self._columns),
+                    'bytes': sum(column.itemsize * len(column) for column in self._columns.values())}
+
+
+nutrient_store = NutrientStore()
@@ -0,0 +1,232 @@
+"""
+NumPy-vectorized batch versions of the nutrition_calculations functions.
+
+Each function takes arrays (or lists) of inputs and returns results that are
+identical, element for element, to calling the scalar function in a loop:
+same rounding (Python's round-half-even, including round(x, 1) on floats),
+same 2000 kcal TDEE fallback for unusable inputs, same [0, 0, 0] macro split
+for non-positive calories.
+"""
+
+import numpy as np
+
+from nutrition_calculations import getMacros, calculateTDEE, getWeightChange
+
+# Keep these in sync with calculateTDEE
+LBS_TO_KG = 0.453592
+INCHES_TO_CM = 2.54
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2,
+    'light': 1.375,
+    'moderate': 1.55,
+    'active': 1.725,
+    'very_active': 1.9
+}
+DEFAULT_ACTIVITY_MULTIPLIER = 1.2
+TDEE_FALLBACK = 2000
+
+
+def _as_1d_array(values):
+    """np.asarray that returns None instead of raising for ragged or nested input"""
+    try:
+        arr = np.asarray(values)
+    except ValueError:
+        return None
+    return arr if arr.ndim == 1 else None
+
+
+def _as_float_array(values):
+    """
+    Convert a column to float64, marking entries the scalar code would reject.
+
+    Returns:
+        tuple: (float64 array, bool array of invalid entries). Invalid entries
+        (None, strings, ...) are NaN in the value array.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'biuf':
+        arr = values.astype(np.float64, copy=False).ravel()
+        return arr, np.zeros(arr.shape, dtype=bool)
+
+    arr = _as_1d_array(values)
+    if arr is not None and arr.dtype.kind in 'biuf':
+        return arr.astype(np.float64, copy=False), np.zeros(arr.shape, dtype=bool)
+
+    # Mixed column (None, strings, ...): classify element by element
+    values = list(values)
+    invalid = np.fromiter(
+        (isinstance(v, (str, bytes)) or not isinstance(v, (int, float, np.number)) for v in values),
+        dtype=bool, count=len(values)
+    )
+    if invalid.any():
+        arr = np.array([np.nan if bad else v for v, bad in zip(values, invalid)], dtype=np.float64)
+    else:
+        arr = np.array(values, dtype=np.float64)
+    return arr, invalid
+
+
+def _check_lengths(*columns):
+    lengths = {len(c) for c in columns}
+    if len(lengths) > 1:
+        raise ValueError("All input columns must have the same length")
+    return lengths.pop() if lengths else 0
+
+
+def _round_half_even(x, ndigits):
+    """
+    Vectorized equivalent of Python's round(float, ndigits).
+
+    np.round scales by 10**ndigits before rounding, which can disagree with
+    Python's correctly-rounded result when the scaled value lands on (or within
+    float error of) a .5 tie. Those few elements are recomputed with round().
+    """
+    scale = 10.0 ** ndigits
+    scaled = x * scale
+    result = np.rint(scaled) / scale
+
+    with np.errstate(invalid='ignore'):
+        frac = np.abs(scaled - np.trunc(scaled))
+        near_tie = np.abs(frac - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        result[i] = round(float(x[i]), ndigits)
+    return result
+
+
+def calculateBMRBatch(weight_lbs, height_inches, age, sex):
+    """
+    Mifflin-St Jeor BMR for many people at once (same formula as calculateTDEE).
+
+    Returns:
+        tuple: (float64 BMR array, bool array of rows with unusable inputs)
+    """
+    n = _check_lengths(weight_lbs, height_inches, age, sex)
+    weight, bad_weight = _as_float_array(weight_lbs)
+    height, bad_height = _as_float_array(height_inches)
+    ages, bad_age = _as_float_array(age)
+
+    sexes = _as_1d_array(sex)
+    if sexes is not None and sexes.dtype.kind == 'U':
+        is_male = sexes == 'male'
+    else:
+        is_male = np.fromiter((s == 'male' for s in sex), dtype=bool, count=n)
+    offset = np.where(is_male, 5.0, -161.0)
+
+    # Same operation order as calculateTDEE so results match bit for bit
+    bmr = 10 * (weight * LBS_TO_KG) + 6.25 * (height * INCHES_TO_CM) - 5 * ages + offset
+    return bmr, bad_weight | bad_height | bad_age
+
+
+def calculateTDEEBatch(weight_lbs, height_inches, age, sex, activity_level):
+    """
+    Vectorized calculateTDEE.
+
+    Args:
+        weight_lbs, height_inches, age: Numeric columns (lists or arrays)
+        sex (list[str]): 'male' or anything else (treated as female)
+        activity_level (list[str]): Activity level names (unknown -> sedentary)
+
+    Returns:
+        numpy.ndarray: int64 TDEE per row; rows calculateTDEE would reject get 2000
+    """
+    n = _check_lengths(weight_lbs, height_inches, age, sex, activity_level)
+    bmr, invalid = calculateBMRBatch(weight_lbs, height_inches, age, sex)
+
+    levels = _as_1d_array(activity_level)
+    if levels is not None and levels.dtype.kind == 'U':
+        # Map each distinct level once, then broadcast back to rows
+        distinct, inverse = np.unique(levels, return_inverse=True)
+        lookup = np.array([ACTIVITY_MULTIPLIERS.get(level, DEFAULT_ACTIVITY_MULTIPLIER) for level in distinct.tolist()],
+                          dtype=np.float64)
+        multipliers = lookup[inverse] if n else np.empty(0, dtype=np.float64)
+    else:
+        multipliers = np.empty(n, dtype=np.float64)
+        for i, level in enumerate(activity_level):
+            try:
+                multipliers[i] = ACTIVITY_MULTIPLIERS.get(level, DEFAULT_ACTIVITY_MULTIPLIER)
+            except TypeError:  # unhashable level makes the scalar dict lookup raise
+                multipliers[i] = np.nan
+                invalid[i] = True
+
+    tdee = np.rint(bmr * multipliers)
+    usable = ~invalid & np.isfinite(tdee)
+    result = np.full(n, TDEE_FALLBACK, dtype=np.int64)
+    result[usable] = tdee[usable].astype(np.int64)
+    return result
+
+
+def getMacrosBatch(calories, protein, carbs, fats):
+    """
+    Vectorized getMacros.
+
+    Returns:
+        numpy.ndarray: (n, 3) float64 array of [protein_pct, carbs_pct, fat_pct] rows
+    """
+    n = _check_lengths(calories, protein, carbs, fats)
+    cal, bad_cal = _as_float_array(calories)
+    pro, bad_pro = _as_float_array(protein)
+    carb, bad_carb = _as_float_array(carbs)
+    fat, bad_fat = _as_float_array(fats)
+
+    zero = bad_cal | (cal <= 0)
+    # getMacros raises (and returns zeros) on a bad macro only after the calorie check passes
+    zero |= bad_pro | bad_carb | bad_fat
+
+    result = np.zeros((n, 3), dtype=np.float64)
+    rows = ~zero
+    if rows.any():
+        c = cal[rows]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result[rows, 0] = _round_half_even(((pro[rows] * 4) / c) * 100, 1)
+            result[rows, 1] = _round_half_even(((carb[rows] * 4) / c) * 100, 1)
+            result[rows, 2] = _round_half_even(((fat[rows] * 9) / c) * 100, 1)
+    return result
+
+
+def getWeightChangeBatch(tdee, calorie_intake):
+    """
+    Vectorized getWeightChange.
+
+    Returns:
+        numpy.ndarray: float64 lbs/week per row (0.0 where getWeightChange would fail)
+    """
+    _check_lengths(tdee, calorie_intake)
+    t, bad_t = _as_float_array(tdee)
+    intake, bad_intake = _as_float_array(calorie_intake)
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        change = _round_half_even(((intake - t) * 7) / 3500, 2)
+    change[bad_t | bad_intake] = 0.0
+    return change
+
+
+def verify_against_scalar(sample_size=1000, seed=0):
+    """
+    Compare the batch functions with the scalar ones on random inputs.
+
+    Returns:
+        dict: Number of mismatches per function (all zero when consistent)
+    """
+    rng = np.random.default_rng(seed)
+    n = sample_size
+    weight = rng.uniform(90, 350, n).round(1)
+    height = rng.uniform(55, 80, n).round(1)
+    age = rng.integers(16, 90, n)
+    sex = rng.choice(['male', 'female'], n).tolist()
+    activity = rng.choice(list(ACTIVITY_MULTIPLIERS) + ['unknown'], n).tolist()
+    calories = rng.uniform(-100, 5000, n).round(0)
+    protein = rng.uniform(0, 300, n).round(1)
+    carbs = rng.uniform(0, 500, n).round(1)
+    fats = rng.uniform(0, 200, n).round(1)
+
+    tdee = calculateTDEEBatch(weight, height, age, sex, activity)
+    macros = getMacrosBatch(calories, protein, carbs, fats)
+    change = getWeightChangeBatch(tdee, calories)
+
+    mismatches = {'calculateTDEE': 0, 'getMacros': 0, 'getWeightChange': 0}
+    for i in range(n):
+        if calculateTDEE(float(weight[i]), float(height[i]), int(age[i]), sex[i], activity[i]) != tdee[i]:
+            mismatches['calculateTDEE'] += 1
+        if getMacros(float(calories[i]), float(protein[i]), float(carbs[i]), float(fats[i])) != macros[i].tolist():
+            mismatches['getMacros'] += 1
+        if getWeightChange(int(tdee[i]), float(calories[i])) != change[i]:
+            mismatches['getWeightChange'] += 1
+    return mismatches
@@ -0,0 +1,223 @@
+"""
+Persistent cache for per-serving nutrition lookups.
+
+Web lookups (nutritionvalue.org) are slow and most receipts repeat the same
+staples, so results are kept in the `nutrition_cache` table keyed by a
+normalized food name and mirrored in memory. Lookups that find nothing are
+cached too, with a much shorter TTL, so OCR noise lines are not retried on
+every receipt. A lookup that failed (timeout, 429, 5xx) raises instead of
+returning None and is not cached at all.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import DB
+import config
+
+# Receipt lookups run on several threads at once; keep cache-table reads and writes in order
+_db_lock = threading.Lock()
+
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_food_name(food_name):
+    """
+    Normalize a food name into a cache key.
+
+    Args:
+        food_name (str): Raw food name (e.g. from a receipt line)
+
+    Returns:
+        str: Lowercased name with punctuation removed and whitespace collapsed
+    """
+    if not food_name:
+        return ''
+    key = _NON_ALNUM.sub(' ', food_name.lower())
+    return _WHITESPACE.sub(' ', key).strip()
+
+
+class NutritionCache:
+    """Two-level (memory + SQLite) cache with TTLs and negative entries"""
+
+    def __init__(self, ttl=None, negative_ttl=None, warm_load=None, max_entries=None, purge_interval=None):
+        self.ttl = config.NUTRITION_CACHE_TTL if ttl is None else ttl
+        self.negative_ttl = config.NUTRITION_CACHE_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self.warm_load = config.NUTRITION_CACHE_WARM_LOAD if warm_load is None else warm_load
+        self.max_entries = config.NUTRITION_CACHE_SIZE if max_entries is None else max_entries
+        self.purge_interval = config.NUTRITION_CACHE_PURGE_INTERVAL if purge_interval is None else purge_interval
+
+        # food_key -> (nutrition dict or None, expires_at), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}  # food_key -> the fetch in progress and its outcome
+        self._warmed = False
+        self._last_purge = time.time()
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'negative_stores': 0,
+            'expired': 0,
+            'evicted': 0,
+            'warm_loaded': 0
+        }
+
+    def _remember(self, food_key, entry):
+        """Insert or refresh an entry as most recently used, evicting the oldest past the cap (lock held)"""
+        self._entries[food_key] = entry
+        self._entries.move_to_end(food_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evicted'] += 1
+
+    def warm(self):
+        """Purge expired rows, then load the newest unexpired ones into memory (up to the cap)"""
+        self.purge_expired()
+        now = time.time()
+        with _db_lock:
+            rows = DB.get_nutrition_cache_entries(now)
+        with self._lock:
+            for food_key, nutrition_json, _, expires_at in rows[-self.max_entries:]:
+                nutrition = json.loads(nutrition_json) if nutrition_json else None
+                self._remember(food_key, (nutrition, expires_at))
+            self._stats['warm_loaded'] = len(rows)
+            self._warmed = True
+        return len(rows)
+
+    def get(self, food_name):
+        """
+        Look up a cached result.
+
+        Returns:
+            tuple: (found, nutrition) where nutrition is None for a cached miss
+        """
+        if self.warm_load and not self._warmed:
+            self.warm()
+
+        food_key = normalize_food_name(food_name)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(food_key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[food_key]
+                self._stats['expired'] += 1
+                entry = None
+            elif entry is not None:
+                self._entries.move_to_end(food_key)
+
+        if entry is None:
+            # Another worker may have stored it since we warmed
+            with _db_lock:
+                row = DB.get_nutrition_cache_entry(food_key, now)
+            if row is not None:
+                nutrition = json.loads(row[1]) if row[1] else None
+                entry = (nutrition, row[3])
+                with self._lock:
+                    self._remember(food_key, entry)
+
+        with self._lock:
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            if entry[0] is None:
+                self._stats['negative_hits'] += 1
+                return True, None
+            self._stats['hits'] += 1
+            return True, dict(entry[0])
+
+    def set(self, food_name, nutrition):
+        """Store a lookup result (pass None to record a miss)"""
+        food_key = normalize_food_name(food_name)
+        now = time.time()
+        ttl = self.ttl if nutrition is not None else self.negative_ttl
+        expires_at = now + ttl
+
+        with _db_lock:
+            DB.set_nutrition_cache_entry(
+                food_key,
+                json.dumps(nutrition) if nutrition is not None else None,
+                now,
+                expires_at
+            )
+        with self._lock:
+            self._remember(food_key, (dict(nutrition) if nutrition is not None else None, expires_at))
+            self._stats['stores' if nutrition is not None else 'negative_stores'] += 1
+            purge_due = now - self._last_purge >= self.purge_interval
+            if purge_due:
+                self._last_purge = now
+        # Expired rows are otherwise only skipped, never removed; stores run purges now and then
+        if purge_due:
+            self.purge_expired()
+
+    def get_or_fetch(self, food_name, fetch):
+        """
+        Return the cached nutrition for food_name, calling fetch(food_name) on a miss.
+
+        Concurrent misses for the same key share a single fetch, and its outcome:
+        an exception from fetch (network errors) is raised to every waiting
+        caller and is not cached.
+        """
+        food_key = normalize_food_name(food_name)
+        if not food_key:
+            return None
+
+        found, nutrition = self.get(food_name)
+        if found:
+            return nutrition
+
+        with self._lock:
+            flight = self._inflight.get(food_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[food_key] = {'done': threading.Event(), 'result': None, 'error': None}
+
+        if not leader:
+            flight['done'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return dict(flight['result']) if flight['result'] is not None else None
+
+        try:
+            nutrition = fetch(food_name)
+            self.set(food_name, nutrition)
+            flight['result'] = nutrition
+            return nutrition
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[food_key]
+            flight['done'].set()
+
+    def purge_expired(self):
+        """Drop expired entries from memory and the database"""
+        now = time.time()
+        with self._lock:
+            self._last_purge = now
+            expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            self._stats['expired'] += len(expired)
+        with _db_lock:
+            return DB.purge_nutrition_cache(now)
+
+    def stats(self):
+        """Return hit/miss counters and the current number of cached entries"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['negative_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# Shared cache used by food_input and the API
+nutrition_cache = NutritionCache()
@@ -88,6 +88,38 @@ def getMacros(calories, protein, carbs, fats):
         print(f"Error calculating macros: {e}")
         return [0.0, 0.0, 0.0]
 
+def _mifflin_st_jeor(weight_lbs, height_inches, age, sex):
+    """Unrounded Mifflin-St Jeor BMR (shared by calculateBMR and calculateTDEE)"""
+    # Convert imperial to metric for Mifflin-St Jeor equation
+    weight_kg = weight_lbs * 0.453592
+    height_cm = height_inches * 2.54
+    
+    # Mifflin-St Jeor equation for BMR (Basal Metabolic Rate)
+    if sex == 'male':
+        return 10 * weight_kg + 6.25 * height_cm - 5 * age + 5
+    else:  # female
+        return 10 * weight_kg + 6.25 * height_cm - 5 * age - 161
+
+def calculateBMR(weight_lbs, height_inches, age, sex):
+    """
+    Calculate Basal Metabolic Rate using Mifflin-St Jeor equation.
+    
+    Args:
+        weight_lbs (float): Weight in pounds
+        height_inches (float): Height in inches
+        age (int): Age in years
+        sex (str): 'male' or 'female'
+        
+    Returns:
+        int: BMR in calories per day (rounded to nearest integer)
+    """
+    try:
+        return int(round(_mifflin_st_jeor(weight_lbs, height_inches, age, sex)))
+        
+    except Exception as e:
+        print(f"Error calculating BMR: {e}")
+        return None
+
 def calculateTDEE(weight_lbs, height_inches, age, sex, activity_level):
     """
     Calculate Total Daily Energy Expenditure using Mifflin-St Jeor equation.
@@ -103,15 +135,7 @@ def calculateTDEE(weight_lbs, height_inches, age, sex, activity_level):
         int: TDEE in calories per day (rounded to nearest integer)
     """
     try:
-        # Convert imperial to metric for Mifflin-St Jeor equation
-        weight_kg = weight_lbs * 0.453592
-        height_cm = height_inches * 2.54
-        
-        # Mifflin-St Jeor equation for BMR (Basal Metabolic Rate)
-        if sex == 'male':
-            bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age + 5
-        else:  # female
-            bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age - 161
+        bmr = _mifflin_st_jeor(weight_lbs, height_inches, age, sex)
         
         # Activity multipliers
         activity_multipliers = {
@@ -230,7 +254,51 @@ def checkDeficiencies(daily_nutrition, goals):
         print(f"Error checking deficiencies: {e}")
         return ["Error analyzing nutrition data. Please try again."]
 
-def get_goals(goal_weight_change, goal_protein, goal_macros):
+# Daily limits for nutrients kept in nutrient_store, in the units the HFS labels use
+MICRONUTRIENT_LIMITS = {
+    'sodium': ('max', 2300, 'mg'),
+    'saturated_fat': ('max', 20, 'g'),
+    'added_sugar': ('max', 50, 'g'),
+    'cholesterol': ('max', 300, 'mg'),
+    'dietary_fiber': ('min', 28, 'g'),
+}
+MICRONUTRIENT_MESSAGES = {
+    'max': "Your {label} intake is {amount:.0f}{unit}, above the {limit}{unit} daily limit. Consider lower-{label} options.",
+    'min': "Your {label} intake is {amount:.0f}{unit}, below the recommended {limit}{unit}. Consider adding more whole grains, fruits and vegetables."
+}
+
+def checkMicronutrients(daily_nutrients, coverage=None):
+    """
+    Check nutrients beyond the macros against daily limits.
+    
+    Args:
+        daily_nutrients (dict): Daily totals by nutrient key, e.g. {'sodium': 3100.0, 'dietary_fiber': 12.5}
+        coverage (dict, optional): Share of logged foods that report each nutrient. A minimum is
+            only checked when every food reports it, since missing data would look like a shortfall.
+            
+    Returns:
+        list[str]: List of warnings, in MICRONUTRIENT_LIMITS order
+    """
+    try:
+        recommendations = []
+        
+        for nutrient, (kind, limit, unit) in MICRONUTRIENT_LIMITS.items():
+            amount = daily_nutrients.get(nutrient)
+            if amount is None:
+                continue
+            
+            if (kind == 'max' and amount > limit) or \
+                    (kind == 'min' and amount < limit and (coverage is None or coverage.get(nutrient, 0) >= 1)):
+                recommendations.append(MICRONUTRIENT_MESSAGES[kind].format(
+                    label=nutrient.replace('_', ' '), amount=amount, limit=limit, unit=unit))
+        
+        return recommendations
+        
+    except Exception as e:
+        print(f"Error checking micronutrients: {e}")
+        return []
+
+def get_goals(goal_weight_change, goal_protein, goal_macros, user_id=None):
     """
     Set and store user's nutrition goals.
     
@@ -238,6 +306,7 @@ def get_goals(goal_weight_change, goal_protein, goal_macros):
         goal_weight_change (float): Target weight change in lbs per week
         goal_protein (float): Target protein in grams per day
         goal_macros (list[float]): Target macro percentages [protein_pct, carbs_pct, fat_pct]
+        user_id (int, optional): User to store the goals for (validate only when omitted)
         
     Returns:
         bool: True if goals set successfully, False otherwise
@@ -265,8 +334,8 @@ def get_goals(goal_weight_change, goal_protein, goal_macros):
         if goal_protein < 50 or goal_protein > 300:
             return False
         
-        # In a full implementation, this would store the goals in the database
-        # For now, we'll just validate the data structure
+        if user_id is not None:
+            DB.set_user_goals(user_id, goal_weight_change, goal_protein, goal_macros)
         
         return True
         
@@ -330,7 +399,8 @@ if __name__ == "__main__":
     print("  • verify_login(username, password)")
     print("  • addNutrition(nutrition_list)")
     print("  • getMacros(calories, protein, carbs, fats)")
+    print("  • calculateBMR(weight_lbs, height_inches, age, sex)")
     print("  • calculateTDEE(weight_lbs, height_inches, age, gender, activity_level)")
     print("  • getWeightChange(tdee, calorie_intake)")
     print("  • checkDeficiencies(daily_nutrition, goals)")
-    print("  • get_goals(goal_weight_change, goal_protein, goal_macros)")
+    print("  • get_goals(goal_weight_change, goal_protein, goal_macros, user_id=None)")
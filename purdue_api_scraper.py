@@ -1,9 +1,11 @@
 import requests
-import json
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+import json_codec
+from nutrient_store import parse_hfs_nutrients
+
 class PurdueAPIScraper:
     def __init__(self):
         self.base_url = "https://api.hfs.purdue.edu/menus/v2/locations"
@@ -32,8 +34,10 @@ class PurdueAPIScraper:
             
             data = response.json()
             
-            # Extract food items with nutrition data
+            # Extract food items with nutrition data ([calories, carbs, protein, fat])
+            # and every other reported nutrient per item
             food_items = {}
+            food_nutrients = {}
             
             if 'Meals' in data:
                 for meal in data['Meals']:
@@ -45,16 +49,21 @@ class PurdueAPIScraper:
                                         food_name = item['Name']
                                         
                                         # Get nutrition data (we'll need to make another API call)
-                                        nutrition_data = self.get_nutrition_data(item['ID'])
+                                        nutrients = self.get_all_nutrients(item['ID'])
                                         
-                                        if nutrition_data:
-                                            food_items[food_name] = nutrition_data
+                                        if nutrients:
+                                            food_items[food_name] = [
+                                                nutrients.get('calories', 0), nutrients.get('total_carbohydrate', 0),
+                                                nutrients.get('protein', 0), nutrients.get('total_fat', 0)
+                                            ]
+                                            food_nutrients[food_name] = nutrients
             
             print(f"  ✅ Found {len(food_items)} food items with nutrition data")
             return {
                 'dining_hall': hall_name,
                 'date': date_str,
                 'food_items': food_items,
+                'food_nutrients': food_nutrients,
                 'status': 'success'
             }
             
@@ -69,36 +78,22 @@ class PurdueAPIScraper:
             }
     
     def get_nutrition_data(self, item_id):
-        """Get nutrition data for a specific food item"""
+        """Get [calories, carbs, protein, fat] for a specific food item"""
+        nutrients = self.get_all_nutrients(item_id)
+        if nutrients is None:
+            return None
+        return [nutrients.get('calories', 0), nutrients.get('total_carbohydrate', 0),
+                nutrients.get('protein', 0), nutrients.get('total_fat', 0)]
+    
+    def get_all_nutrients(self, item_id):
+        """Get every nutrient the HFS API reports for a food item, keyed by nutrient_store.nutrient_key"""
         # The correct nutrition API endpoint
         nutrition_url = f"https://api.hfs.purdue.edu/menus/v2/items/{item_id}"
         
         try:
             response = self.session.get(nutrition_url, timeout=5)
             if response.status_code == 200:
-                nutrition_data = response.json()
-                
-                # Extract the nutrition values we need from the Nutrition array
-                calories = 0
-                carbs = 0
-                protein = 0
-                fat = 0
-                
-                if 'Nutrition' in nutrition_data:
-                    for nutrient in nutrition_data['Nutrition']:
-                        name = nutrient.get('Name', '')
-                        value = nutrient.get('Value', 0)
-                        
-                        if name == 'Calories':
-                            calories = value
-                        elif name == 'Total Carbohydrate':
-                            carbs = value
-                        elif name == 'Protein':
-                            protein = value
-                        elif name == 'Total fat':
-                            fat = value
-                
-                return [calories, carbs, protein, fat]
+                return parse_hfs_nutrients(response.json().get('Nutrition'))
         except Exception as e:
             print(f"    Error getting nutrition for {item_id}: {e}")
         
@@ -170,7 +165,7 @@ class PurdueAPIScraper:
         }
         
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            json_codec.dump(data, f, indent=True)
         
         print(f"💾 Saved results to {filename}")
         print(f"📈 Total food items found: {total_foods}")
@@ -0,0 +1,186 @@
+"""
+Ingested Purdue dining menus with precomputed macro vectors.
+
+A menu snapshot is the JSON written by ingest_menu() (and the format of the
+checked-in purdue_nutrition_data.json): {'date', 'scrape_timestamp',
+'total_items', 'menu_items': [{name, dining_hall, [meal,] serving info and
+per-serving calories/protein/carbs/fat}]}. Snapshots are parsed once into a
+PurdueMenu whose macro matrix the planner and recommenders search directly.
+
+Usage:
+    python purdue_menu.py --ingest [--date YYYY-MM-DD]   # scrape and save today's menu
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import config
+import json_codec
+
+MACRO_FIELDS = ('calories_per_serving', 'protein_g_per_serving', 'carbs_g_per_serving', 'fat_g_per_serving')
+
+
+def _snapshot_date(raw):
+    """Snapshot dates are MM-DD-YYYY (HFS API style) or YYYY-MM-DD; return YYYY-MM-DD"""
+    for fmt in ('%m-%d-%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(raw, fmt).date().isoformat()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class PurdueMenu:
+    """One day's menu as item dicts plus column arrays for vectorized search"""
+
+    def __init__(self, date, items, scraped_at=None, version=None):
+        self.date = date
+        self.scraped_at = scraped_at
+        # Changes whenever the snapshot file does (used in HTTP ETags)
+        self.version = version
+        self.items = [item for item in items if item.get('name') and
+                      all(isinstance(item.get(field), (int, float)) for field in MACRO_FIELDS)]
+
+        # (n, 4) float64 rows of [calories, protein_g, carbs_g, fat_g] per serving
+        self.macros = np.array([[item[field] for field in MACRO_FIELDS] for item in self.items],
+                               dtype=np.float64).reshape(-1, 4)
+        self.halls = np.array([(item.get('dining_hall') or '').lower() for item in self.items], dtype=object)
+        self.meals = np.array([(item.get('meal') or '').lower() for item in self.items], dtype=object)
+        self._distinct = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def select(self, dining_hall=None, meal=None):
+        """
+        Indices of items served at a hall and/or meal (case-insensitive).
+
+        Snapshots without a meal field (like purdue_nutrition_data.json) keep
+        every item when filtering by meal, since the meal is unknown.
+        """
+        mask = np.ones(len(self.items), dtype=bool)
+        if dining_hall:
+            mask &= self.halls == dining_hall.lower()
+        if meal:
+            mask &= (self.meals == meal.lower()) | (self.meals == '')
+        return np.flatnonzero(mask)
+
+    def distinct_indices(self, dining_hall=None, meal=None):
+        """
+        Like select(), but one index per distinct (name, macros) with calories > 0.
+
+        The same dish is often listed at several stations of a hall. Results
+        are memoized per (hall, meal) since the menu never changes.
+        """
+        key = ((dining_hall or '').lower(), (meal or '').lower())
+        cached = self._distinct.get(key)
+        if cached is None:
+            seen = {}
+            for i in self.select(dining_hall, meal).tolist():
+                dedupe_key = (self.items[i]['name'], tuple(self.macros[i].tolist()))
+                if dedupe_key not in seen and self.macros[i, 0] > 0:
+                    seen[dedupe_key] = i
+            cached = self._distinct[key] = np.array(list(seen.values()), dtype=np.int64)
+        return cached
+
+    def dining_halls(self):
+        return sorted({item.get('dining_hall') for item in self.items if item.get('dining_hall')})
+
+
+_lock = threading.Lock()
+_cache = {}  # snapshot path -> (mtime_ns, PurdueMenu)
+
+
+def load_snapshot(path=None):
+    """Parse a menu snapshot file (cached until the file changes); None if missing"""
+    path = path or config.PURDUE_MENU_SNAPSHOT
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    with open(path, encoding='utf-8') as f:
+        data = json_codec.load(f)
+    menu = PurdueMenu(_snapshot_date(data.get('date')), data.get('menu_items', []), data.get('scrape_timestamp'),
+                      version=f'{mtime:x}')
+
+    with _lock:
+        _cache[path] = (mtime, menu)
+    return menu
+
+
+def get_menu(date=None, allow_stale=None):
+    """
+    Get the ingested menu for a date (default today).
+
+    Args:
+        date (str, optional): YYYY-MM-DD
+        allow_stale (bool, optional): Accept another day's snapshot (default PURDUE_MENU_ALLOW_STALE)
+
+    Returns:
+        PurdueMenu: The snapshot for that date, or (when allow_stale) the latest
+        snapshot of another day - compare menu.date. None if nothing usable has
+        been ingested.
+    """
+    if date is None:
+        date = datetime.now().date().isoformat()
+    if allow_stale is None:
+        allow_stale = config.PURDUE_MENU_ALLOW_STALE
+
+    menu = load_snapshot()
+    if menu is None or (menu.date != date and not allow_stale):
+        return None
+    return menu
+
+
+def ingest_menu(date=None, path=None):
+    """
+    Scrape a day's menu from the HFS API and save it as the current snapshot.
+
+    Returns:
+        PurdueMenu: The ingested menu
+    """
+    from food_input import scrape_purdue_daily_menu
+
+    date = date or datetime.now().date().isoformat()
+    path = path or config.PURDUE_MENU_SNAPSHOT
+    items = [item for item in scrape_purdue_daily_menu(date) if all(field in item for field in MACRO_FIELDS)]
+
+    data = {
+        'scrape_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'date': datetime.strptime(date, '%Y-%m-%d').strftime('%m-%d-%Y'),
+        'total_items': len(items),
+        'menu_items': items
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json_codec.dump(data, f, indent=True)
+    os.replace(tmp_path, path)
+    return load_snapshot(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest or inspect the Purdue menu snapshot')
+    parser.add_argument('--ingest', action='store_true', help='scrape the HFS API and replace the snapshot')
+    parser.add_argument('--date', help='YYYY-MM-DD (default: today)')
+    args = parser.parse_args()
+
+    menu = ingest_menu(args.date) if args.ingest else load_snapshot()
+    if menu is None:
+        print(f"❌ No menu snapshot at {config.PURDUE_MENU_SNAPSHOT}")
+        return
+    print(f"✅ {len(menu)} items for {menu.date} from {', '.join(menu.dining_halls())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Token-bucket rate limits and priority load shedding, by route class.
+
+Receipt processing (OCR plus nutrition scraping) and the live Purdue endpoints
+can hold a request thread for seconds, while meal reads take milliseconds and
+run on the same threads. Every request is put in a route class by its path:
+
+- receipt: /api/receipt/...
+- purdue: /api/purdue/...
+- default: everything else (health checks, metrics and CORS preflights are never limited)
+
+Each class has a global token bucket and one bucket per client (the remote
+address; a user_id in the request is the caller's to choose, so it would let a
+client take fresh buckets by changing it). A request takes a token from
+both or is refused with 429 and a Retry-After header saying when a token will
+be available. Buckets are kept per process, so under gunicorn the global rates
+apply to each worker.
+
+Load shedding keeps threads free for cheap requests: once this process is
+handling LOAD_SHED_<CLASS> x LOAD_SHED_CAPACITY requests (of any class), new
+requests of that class get 503 with Retry-After instead of waiting for a
+thread, so a burst of receipt uploads can't take the threads meal reads need.
+The default class is never shed.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+
+import config
+import metrics
+
+EXEMPT_PATHS = {'/api/health', '/api/metrics'}
+
+# (path prefix, route class); anything else is 'default'
+ROUTE_CLASSES = (
+    ('/api/receipt/', 'receipt'),
+    ('/api/purdue/', 'purdue'),
+)
+
+# Seconds a shed request is told to wait
+SHED_RETRY_AFTER = 1
+
+
+def classify(path):
+    """Route class for a request path"""
+    for prefix, route_class in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return route_class
+    return 'default'
+
+
+def client_key():
+    """Who a request counts against: its remote address"""
+    return request.remote_addr or ''
+
+
+def limits(route_class):
+    """(rate, burst, client rate, client burst) for a route class from config; a rate of 0 means unlimited"""
+    prefix = f'RATE_LIMIT_{route_class.upper()}'
+    return (getattr(config, f'{prefix}_RATE'), getattr(config, f'{prefix}_BURST'),
+            getattr(config, f'{prefix}_CLIENT_RATE'), getattr(config, f'{prefix}_CLIENT_BURST'))
+
+
+class TokenBucket:
+    """Holds up to burst tokens, refilled at rate tokens per second"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = now
+
+    def wait(self, now):
+        """Refill, then return seconds until a token is available (0.0 if one is)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-process buckets and in-flight count behind the before_request hook"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._global = {}  # route class -> TokenBucket
+        self._clients = OrderedDict()  # (route class, client) -> TokenBucket, least recently used first
+        self._in_flight = 0
+        self._stats = {'admitted': 0, 'limited': 0, 'shed': 0}
+
+    def admit(self, route_class, client, now=None, holds_thread=True):
+        """
+        Admit a request or say why not.
+
+        Args:
+            route_class (str): From classify()
+            client (str): From client_key()
+            now (float, optional): time.monotonic() value, for tests and benchmarks
+            holds_thread (bool): False for async handlers (asgi.py), which take a token but are
+                neither shed nor counted as in flight
+
+        Returns:
+            None if admitted (call release() when it finishes if holds_thread), else
+            (reason, retry_after_seconds) with reason 'shed', 'client_limit' or 'global_limit'
+        """
+        now = time.monotonic() if now is None else now
+        rate, burst, client_rate, client_burst = limits(route_class)
+        share = getattr(config, f'LOAD_SHED_{route_class.upper()}', None)
+        capacity = config.LOAD_SHED_CAPACITY or config.SERVER_THREADS
+
+        with self._lock:
+            if holds_thread and share and self._in_flight >= max(1, int(share * capacity)):
+                self._stats['shed'] += 1
+                return 'shed', SHED_RETRY_AFTER
+
+            buckets = []
+            if client_rate > 0:
+                key = (route_class, client)
+                bucket = self._clients.get(key)
+                if bucket is None:
+                    bucket = self._clients[key] = TokenBucket(client_rate, client_burst, now)
+                    while len(self._clients) > config.RATE_LIMIT_MAX_CLIENTS:
+                        # An evicted client just starts again with a full bucket
+                        self._clients.popitem(last=False)
+                else:
+                    self._clients.move_to_end(key)
+                buckets.append(('client_limit', bucket))
+            if rate > 0:
+                bucket = self._global.get(route_class)
+                if bucket is None:
+                    bucket = self._global[route_class] = TokenBucket(rate, burst, now)
+                buckets.append(('global_limit', bucket))
+
+            # Take from every bucket or none, so a refused request doesn't use up the others
+            waits = [(bucket.wait(now), reason) for reason, bucket in buckets]
+            wait, reason = max(waits, default=(0.0, None))
+            if wait > 0:
+                self._stats['limited'] += 1
+                return reason, wait
+            for _, bucket in buckets:
+                bucket.tokens -= 1
+            if holds_thread:
+                self._in_flight += 1
+            self._stats['admitted'] += 1
+        return None
+
+    def release(self):
+        """An admitted request finished"""
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=self._in_flight, clients=len(self._clients))
+
+
+limiter = RateLimiter()
+
+
+def limit_request():
+    """before_request hook: refuse the request when its class is over a limit or being shed"""
+    if not config.RATE_LIMIT_ENABLED or request.method == 'OPTIONS' or request.path in EXEMPT_PATHS:
+        return None
+
+    route_class = classify(request.path)
+    rejection = limiter.admit(route_class, client_key())
+    if rejection is None:
+        g.rate_limit_admitted = True
+        return None
+
+    status, payload = rejected(route_class, *rejection)
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers['Retry-After'] = str(payload['retry_after'])
+    return response
+
+
+def rejected(route_class, reason, wait):
+    """Count a refusal from admit(); returns (status, JSON payload) for the response"""
+    retry_after = max(1, math.ceil(wait))
+    metrics.add('nutrition_requests_rejected_total', (route_class, reason))
+    if reason == 'shed':
+        return 503, {'error': 'Server busy, try again shortly', 'retry_after': retry_after}
+    return 429, {'error': 'Too many requests', 'retry_after': retry_after}
+
+
+def release_request(error=None):
+    """teardown_request hook (runs after a streamed response finishes)"""
+    if g.pop('rate_limit_admitted', False):
+        limiter.release()
+
+
+def init_app(app):
+    app.before_request(limit_request)
+    app.teardown_request(release_request)
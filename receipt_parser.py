@@ -0,0 +1,374 @@
+"""
+Receipt line parsing engine used by food_input.parse_receipt_items.
+
+Lines are matched against precompiled store-format patterns that tell prices,
+quantities and units apart, non-item lines (totals, tax, payment details) are
+dropped, and item names are expanded through a token-level Aho-Corasick
+dictionary of common receipt abbreviations ("ORG BNNA" -> "banana") so more
+lines resolve to names the nutrition cache and web lookup can match.
+"""
+
+import re
+from collections import deque
+
+# ==================== ABBREVIATION DICTIONARY ====================
+
+# Receipt abbreviation (token sequence) -> canonical food name.
+# An empty canonical name marks a modifier that is dropped (brand, "organic", ...).
+RECEIPT_ABBREVIATIONS = {
+    # Modifiers and store brands
+    'org': '', 'orgnc': '', 'organic': '', 'gv': '', 'ks': '', 'kirk': '', 'ksig': '',
+    'mm': '', 'tj': '', 'tjs': '', '365': '', 'wf': '', 'gg': '', 'sig': '', 'kroger': '',
+    'krgr': '', 'pvt sel': '', 'fresh': '', 'frsh': '', 'lg': '', 'sm': '', 'med': '',
+    'nat': '', 'natl': '',
+    # Produce
+    'bnna': 'banana', 'bnnas': 'banana', 'banana': 'banana', 'bananas': 'banana', 'ban': 'banana',
+    'apl': 'apple', 'aple': 'apple', 'apple': 'apple', 'apples': 'apple',
+    'gala apl': 'gala apple', 'hnycrsp': 'honeycrisp apple', 'honeycrisp': 'honeycrisp apple',
+    'avo': 'avocado', 'avocado': 'avocado', 'hass avo': 'avocado',
+    'strwb': 'strawberries', 'strawb': 'strawberries', 'strwbry': 'strawberries',
+    'blubry': 'blueberries', 'bluebry': 'blueberries', 'blueb': 'blueberries',
+    'rasp': 'raspberries', 'grps': 'grapes', 'grape': 'grapes', 'rd grps': 'red grapes',
+    'orng': 'orange', 'oranges': 'orange', 'lmn': 'lemon', 'lime': 'lime',
+    'tom': 'tomato', 'toms': 'tomato', 'roma tom': 'roma tomato', 'pot': 'potato',
+    'russet pot': 'russet potato', 'swt pot': 'sweet potato', 'onion': 'onion', 'yel onion': 'yellow onion',
+    'brocc': 'broccoli', 'broc': 'broccoli', 'spnch': 'spinach', 'spin': 'spinach',
+    'rom lett': 'romaine lettuce', 'romaine': 'romaine lettuce', 'carr': 'carrots', 'crrts': 'carrots',
+    'celry': 'celery', 'cuke': 'cucumber', 'cucmbr': 'cucumber', 'grn pepr': 'green pepper',
+    'rd pepr': 'red bell pepper', 'mush': 'mushrooms', 'mshrm': 'mushrooms',
+    # Dairy and eggs
+    'mlk': 'milk', 'milk': 'milk', 'whl mlk': 'whole milk', 'whole mlk': 'whole milk',
+    '2 mlk': '2% milk', 'skim mlk': 'skim milk', 'chs': 'cheese', 'chz': 'cheese',
+    'ched': 'cheddar cheese', 'shrd ched': 'cheddar cheese', 'mozz': 'mozzarella cheese',
+    'yog': 'yogurt', 'ygrt': 'yogurt', 'gr yog': 'greek yogurt', 'grk ygrt': 'greek yogurt',
+    'btr': 'butter', 'bttr': 'butter', 'eggs': 'eggs', 'egg': 'eggs', 'lg eggs': 'eggs',
+    'crm chs': 'cream cheese', 'sr crm': 'sour cream',
+    # Meat and protein
+    'chkn': 'chicken', 'chk': 'chicken', 'chick': 'chicken', 'chkn brst': 'chicken breast', 'chk brst': 'chicken breast',
+    'bnls chkn': 'chicken breast', 'bnls chkn brst': 'chicken breast', 'bnls sknls': 'chicken breast',
+    'grnd bf': 'ground beef', 'gr beef': 'ground beef', 'grd bf': 'ground beef', 'grnd tky': 'ground turkey',
+    'trky': 'turkey', 'tky': 'turkey', 'bcn': 'bacon', 'bacon': 'bacon', 'ham': 'ham',
+    'slmn': 'salmon', 'salm': 'salmon', 'tuna': 'tuna', 'shrmp': 'shrimp', 'tofu': 'tofu',
+    'pb': 'peanut butter', 'pnt btr': 'peanut butter', 'pnut btr': 'peanut butter',
+    # Bakery and grains
+    'brd': 'bread', 'bread': 'bread', 'wht brd': 'white bread', 'whtw brd': 'whole wheat bread',
+    'ww brd': 'whole wheat bread', 'bgl': 'bagel', 'bgls': 'bagel', 'tort': 'tortillas',
+    'flr tort': 'flour tortillas', 'rice': 'rice', 'brn rice': 'brown rice', 'wht rice': 'white rice',
+    'pasta': 'pasta', 'spag': 'spaghetti', 'oats': 'oats', 'oatml': 'oatmeal', 'cerl': 'cereal',
+    'grnla': 'granola',
+    # Pantry, snacks and drinks
+    'oj': 'orange juice', 'orng jce': 'orange juice', 'aj': 'apple juice', 'cof': 'coffee',
+    'sda': 'soda', 'h2o': 'water', 'wtr': 'water', 'chps': 'chips', 'tort chps': 'tortilla chips',
+    'pretz': 'pretzels', 'crkrs': 'crackers', 'almnd': 'almonds', 'almds': 'almonds',
+    'hmmus': 'hummus', 'hum': 'hummus', 'salsa': 'salsa', 'ice crm': 'ice cream',
+    'choc': 'chocolate', 'drk choc': 'dark chocolate', 'pzza': 'pizza', 'frz pzza': 'frozen pizza',
+    'gran bar': 'granola bar', 'prot bar': 'protein bar',
+}
+
+# Single-token abbreviations that are also words in their own right: expanded only when no
+# other word follows ("POT" -> potato, but "POT ROAST" and "CHICK PEAS" stay as written)
+AMBIGUOUS_ABBREVIATIONS = {
+    'pot', 'tom', 'ban', 'spin', 'hum', 'mush', 'tort', 'chick', 'rasp', 'carr', 'cof',
+}
+
+# Unmatched tokens that are receipt noise rather than part of a name: numbers and prices,
+# sizes and weights ("16oz", "2.5lb"), SKU/PLU codes ("#4011", "004011") and one-letter tax flags
+_NOISE_TOKEN = re.compile(r'^(?:\$?\d+(?:[\.,]\d+)?|\d+(?:\.\d+)?(?:fl|oz|lbs?|kg|g|ml|l|gal|ct|pk|dz|ea)|#\d+|\d{4,}[a-z]?|[a-z])$')
+_UNIT_TOKENS = {'fl', 'oz', 'lb', 'lbs', 'kg', 'g', 'ml', 'l', 'gal', 'ct', 'pk', 'dz', 'ea'}
+
+
+class AbbreviationMatcher:
+    """Token-level Aho-Corasick automaton over a receipt abbreviation dictionary"""
+
+    def __init__(self, abbreviations, ambiguous=()):
+        self._ambiguous = set(ambiguous)
+        # Each state: transitions dict, failure link, output (pattern_length, canonical) or None
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]
+
+        for abbreviation, canonical in abbreviations.items():
+            tokens = abbreviation.lower().split()
+            state = 0
+            for token in tokens:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                state = nxt
+            self._out[state] = (len(tokens), canonical)
+
+        # Breadth-first construction of failure links; each state keeps the longest
+        # pattern that ends there (its own, or the one reachable through its failure link)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0)
+                if self._out[nxt] is None:
+                    self._out[nxt] = self._out[self._fail[nxt]]
+
+    def find(self, tokens):
+        """
+        Find dictionary matches in a token list.
+
+        Returns:
+            list[tuple]: (start, end, canonical) for leftmost-longest, non-overlapping matches
+        """
+        matches = []
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            out = self._out[state]
+            if out is not None:
+                length, canonical = out
+                matches.append((i + 1 - length, i + 1, canonical))
+
+        # Keep leftmost-longest matches that do not overlap
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        selected = []
+        last_end = 0
+        for start, end, canonical in matches:
+            if start >= last_end:
+                selected.append((start, end, canonical))
+                last_end = end
+        return selected
+
+    def expand(self, name):
+        """
+        Expand abbreviations in an item name.
+
+        Returns:
+            tuple: (expanded name, True if any dictionary entry matched)
+        """
+        tokens = name.lower().split()
+        noise = [_is_noise(tokens, i) for i in range(len(tokens))]
+        matched_at = set()
+        matches = []
+        for match in self.find(tokens):
+            matches.append(match)
+            matched_at.update(range(match[0], match[1]))
+        # An ambiguous abbreviation followed by a word of its own is that word, not the abbreviation
+        matches = [(start, end, canonical) for start, end, canonical in matches
+                   if not (end - start == 1 and tokens[start] in self._ambiguous and
+                           any(j not in matched_at and not noise[j] for j in range(end, len(tokens))))]
+        if not matches:
+            return ' '.join(tokens), False
+
+        def kept(first, last):
+            return [tokens[i] for i in range(first, last) if not noise[i]]
+
+        words = []
+        pos = 0
+        for start, end, canonical in matches:
+            words.extend(kept(pos, start))
+            if canonical and (not words or words[-1] != canonical):
+                words.append(canonical)
+            pos = end
+        words.extend(kept(pos, len(tokens)))
+        return ' '.join(words), True
+
+
+def _is_noise(tokens, i):
+    """True if tokens[i] is a number, price, size or code rather than part of a food name"""
+    token = tokens[i]
+    if _NOISE_TOKEN.match(token):
+        return True
+    # The unit of a separate size ("1 gal")
+    return token in _UNIT_TOKENS and i > 0 and bool(_NOISE_TOKEN.match(tokens[i - 1]))
+
+
+# ==================== LINE PATTERNS ====================
+
+_PRICE = r'\$?(?P<price>\d{1,4}[\.,]\d{2})'
+_UNIT = r'(?P<unit>lbs?|oz|kg|g|ct|ea|gal|pk|dz)'
+_WEIGHT_UNIT = r'(?P<unit>lbs?|kg)'
+_NAME = r"(?P<name>[A-Za-z][A-Za-z0-9%&'\-/\. ]*?[A-Za-z%])"
+_TAX_FLAG = r'(?:\s+[A-Z]{1,2})?'
+
+# Store-format patterns, tried in order. Each yields name/quantity/unit/price groups.
+LINE_PATTERNS = [
+    # "2 @ 1.99" / "2 x 1.99" -> quantity for a name on the line above, else for the previous item
+    ('multi_price', re.compile(r'^(?P<qty>\d{1,3})\s*[@xX]\s*' + _PRICE + r'(?:\s*(?:ea|each))?' + _TAX_FLAG + r'$', re.I)),
+    # "1.52 lb @ 0.69 /lb" -> weight for the previous item
+    ('weight_price', re.compile(r'^(?P<qty>\d+(?:\.\d+)?)\s*' + _UNIT + r'\s*@\s*\$?\d+(?:\.\d+)?\s*/\s*\w+(?:\s+' + _PRICE + r')?' + _TAX_FLAG + r'$', re.I)),
+    # "2 X BANANAS 1.18" / "2 BANANAS 1.18"
+    ('qty_name_price', re.compile(r'^(?P<qty>\d{1,3})\s*(?:[xX]\s+)?' + _NAME + r'\s+' + _PRICE + _TAX_FLAG + r'$')),
+    # "GRND BF 1.02 lb @ 5.99 /lb 6.11"
+    ('name_weight_at_price', re.compile(r'^' + _NAME + r'\s+(?P<qty>\d+(?:\.\d+)?)\s*' + _WEIGHT_UNIT + r'\s*@\s*\$?\d+(?:\.\d+)?\s*/\s*\w+\s+' + _PRICE + _TAX_FLAG + r'$', re.I)),
+    # "CHKN BRST 2.5 LB 8.73" (sold by weight; container sizes like "1 GAL" stay part of the name)
+    ('name_weight_price', re.compile(r'^' + _NAME + r'\s+(?P<qty>\d+(?:\.\d+)?)\s*' + _WEIGHT_UNIT + r'\s+' + _PRICE + _TAX_FLAG + r'$', re.I)),
+    # "WHL MLK 1 GAL 3.49" style sizes are part of the name; "ORG BNNA 0.99" / "Bowl Cholula $12.00 F"
+    ('name_price', re.compile(r'^' + _NAME + r'(?:\s+\d+(?:\.\d+)?\s*(?:oz|gal|ct|pk|lb|lbs|dz))?\s+' + _PRICE + _TAX_FLAG + r'$', re.I)),
+    # "apple 2" / "apple 2.5" (plain list / legacy format: a number without two decimals is a quantity, not a price)
+    ('name_qty', re.compile(r'^' + _NAME + r'\s+(?P<qty>\d{1,3}(?:\.\d{1,3})?)$')),
+    # "apple x2" / "apple 2 ea"
+    ('name_qty_unit', re.compile(r'^' + _NAME + r'\s+(?:[xX]\s*(?P<qty>\d{1,3})|(?P<qty2>\d+(?:\.\d+)?)\s*' + _UNIT + r')$', re.I)),
+    # "12.00" on its own line -> price for a name on the line above
+    ('price_only', re.compile(r'^' + _PRICE + _TAX_FLAG + r'$')),
+    # "Bowl Cholula" -> name waiting for a price on the next line
+    ('name_only', re.compile(r'^' + _NAME + r'$')),
+]
+
+# Lines that are never food items
+_SKIP_PATTERN = re.compile(
+    r'\b(?:sub\s*-?\s*total|total|tax(?:es)?|balance|change|cash|credit|debit|visa|mastercard|'
+    r'amex|discover|card|acct|account|approval|approved|auth|tender|payment|purchase|emv|aid|tvr|'
+    r'iad|tsi|arc|cvm|mode|issuer|label|verified|device|contactless|chk\s*#?\s*\d{3,}|check|till|cashier|'
+    r'register|store|receipt|thank|welcome|survey|review|scan|code|online|www|http|savings|'
+    r'saved|coupon|rewards?|member|points|usd|phone|tel|fax|ref|trans|terminal|merchant|entry)\b',
+    re.I
+)
+_DATE_TIME = re.compile(r'\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4}|\d{1,2}:\d{2}')
+_JUNK = re.compile(r'^[\W\d_]*$')
+_CITY_STATE = re.compile(r',\s*[A-Z]{2}\b')
+
+
+def _to_float(value):
+    return float(value.replace(',', '.'))
+
+
+def _is_skip_line(line):
+    if _JUNK.match(line) and not re.search(r'\d[\.,]\d{2}', line):
+        return True
+    if _SKIP_PATTERN.search(line) or _DATE_TIME.search(line) or _CITY_STATE.search(line):
+        return True
+    return False
+
+
+class ReceiptParser:
+    """Parses OCR receipt text into line items using precompiled patterns"""
+
+    def __init__(self, abbreviations=None):
+        abbreviations = abbreviations or RECEIPT_ABBREVIATIONS
+        self.matcher = AbbreviationMatcher(abbreviations, AMBIGUOUS_ABBREVIATIONS)
+        # Single-token modifiers ("org", "gv", "365") stripped from the front of a line before it is
+        # matched, so a numeric store brand isn't read as a quantity
+        self._modifiers = {abbr for abbr, canonical in abbreviations.items() if not canonical and ' ' not in abbr}
+
+    def _strip_modifiers(self, line):
+        tokens = line.split(' ')
+        start = 0
+        while start < len(tokens) - 1 and tokens[start].lower() in self._modifiers:
+            start += 1
+        # Keep the line whole when no name would be left ("365 2.99")
+        if start and tokens[start][:1].isalpha():
+            return ' '.join(tokens[start:])
+        return line
+
+    def _make_item(self, name, quantity=1.0, unit='each', price=None):
+        canonical, matched = self.matcher.expand(name)
+        if not canonical:
+            return None
+        item = {'name': canonical, 'quantity': quantity, 'unit': unit}
+        if price is not None:
+            item['price'] = price
+        item['dictionary_match'] = matched
+        return item
+
+    def parse_line(self, line):
+        """
+        Classify a single receipt line.
+
+        Returns:
+            tuple: (pattern name, match) or (None, None) for skipped lines
+        """
+        line = ' '.join(line.split())
+        if not line or _is_skip_line(line):
+            return None, None
+        line = self._strip_modifiers(line)
+        for pattern_name, pattern in LINE_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                return pattern_name, match
+        return None, None
+
+    def parse(self, receipt_text):
+        """
+        Parse receipt text into food items.
+
+        Args:
+            receipt_text (str): Raw text extracted from a receipt
+
+        Returns:
+            list[dict]: [{'name': 'banana', 'quantity': 2, 'unit': 'each', 'price': 1.18,
+                          'dictionary_match': True}, ...]
+        """
+        items = []
+        pending_name = None
+
+        for raw_line in (receipt_text or '').splitlines():
+            kind, match = self.parse_line(raw_line)
+            if kind is None:
+                if raw_line.strip():
+                    pending_name = None
+                continue
+
+            groups = match.groupdict()
+            item = None
+
+            if kind == 'multi_price':
+                if pending_name:
+                    item = self._make_item(pending_name, float(groups['qty']), price=_to_float(groups['price']))
+                    if item:
+                        items.append(item)
+                elif items:
+                    items[-1]['quantity'] = float(groups['qty'])
+                pending_name = None
+                continue
+            if kind == 'weight_price':
+                if pending_name:
+                    price = _to_float(groups['price']) if groups['price'] else None
+                    item = self._make_item(pending_name, float(groups['qty']), groups['unit'].lower(), price)
+                    if item:
+                        items.append(item)
+                elif items:
+                    items[-1]['quantity'] = float(groups['qty'])
+                    items[-1]['unit'] = groups['unit'].lower()
+                pending_name = None
+                continue
+            if kind == 'price_only':
+                if pending_name:
+                    item = self._make_item(pending_name, price=_to_float(groups['price']))
+                pending_name = None
+            elif kind == 'name_only':
+                pending_name = groups['name']
+                continue
+            elif kind == 'qty_name_price':
+                item = self._make_item(groups['name'], float(groups['qty']), price=_to_float(groups['price']))
+            elif kind in ('name_weight_price', 'name_weight_at_price'):
+                item = self._make_item(groups['name'], float(groups['qty']), groups['unit'].lower(),
+                                       _to_float(groups['price']))
+            elif kind == 'name_price':
+                item = self._make_item(groups['name'], price=_to_float(groups['price']))
+            elif kind == 'name_qty':
+                item = self._make_item(groups['name'], float(groups['qty']))
+            elif kind == 'name_qty_unit':
+                if groups['qty'] is not None:
+                    item = self._make_item(groups['name'], float(groups['qty']))
+                else:
+                    item = self._make_item(groups['name'], float(groups['qty2']), groups['unit'].lower())
+
+            pending_name = None
+            if item:
+                items.append(item)
+
+        return items
+
+
+# Shared parser instance (the automaton is built once at import)
+receipt_parser = ReceiptParser()
+
+
+def parse_receipt_text(receipt_text):
+    """Parse receipt text with the shared parser (see ReceiptParser.parse)"""
+    return receipt_parser.parse(receipt_text)
@@ -2,8 +2,13 @@
 """
 Startup script for Nutrition Tracker
 Runs both Flask backend and React frontend
+
+    python start.py           # Flask development server + React
+    python start.py --prod    # multi-worker gunicorn server (gunicorn.conf.py) + React
+    python start.py --asgi    # uvicorn serving asgi.py (async Purdue lookups) + React
 """
 
+import argparse
 import subprocess
 import sys
 import os
@@ -12,11 +17,37 @@ import threading
 import webbrowser
 from pathlib import Path
 
-def run_flask():
+def run_flask(prod=False, asgi=False):
     """Run Flask backend"""
-    print("🚀 Starting Flask backend...")
+    if asgi:
+        try:
+            import uvicorn, asgiref, httpx
+        except ImportError:
+            print("⚠️  uvicorn, asgiref and httpx are needed for --asgi (pip install uvicorn asgiref httpx); "
+                  "falling back to the development server")
+            asgi = False
+
+    if prod:
+        try:
+            import gunicorn
+        except ImportError:
+            print("⚠️  gunicorn is not installed (pip install gunicorn); falling back to the development server")
+            prod = False
+
+    if asgi:
+        import config
+        print("🚀 Starting backend (uvicorn, ASGI)...")
+        command = [sys.executable, "-m", "uvicorn", "asgi:application",
+                   "--host", config.SERVER_HOST, "--port", str(config.SERVER_PORT),
+                   "--workers", str(config.SERVER_WORKERS or os.cpu_count() or 1)]
+    elif prod:
+        print("🚀 Starting Flask backend (gunicorn)...")
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        print("🚀 Starting Flask backend...")
+        command = [sys.executable, "app.py"]
     try:
-        subprocess.run([sys.executable, "app.py"], check=True)
+        subprocess.run(command, check=True)
     except subprocess.CalledProcessError as e:
         print(f"❌ Flask backend failed: {e}")
     except KeyboardInterrupt:
@@ -45,6 +76,13 @@ def run_react():
         print("🛑 React frontend stopped")
 
 def main():
+    parser = argparse.ArgumentParser(description="Start the Nutrition Tracker backend and frontend")
+    parser.add_argument("--prod", action="store_true",
+                        help="serve the API with gunicorn (workers/threads from config.py) instead of the Flask dev server")
+    parser.add_argument("--asgi", action="store_true",
+                        help="serve the API with uvicorn through asgi.py (async Purdue lookups, SERVER_WORKERS processes)")
+    args = parser.parse_args()
+
     print("🍎 Nutrition Tracker Startup")
     print("=" * 40)
     
@@ -74,7 +112,7 @@ def main():
     print()
     
     # Start Flask in a separate thread
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
+    flask_thread = threading.Thread(target=run_flask, args=(args.prod, args.asgi), daemon=True)
     flask_thread.start()
     
     # Wait a moment for Flask to start
@@ -0,0 +1,238 @@
+"""
+Lightweight span tracing for the receipt pipeline.
+
+A trace is started per request with start_trace(); code inside it opens nested
+spans with `with span('ocr'):`. Finished spans are aggregated into per-stage
+latency histograms, the most recent traces are kept in memory, and any trace
+can be exported in Chrome trace format (load it in chrome://tracing or
+Perfetto). Outside an active trace, span() is a cheap no-op.
+"""
+
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import config
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float('inf'))
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+_trace_ids = itertools.count(1)
+_recent_traces = deque(maxlen=config.TRACE_HISTORY_SIZE)
+_recent_lock = threading.Lock()
+
+
+class Span:
+    """A timed stage of work with optional attributes (e.g. item_count)"""
+
+    __slots__ = ('name', 'start', 'end', 'attrs', 'children', 'thread_id')
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = dict(attrs or {})
+        self.children = []
+        self.thread_id = threading.get_ident()
+
+    def set(self, **attrs):
+        """Attach attributes to the span"""
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration_ms, 3),
+            'attrs': self.attrs,
+            'children': [child.to_dict(origin) for child in self.children]
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """A tree of spans for one request"""
+
+    def __init__(self, name, attrs=None):
+        self.trace_id = next(_trace_ids)
+        self.root = Span(name, attrs)
+        self.wall_start = time.time()
+        self._lock = threading.Lock()
+
+    def add_child(self, parent, child):
+        with self._lock:
+            parent.children.append(child)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'started_at': self.wall_start,
+            'root': self.root.to_dict(self.root.start)
+        }
+
+    def to_chrome_events(self):
+        """Return Chrome trace 'complete' events for every span in the trace"""
+        events = []
+        origin = self.root.start
+        base_us = self.wall_start * 1e6
+        pid = os.getpid()
+        stack = [self.root]
+        while stack:
+            span_ = stack.pop()
+            events.append({
+                'name': span_.name,
+                'cat': 'receipt',
+                'ph': 'X',
+                'ts': round(base_us + (span_.start - origin) * 1e6, 1),
+                'dur': round(span_.duration_ms * 1000, 1),
+                'pid': pid,
+                'tid': span_.thread_id,
+                'args': dict(span_.attrs, trace_id=self.trace_id)
+            })
+            stack.extend(span_.children)
+        return events
+
+
+class LatencyHistograms:
+    """Per-span-name latency histograms with fixed millisecond buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, duration_ms):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                entry = self._data[name] = {'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0,
+                                            'counts': [0] * len(self.buckets)}
+            entry['count'] += 1
+            entry['sum_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            for i, bound in enumerate(self.buckets):
+                if duration_ms <= bound:
+                    entry['counts'][i] += 1
+                    break
+
+    def _quantile(self, entry, q):
+        target = q * entry['count']
+        seen = 0
+        for bound, count in zip(self.buckets, entry['counts']):
+            seen += count
+            if seen >= target:
+                return bound if bound != float('inf') else entry['max_ms']
+        return entry['max_ms']
+
+    def snapshot(self):
+        """Return {name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, buckets}}"""
+        with self._lock:
+            data = {name: dict(entry, counts=list(entry['counts'])) for name, entry in self._data.items()}
+        result = {}
+        for name, entry in data.items():
+            result[name] = {
+                'count': entry['count'],
+                'mean_ms': round(entry['sum_ms'] / entry['count'], 3),
+                'p50_ms': self._quantile(entry, 0.50),
+                'p95_ms': self._quantile(entry, 0.95),
+                'p99_ms': self._quantile(entry, 0.99),
+                'max_ms': round(entry['max_ms'], 3),
+                'buckets': {('+Inf' if b == float('inf') else str(b)): c
+                            for b, c in zip(self.buckets, entry['counts'])}
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+
+histograms = LatencyHistograms()
+
+
+@contextmanager
+def start_trace(name, **attrs):
+    """Start a new trace for the current request; yields the Trace"""
+    trace = Trace(name, attrs)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end = time.perf_counter()
+        histograms.observe(name, trace.root.duration_ms)
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        with _recent_lock:
+            _recent_traces.append(trace)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a nested stage of the current trace (no-op when no trace is active)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    child = Span(name, attrs)
+    trace.add_child(parent, child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+        histograms.observe(name, child.duration_ms)
+
+
+def current_trace():
+    """Return the active Trace, or None"""
+    return _current_trace.get()
+
+
+def wrap_context(fn):
+    """Bind fn to a copy of the current context so spans opened on a worker thread nest correctly"""
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+    return run
+
+
+def recent_traces():
+    """Return the most recent finished traces (oldest first)"""
+    with _recent_lock:
+        return list(_recent_traces)
+
+
+def chrome_trace(traces=None):
+    """Build a Chrome trace JSON document for the given (or recent) traces"""
+    if traces is None:
+        traces = recent_traces()
+    events = []
+    for trace in traces:
+        events.extend(trace.to_chrome_events())
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
@@ -0,0 +1,76 @@
+"""
+Record API traffic as JSONL for benchmarks/load_harness.py to replay.
+
+With REQUEST_RECORD_PATH set, every request (except CORS preflights,
+health checks and metrics scrapes) is appended to that file as one line:
+
+    {"ts": 1760000000.123, "endpoint": "GET /api/meals/<int:user_id>/<date_str>",
+     "method": "GET", "path": "/api/meals/3/2025-10-09", "status": 200}
+
+JSON bodies are kept with passwords replaced by null; file uploads are kept
+as {"upload": "<form field>"} without their contents. Each gunicorn worker
+appends to the same file; lines are short enough to be written whole.
+"""
+
+import json
+import os
+import threading
+import time
+
+import config
+
+SKIP_PATHS = {'/api/health', '/api/metrics'}
+REDACTED_FIELDS = {'password'}
+
+_lock = threading.Lock()
+_file = None
+_file_pid = None
+
+
+def _output():
+    """This process's append handle on REQUEST_RECORD_PATH"""
+    global _file, _file_pid
+    if _file is None or _file_pid != os.getpid():
+        _file = open(config.REQUEST_RECORD_PATH, 'a', buffering=1, encoding='utf-8')
+        _file_pid = os.getpid()
+    return _file
+
+
+def request_record(request, status, ts):
+    """The JSONL record for a finished request"""
+    rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    record = {
+        'ts': round(ts, 3),
+        'endpoint': f'{request.method} {rule}',
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'status': status,
+    }
+    if request.files:
+        record['upload'] = next(iter(request.files))
+    else:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            record['json'] = {key: None if key in REDACTED_FIELDS else value for key, value in body.items()}
+        elif body is not None:
+            record['json'] = body
+    return record
+
+
+def init_app(app):
+    """Record requests to REQUEST_RECORD_PATH (no-op when it is empty)"""
+    if not config.REQUEST_RECORD_PATH:
+        return
+    from flask import g, request
+
+    @app.before_request
+    def stamp_request():
+        g.record_ts = time.time()
+
+    @app.after_request
+    def record_request(response):
+        if request.method != 'OPTIONS' and request.path not in SKIP_PATHS:
+            line = json.dumps(request_record(request, response.status_code, g.get('record_ts', time.time())))
+            with _lock:
+                _output().write(line + '\n')
+        return response
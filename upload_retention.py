@@ -0,0 +1,132 @@
+"""
+Retention policy for receipt images in the uploads directory.
+
+Receipts are processed in memory; images are only written to disk when
+RECEIPT_RETENTION_DAYS is set, and a background sweeper removes files that are
+older than the retention window or beyond RECEIPT_RETENTION_MAX_FILES. With
+retention off, images left in the directory by earlier versions (which saved
+every upload) are removed once at startup.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+import config
+
+_sweeper_thread = None
+_sweeper_stop = threading.Event()
+_sweeper_lock = threading.Lock()
+
+
+def retention_enabled():
+    """Return True if uploaded receipt images should be kept on disk"""
+    return config.RECEIPT_RETENTION_DAYS > 0
+
+
+def save_upload(image_bytes, upload_dir=None):
+    """
+    Persist an uploaded receipt image if retention is configured.
+
+    Args:
+        image_bytes (bytes): Raw image data from the request
+        upload_dir (str, optional): Target directory (defaults to RECEIPT_UPLOAD_DIR)
+
+    Returns:
+        str: Path of the saved file, or None if retention is disabled
+    """
+    if not retention_enabled():
+        return None
+
+    upload_dir = upload_dir or config.RECEIPT_UPLOAD_DIR
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, f"receipt_{uuid.uuid4().hex}.jpg")
+    with open(path, 'wb') as f:
+        f.write(image_bytes)
+    return path
+
+
+def sweep_uploads(upload_dir=None, now=None):
+    """
+    Enforce the retention policy on the upload directory.
+
+    Removes receipt images older than RECEIPT_RETENTION_DAYS, then the oldest
+    remaining images beyond RECEIPT_RETENTION_MAX_FILES.
+
+    Returns:
+        int: Number of files removed
+    """
+    upload_dir = upload_dir or config.RECEIPT_UPLOAD_DIR
+    if now is None:
+        now = time.time()
+    if not os.path.isdir(upload_dir):
+        return 0
+
+    files = []
+    for entry in os.scandir(upload_dir):
+        if entry.is_file() and entry.name.startswith('receipt_'):
+            files.append((entry.stat().st_mtime, entry.path))
+    files.sort()
+
+    cutoff = now - config.RECEIPT_RETENTION_DAYS * 86400
+    expired = [path for mtime, path in files if mtime < cutoff]
+    kept = [path for mtime, path in files if mtime >= cutoff]
+
+    max_files = config.RECEIPT_RETENTION_MAX_FILES
+    if max_files and len(kept) > max_files:
+        expired.extend(kept[:len(kept) - max_files])
+
+    removed = 0
+    for path in expired:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            print(f"Warning: could not remove {path}: {e}")
+    return removed
+
+
+def _sweep_loop(interval):
+    while not _sweeper_stop.wait(interval):
+        try:
+            sweep_uploads()
+        except Exception as e:
+            print(f"Upload sweep error: {e}")
+
+
+def start_upload_sweeper(interval=None):
+    """
+    Start the background sweeper thread (no-op if already running).
+
+    With retention disabled there is nothing to sweep periodically; any images
+    already on disk are removed once and no thread is started.
+    """
+    global _sweeper_thread
+
+    if not retention_enabled():
+        sweep_uploads()
+        return None
+
+    with _sweeper_lock:
+        if _sweeper_thread is not None and _sweeper_thread.is_alive():
+            return _sweeper_thread
+
+        interval = interval or config.RECEIPT_SWEEP_INTERVAL
+        sweep_uploads()
+        _sweeper_stop.clear()
+        _sweeper_thread = threading.Thread(target=_sweep_loop, args=(interval,),
+                                           name='upload-sweeper', daemon=True)
+        _sweeper_thread.start()
+        return _sweeper_thread
+
+
+def stop_upload_sweeper():
+    """Stop the background sweeper thread"""
+    global _sweeper_thread
+
+    with _sweeper_lock:
+        _sweeper_stop.set()
+        if _sweeper_thread is not None:
+            _sweeper_thread.join(timeout=5)
+        _sweeper_thread = None
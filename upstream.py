@@ -0,0 +1,98 @@
+"""
+URLs and response parsing for the upstream nutrition sources, shared by the
+blocking lookups in food_input.py and the async ones in upstream_async.py.
+
+- HFS: Purdue Housing & Food Services menu API (JSON)
+- nutritionvalue.org: search page, then the first result's food page (HTML;
+  parsing needs beautifulsoup4)
+
+Base URLs come from config (HFS_API_BASE, NUTRITIONVALUE_BASE).
+"""
+
+from urllib.parse import quote
+
+import config
+from nutrient_store import parse_hfs_nutrients
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+# ==================== HFS ====================
+
+def hfs_item_url(menu_item_name):
+    return f"{config.HFS_API_BASE}/items/{quote(menu_item_name)}"
+
+
+def hfs_locations_url():
+    return f"{config.HFS_API_BASE}/locations"
+
+
+def hfs_menu_url(location, date):
+    return f"{config.HFS_API_BASE}/locations/{quote(location)}/{date}"
+
+
+def parse_hfs_item(data):
+    """Nutrition per serving from an HFS item response (see food_input.get_purdue_menu_nutrition)"""
+    return {
+        "serving_size_value": 1.0,
+        "serving_size_unit": "serving",
+        "calories_per_serving": data.get("Calories", 0),
+        "protein_g_per_serving": data.get("Protein", 0),
+        "carbs_g_per_serving": data.get("Carbohydrates", 0),
+        "fat_g_per_serving": data.get("TotalFat", 0),
+        "nutrients": parse_hfs_nutrients(data.get("Nutrition"), include_macros=False)
+    }
+
+
+def parse_hfs_locations(data):
+    """Dining hall names from the HFS locations response"""
+    return [hall["Location"] for hall in data["Location"]]
+
+
+def parse_hfs_menu(location, data):
+    """(item name, menu entry without nutrition) for every item on one hall's daily menu"""
+    return [
+        (item["Name"], {"name": item["Name"], "dining_hall": location, "meal": meal.get("Name")})
+        for meal in data.get("Meals", [])
+        for station in meal.get("Stations", [])
+        for item in station.get("Items", [])
+    ]
+
+
+# ==================== NUTRITIONVALUE.ORG ====================
+
+def nutritionvalue_search_url(food_name):
+    query = food_name.replace(" ", "+")
+    return f"{config.NUTRITIONVALUE_BASE}/search.php?food_query={query}"
+
+
+def parse_nutritionvalue_search(html):
+    """URL of the first food in a search results page, or None"""
+    soup = BeautifulSoup(html, "html.parser")
+    first_link = soup.select_one("a[href*='/foods/']")
+    if not first_link:
+        return None
+    return config.NUTRITIONVALUE_BASE + first_link["href"]
+
+
+def parse_nutritionvalue_food(html, food_name):
+    """Nutrition per serving from a food page"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    def safe_get(label):
+        cell = soup.find("td", string=lambda s: s and label in s)
+        if cell and cell.find_next_sibling("td"):
+            return float(cell.find_next_sibling("td").text.split()[0])
+        return 0.0
+
+    return {
+        "serving_size_value": 1.0,
+        "serving_size_unit": food_name,
+        "calories_per_serving": safe_get("Calories"),
+        "protein_g_per_serving": safe_get("Protein"),
+        "carbs_g_per_serving": safe_get("Carbohydrate"),
+        "fat_g_per_serving": safe_get("Total Fat")
+    }
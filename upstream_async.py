@@ -0,0 +1,189 @@
+"""
+Async lookups against HFS and nutritionvalue.org over one shared httpx client.
+
+A request waiting on an upstream here is a suspended coroutine rather than a
+blocked thread, so one process can have thousands of them in flight; actual
+connections are capped at UPSTREAM_MAX_CONNECTIONS and the rest wait for one.
+
+Everything runs on a single event loop per process. Under ASGI (asgi.py)
+that is the server's loop, attached at startup; otherwise a daemon thread
+runs one, started on first use. Sync code (the receipt pipeline in Flask
+views) hands coroutines to it with submit():
+
+    future = upstream_async.submit(upstream_async.get_nutrition_from_web('banana'))
+    nutrition = future.result()
+
+Requires httpx (pip install httpx); nutritionvalue.org lookups also need
+beautifulsoup4.
+"""
+
+import asyncio
+import os
+import threading
+
+import config
+import metrics
+import upstream
+from nutrition_cache import nutrition_cache, normalize_food_name
+from tracing import span
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+_client = None
+_inflight = {}  # key -> Task of a shared() fetch
+
+
+def available():
+    """True if httpx is installed"""
+    return httpx is not None
+
+
+def attach(loop):
+    """Run lookups on an existing event loop (the ASGI server's) instead of a background thread"""
+    global _loop, _loop_pid, _client
+    with _loop_lock:
+        _loop, _loop_pid, _client = loop, os.getpid(), None
+
+
+def loop():
+    """This process's lookup loop, starting the background thread if none is attached"""
+    global _loop, _loop_pid, _client
+    with _loop_lock:
+        # A loop inherited through fork has no thread running it in this process
+        if _loop is None or _loop_pid != os.getpid():
+            _loop, _loop_pid, _client = asyncio.new_event_loop(), os.getpid(), None
+            threading.Thread(target=_loop.run_forever, name='upstream-async', daemon=True).start()
+        return _loop
+
+
+def submit(coro):
+    """
+    Schedule a coroutine on the lookup loop from another thread.
+
+    The coroutine runs in a copy of the caller's context, so tracing spans
+    nest under the caller's current span.
+
+    Returns:
+        concurrent.futures.Future: The coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, loop())
+
+
+def client():
+    """The shared AsyncClient (created on first use, on the lookup loop)"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(config.UPSTREAM_TIMEOUT, pool=None),  # waiting for a free connection is fine
+            limits=httpx.Limits(max_connections=config.UPSTREAM_MAX_CONNECTIONS,
+                                max_keepalive_connections=config.UPSTREAM_MAX_CONNECTIONS),
+            follow_redirects=True
+        )
+    return _client
+
+
+async def close():
+    """Close the shared client (ASGI shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def shared(key, fetch, *args):
+    """
+    await fetch(*args), with concurrent callers for the same key sharing one call.
+
+    Call on the lookup loop. The result isn't kept once the call finishes;
+    callers cache it themselves.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.ensure_future(fetch(*args))
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: one caller giving up doesn't cancel the fetch the others wait on
+    return await asyncio.shield(task)
+
+
+async def _get(name, url):
+    with metrics.upstream(name):
+        return await client().get(url)
+
+
+# ==================== HFS ====================
+
+async def get_purdue_menu_nutrition(menu_item_name):
+    """Async food_input.get_purdue_menu_nutrition: nutrition for one HFS menu item, or None (raises on 429/5xx)"""
+    res = await _get('hfs', upstream.hfs_item_url(menu_item_name))
+    if res.status_code == 404:
+        return None
+    res.raise_for_status()
+    return upstream.parse_hfs_item(res.json())
+
+
+async def scrape_purdue_daily_menu(date):
+    """
+    Async food_input.scrape_purdue_daily_menu (same items, same order).
+
+    Fetches every hall's menu at once, then each distinct item's nutrition at
+    once, instead of one request after another.
+    """
+    res = await _get('hfs', upstream.hfs_locations_url())
+    halls = upstream.parse_hfs_locations(res.json())
+
+    responses = await asyncio.gather(*(_get('hfs', upstream.hfs_menu_url(loc, date)) for loc in halls))
+    entries = [entry for loc, res in zip(halls, responses) for entry in upstream.parse_hfs_menu(loc, res.json())]
+
+    names = list(dict.fromkeys(name for name, _ in entries))
+    results = await asyncio.gather(*(get_purdue_menu_nutrition(name) for name in names), return_exceptions=True)
+    nutrition = {}
+    for name, result in zip(names, results):
+        # One item's failed lookup keeps that item, without nutrition, rather than failing the menu
+        if isinstance(result, Exception):
+            print(f"Menu nutrition lookup error for '{name}': {result}")
+            result = None
+        nutrition[name] = result or {}
+    return [{**entry, **nutrition[name]} for name, entry in entries]
+
+
+# ==================== NUTRITIONVALUE.ORG ====================
+
+async def get_nutrition_from_web(food_name):
+    """Async food_input.get_nutrition_from_web: cached nutritionvalue.org lookup, or None"""
+    with span('nutrition_lookup', food=food_name):
+        # The cache is SQLite behind a threading lock; keep both off the event loop
+        found, nutrition = await asyncio.to_thread(nutrition_cache.get, food_name)
+        if found:
+            return nutrition
+        food_key = normalize_food_name(food_name)
+        if not food_key:
+            return None
+        return await shared(('nutritionvalue', food_key), _fetch_and_store, food_name)
+
+
+async def _fetch_and_store(food_name):
+    with span('web_scrape', food=food_name) as scrape_span:
+        nutrition = await _scrape_nutritionvalue(food_name)
+        scrape_span.set(found=nutrition is not None)
+    await asyncio.to_thread(nutrition_cache.set, food_name, nutrition)
+    return nutrition
+
+
+async def _scrape_nutritionvalue(food_name):
+    res = await _get('nutritionvalue', upstream.nutritionvalue_search_url(food_name))
+    if res.status_code == 404:
+        return None
+    # Anything else that failed raises, so _fetch_and_store doesn't cache it as a miss
+    res.raise_for_status()
+    food_url = upstream.parse_nutritionvalue_search(res.text)
+    if not food_url:
+        return None
+    page = await _get('nutritionvalue', food_url)
+    page.raise_for_status()
+    return upstream.parse_nutritionvalue_food(page.text, food_name)
@@ -0,0 +1,176 @@
+"""
+In-memory cache of per-user profile and goal rows and the metrics derived
+from them.
+
+The dashboard needs a user's profile (for TDEE) and goals on every load, and
+both change rarely. Entries are loaded from DB.py on first use, kept in a
+bounded LRU, and dropped with invalidate() whenever the profile or goals are
+written. BMR, TDEE and daily targets are computed once per entry and live
+alongside it, so they are invalidated together. A short TTL bounds staleness
+when another process writes the rows.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import DB
+import config
+from nutrition_calculations import calculateBMR, calculateTDEE
+
+CALORIES_PER_LB = 3500
+_PROFILE_FIELDS = ('weight_lbs', 'height_inches', 'age')
+_MISSING = object()
+
+
+def derive_metrics(profile, goals):
+    """
+    Compute BMR, TDEE and daily targets for a user.
+
+    Args:
+        profile (dict): Row from DB.get_user_profile
+        goals (dict): Row from DB.get_user_goals, or None
+
+    Returns:
+        dict: {'bmr', 'tdee', 'targets': {'calories', 'protein_g', 'carbs_g', 'fat_g'}},
+              or None when the profile lacks weight, height or age. Macro targets
+              are None until goals are set.
+    """
+    if profile is None or any(profile[field] in (None, '') for field in _PROFILE_FIELDS):
+        return None
+
+    bmr = calculateBMR(profile['weight_lbs'], profile['height_inches'], profile['age'], profile['sex'])
+    tdee = calculateTDEE(profile['weight_lbs'], profile['height_inches'], profile['age'],
+                         profile['sex'], profile['activity_level'])
+
+    weekly_change = goals['goal_weight_change_lbs_per_week'] if goals else 0
+    calories = int(round(tdee + weekly_change * CALORIES_PER_LB / 7))
+    targets = {'calories': calories, 'protein_g': None, 'carbs_g': None, 'fat_g': None}
+    if goals:
+        protein_pct, carbs_pct, fat_pct = goals['goal_macros_pct']
+        targets['protein_g'] = round(max(calories * protein_pct / 100 / 4, goals['goal_protein_g']), 1)
+        targets['carbs_g'] = round(calories * carbs_pct / 100 / 4, 1)
+        targets['fat_g'] = round(calories * fat_pct / 100 / 9, 1)
+
+    return {'bmr': bmr, 'tdee': tdee, 'targets': targets}
+
+
+class UserCache:
+    """Bounded, thread-safe LRU of {'profile', 'goals', 'derived'} per user"""
+
+    def __init__(self, max_users=None, ttl=None):
+        self.max_users = config.USER_CACHE_SIZE if max_users is None else max_users
+        self.ttl = config.USER_CACHE_TTL if ttl is None else ttl
+
+        # user_id -> (entry dict, expires_at)
+        self._entries = OrderedDict()
+        # user_id -> [invalidate() count, loads running] while the user is being loaded, so a
+        # load that raced an invalidation isn't cached; dropped when the last load finishes
+        self._loads = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'derived_hits': 0, 'derived_misses': 0,
+                       'invalidations': 0, 'evictions': 0}
+
+    def get(self, user_id):
+        """
+        Get a user's cached profile and goals, loading them on a miss.
+
+        Args:
+            user_id (int): User to look up
+
+        Returns:
+            dict: {'profile': dict or None, 'goals': dict or None}
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is not None and cached[1] > now:
+                self._entries.move_to_end(user_id)
+                self._stats['hits'] += 1
+                return cached[0]
+            self._stats['misses'] += 1
+            load = self._loads.setdefault(user_id, [0, 0])
+            load[1] += 1
+            generation = load[0]
+
+        try:
+            entry = {
+                'profile': DB.get_user_profile(user_id),
+                'goals': DB.get_user_goals(user_id)
+            }
+        except Exception:
+            with self._lock:
+                self._end_load(user_id, load)
+            raise
+
+        with self._lock:
+            self._end_load(user_id, load)
+            if entry['profile'] is None:
+                # Unknown user: don't cache, the id may be registered next
+                return entry
+            if load[0] != generation:
+                # Invalidated while loading: the rows read may predate the write
+                return entry
+            self._entries[user_id] = (entry, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return entry
+
+    def _end_load(self, user_id, load):
+        """Stop tracking a finished load once no other load of the user is running (lock held)"""
+        load[1] -= 1
+        if not load[1]:
+            del self._loads[user_id]
+
+    def get_profile(self, user_id):
+        """Get a user's profile dict, or None if the user doesn't exist"""
+        return self.get(user_id)['profile']
+
+    def get_goals(self, user_id):
+        """Get a user's goals dict, or None if no goals are set"""
+        return self.get(user_id)['goals']
+
+    def get_derived(self, user_id):
+        """Get a user's memoized derive_metrics() result (None if the profile is incomplete)"""
+        entry = self.get(user_id)
+        with self._lock:
+            derived = entry.get('derived', _MISSING)
+            if derived is not _MISSING:
+                self._stats['derived_hits'] += 1
+                return derived
+            self._stats['derived_misses'] += 1
+
+        # An invalidation meanwhile detaches this entry, so storing into it is harmless
+        derived = derive_metrics(entry['profile'], entry['goals'])
+        with self._lock:
+            entry['derived'] = derived
+        return derived
+
+    def invalidate(self, user_id):
+        """Drop a user's entry after their profile or goals change"""
+        with self._lock:
+            load = self._loads.get(user_id)
+            if load is not None:
+                load[0] += 1
+            if self._entries.pop(user_id, None) is not None:
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters (entries and derived metrics) and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        derived_lookups = stats['derived_hits'] + stats['derived_misses']
+        stats['derived_hit_rate'] = round(stats['derived_hits'] / derived_lookups, 3) if derived_lookups else 0.0
+        return stats
+
+
+user_cache = UserCache()
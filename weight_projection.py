@@ -0,0 +1,244 @@
+"""
+Multi-week weight trajectory projection.
+
+getWeightChange gives a single linear weekly number. This module simulates
+weight forward week by week instead: each week TDEE is recomputed from the
+current weight (exactly as calculateTDEE would, rounding included), the
+user's mean logged intake is applied, and the weight is updated with the
+same 3500 kcal/lb rule. Confidence bands come from the variance of the
+logged daily intake.
+
+All functions work on arrays of users, so a whole cohort is projected with
+one loop over weeks.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import config
+import DB
+from nutrition_batch import ACTIVITY_MULTIPLIERS, DEFAULT_ACTIVITY_MULTIPLIER, LBS_TO_KG, INCHES_TO_CM
+from nutrition_calculations import calculateTDEE
+
+DAYS_PER_WEEK = 7
+CALORIES_PER_LB = 3500
+
+
+def _column(values, n=None):
+    arr = np.atleast_1d(np.asarray(values, dtype=np.float64))
+    if n is not None and arr.shape[0] != n:
+        arr = np.broadcast_to(arr, (n,))
+    return arr
+
+
+def intake_stats(daily_calories):
+    """
+    Mean and sample standard deviation of logged daily calories.
+
+    Args:
+        daily_calories (list[float]): Calories for each logged day
+
+    Returns:
+        tuple: (mean, std, days_logged); std is 0 with fewer than two days
+    """
+    values = np.asarray(daily_calories, dtype=np.float64)
+    days = len(values)
+    if days == 0:
+        return 0.0, 0.0, 0
+    std = float(values.std(ddof=1)) if days > 1 else 0.0
+    return float(values.mean()), std, days
+
+
+def project_weights(weight_lbs, height_inches, age, sex, activity_level,
+                    intake_mean, intake_std=0.0, intake_days=1, weeks=52, z=None):
+    """
+    Project weight week by week for one or many users.
+
+    Args:
+        weight_lbs, height_inches, age: Starting body metrics (scalars or arrays)
+        sex: 'male' or anything else (treated as female), scalar or list
+        activity_level: Activity level name(s) (unknown -> sedentary)
+        intake_mean: Mean daily calorie intake per user
+        intake_std: Standard deviation of daily intake per user
+        intake_days: Number of logged days the mean was estimated from
+        weeks (int): Number of weeks to project
+        z (float, optional): Band width in standard deviations (default config.PROJECTION_CONFIDENCE_Z)
+
+    Returns:
+        dict: 'week' (weeks+1,) and (n, weeks+1) arrays 'weight', 'lower',
+              'upper', 'std' and 'tdee' (TDEE at the start of each week)
+    """
+    if z is None:
+        z = config.PROJECTION_CONFIDENCE_Z
+
+    weight = _column(weight_lbs)
+    n = weight.shape[0]
+    height = _column(height_inches, n)
+    ages = _column(age, n)
+    sexes = [sex] * n if isinstance(sex, str) or sex is None else list(sex)
+    levels = [activity_level] * n if isinstance(activity_level, str) or activity_level is None else list(activity_level)
+    mean = _column(intake_mean, n)
+    std = _column(intake_std, n)
+    days = np.maximum(_column(intake_days, n), 1)
+
+    # Per-user terms of calculateTDEE that don't depend on weight, kept in its operation order
+    height_term = 6.25 * (height * INCHES_TO_CM)
+    age_term = 5 * ages
+    offset = np.array([5.0 if s == 'male' else -161.0 for s in sexes])
+    multiplier = np.array([ACTIVITY_MULTIPLIERS.get(level, DEFAULT_ACTIVITY_MULTIPLIER) for level in levels])
+
+    # Simulate with weeks on the first axis so each step writes a contiguous row
+    weights = np.empty((weeks + 1, n))
+    tdees = np.empty((weeks + 1, n))
+    current = weight.copy()
+    for k in range(weeks + 1):
+        weights[k] = current
+        tdee = np.rint((10 * (current * LBS_TO_KG) + height_term - age_term + offset) * multiplier)
+        tdees[k] = tdee
+        current = current + ((mean - tdee) * DAYS_PER_WEEK) / CALORIES_PER_LB
+
+    # A weight deviation carries over to the next week scaled by q, because TDEE
+    # falls 10 * LBS_TO_KG * multiplier kcal/day per pound lost. Weekly intake noise
+    # adds c^2 * std^2 / 7 each week (Var[k+1] = q^2 Var[k] + c^2 std^2 / 7), and the
+    # error in the estimated mean (std^2 / days) shifts every week by the same amount.
+    c = DAYS_PER_WEEK / CALORIES_PER_LB
+    q = 1 - c * multiplier * 10 * LBS_TO_KG
+    k = np.arange(weeks + 1)[:, None]
+    qk = q ** k
+    noise_var = (c * std) ** 2 / DAYS_PER_WEEK * (1 - qk ** 2) / (1 - q ** 2)
+    mean_var = (c * std) ** 2 / days * ((1 - qk) / (1 - q)) ** 2
+    band = np.sqrt(noise_var + mean_var)
+
+    return {
+        'week': k[:, 0],
+        'weight': weights.T,
+        'lower': (weights - z * band).T,
+        'upper': (weights + z * band).T,
+        'std': band.T,
+        'tdee': tdees.T.astype(np.int64)
+    }
+
+
+def project_scalar(weight_lbs, height_inches, age, sex, activity_level, intake_mean, weeks=52):
+    """Reference week-by-week projection for one user using calculateTDEE directly"""
+    weight = weight_lbs
+    trajectory = []
+    for _ in range(weeks + 1):
+        trajectory.append(weight)
+        tdee = calculateTDEE(weight, height_inches, age, sex, activity_level)
+        weight = weight + ((intake_mean - tdee) * DAYS_PER_WEEK) / CALORIES_PER_LB
+    return trajectory
+
+
+def _history_window(end_date, history_days):
+    if end_date is None:
+        end_date = datetime.now().date()
+    elif isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    if history_days is None:
+        history_days = config.PROJECTION_HISTORY_DAYS
+    start_date = end_date - timedelta(days=history_days - 1)
+    return start_date.isoformat(), end_date.isoformat()
+
+
+def project_user(user_id, weeks=52, end_date=None, history_days=None):
+    """
+    Project one user's weight from their profile and recent intake.
+
+    Args:
+        user_id (int): User to project
+        weeks (int): Number of weeks to project
+        end_date (str|date, optional): Last day of intake history (default today)
+        history_days (int, optional): Days of history to use (default config.PROJECTION_HISTORY_DAYS)
+
+    Returns:
+        dict: JSON-ready projection with intake stats and weekly weight/lower/upper/tdee
+
+    Raises:
+        ValueError: If the user is missing body metrics or has no logged intake
+    """
+    profile = DB.get_user_profile(user_id)
+    if profile is None:
+        raise ValueError('User not found')
+    missing = [field for field in ('weight_lbs', 'height_inches', 'age') if profile[field] in (None, '')]
+    if missing:
+        raise ValueError(f"Profile is missing {', '.join(missing)}")
+
+    start_date, end_date = _history_window(end_date, history_days)
+    history = DB.get_daily_calorie_history(user_id, start_date, end_date)
+    mean, std, days = intake_stats([row[1] for row in history])
+    if days == 0:
+        raise ValueError(f'No meals logged between {start_date} and {end_date}')
+
+    result = project_weights(profile['weight_lbs'], profile['height_inches'], profile['age'],
+                             profile['sex'], profile['activity_level'], mean, std, days, weeks)
+    return {
+        'user_id': user_id,
+        'history': {'start_date': start_date, 'end_date': end_date, 'days_logged': days,
+                    'mean_calories': round(mean, 1), 'std_calories': round(std, 1)},
+        'confidence_z': config.PROJECTION_CONFIDENCE_Z,
+        'weeks': [
+            {'week': int(week), 'weight_lbs': round(float(weight), 2), 'lower_lbs': round(float(lower), 2),
+             'upper_lbs': round(float(upper), 2), 'tdee': int(tdee)}
+            for week, weight, lower, upper, tdee in zip(result['week'], result['weight'][0], result['lower'][0],
+                                                         result['upper'][0], result['tdee'][0])
+        ]
+    }
+
+
+def project_cohort(weeks=52, end_date=None, history_days=None):
+    """
+    Project every user with complete body metrics and logged intake in one pass.
+
+    Returns:
+        dict: 'user_ids' plus the project_weights arrays, one row per user
+    """
+    start_date, end_date = _history_window(end_date, history_days)
+    profiles = DB.get_all_user_profiles()
+    stats = {row[0]: row[1:] for row in DB.get_all_calorie_stats(start_date, end_date)}
+    rows = [(profile, stats[profile[0]]) for profile in profiles if profile[0] in stats]
+
+    if not rows:
+        empty = project_weights([], [], [], [], [], [], weeks=weeks)
+        return dict(empty, user_ids=np.empty(0, dtype=np.int64))
+
+    user_ids = np.array([profile[0] for profile, _ in rows], dtype=np.int64)
+    days = np.array([s[0] for _, s in rows], dtype=np.float64)
+    total = np.array([s[1] for _, s in rows], dtype=np.float64)
+    total_sq = np.array([s[2] for _, s in rows], dtype=np.float64)
+    mean = total / days
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.where(days > 1, (total_sq - days * mean ** 2) / (days - 1), 0.0)
+    std = np.sqrt(np.maximum(variance, 0.0))
+
+    result = project_weights([p[1] for p, _ in rows], [p[2] for p, _ in rows], [p[3] for p, _ in rows],
+                             [p[4] for p, _ in rows], [p[5] for p, _ in rows], mean, std, days, weeks)
+    result['user_ids'] = user_ids
+    return result
+
+
+def verify_against_scalar(sample_size=200, weeks=52, seed=0):
+    """
+    Compare project_weights with project_scalar on random profiles.
+
+    Returns:
+        int: Number of users whose trajectories differ
+    """
+    rng = np.random.default_rng(seed)
+    n = sample_size
+    weight = rng.uniform(100, 320, n).round(1)
+    height = rng.uniform(58, 78, n).round(1)
+    age = rng.integers(18, 80, n)
+    sex = rng.choice(['male', 'female'], n).tolist()
+    activity = rng.choice(list(ACTIVITY_MULTIPLIERS), n).tolist()
+    intake = rng.uniform(1200, 4000, n).round(0)
+
+    result = project_weights(weight, height, age, sex, activity, intake, weeks=weeks)
+    mismatches = 0
+    for i in range(n):
+        expected = project_scalar(float(weight[i]), float(height[i]), int(age[i]), sex[i], activity[i],
+                                  float(intake[i]), weeks)
+        if expected != result['weight'][i].tolist():
+            mismatches += 1
+    return mismatches